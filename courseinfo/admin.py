@@ -1,7 +1,21 @@
 from django.contrib import admin
 
-from .models import Course, Instructor, Period, Registration, Section, Semester, Student, Year
+from .models import (
+    ChangeFeedConsumer,
+    Course,
+    DuplicateCandidate,
+    Instructor,
+    Period,
+    Registration,
+    RegistrationRequest,
+    Section,
+    Semester,
+    Student,
+    WaitlistEntry,
+    Year,
+)
 
+admin.site.register(ChangeFeedConsumer)
 admin.site.register(Course)
 admin.site.register(Instructor)
 admin.site.register(Period)
@@ -9,4 +23,26 @@ admin.site.register(Registration)
 admin.site.register(Section)
 admin.site.register(Semester)
 admin.site.register(Student)
+admin.site.register(WaitlistEntry)
 admin.site.register(Year)
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ('first_label', 'second_label', 'person_type', 'score', 'status', 'found_at')
+    list_filter = ('person_type', 'status')
+    actions = ('mark_duplicate', 'mark_distinct')
+
+    @admin.action(description='Mark selected pairs as duplicates')
+    def mark_duplicate(self, request, queryset):
+        queryset.update(status=DuplicateCandidate.DUPLICATE)
+
+    @admin.action(description='Mark selected pairs as distinct people')
+    def mark_distinct(self, request, queryset):
+        queryset.update(status=DuplicateCandidate.DISTINCT)
+
+
+@admin.register(RegistrationRequest)
+class RegistrationRequestAdmin(admin.ModelAdmin):
+    list_display = ('student', 'requested_section', 'status', 'reason', 'requested_at', 'processed_at')
+    list_filter = ('status',)
@@ -0,0 +1,196 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import ArchivedRegistration, ArchivedSection, Instructor, Section, Semester, SemesterVersion
+from .triggers import install_triggers
+
+# the SemesterVersion row bumped with every semester, which the overview is keyed on
+ALL_SEMESTERS = 0
+
+# (group key, label lookups) of the per-semester breakdowns, over the sections of the semester.
+BREAKDOWNS = {
+    'course': ('course', ['course__course_number', 'course__course_name']),
+    'instructor': ('instructor', ['instructor__last_name', 'instructor__first_name']),
+}
+
+# Orderings of the teaching-load report, by sort parameter; ties go by name.
+LOAD_ORDERINGS = {
+    'students': ['-student_count', 'last_name', 'first_name'],
+    'sections': ['-section_count', 'last_name', 'first_name'],
+    'courses': ['-course_count', 'last_name', 'first_name'],
+    'name': ['last_name', 'first_name', 'disambiguator'],
+}
+
+
+def _fill(row):
+    row['fill'] = round(100 * row['registrations'] / row['capacity']) if row['capacity'] else 0
+    return row
+
+
+def _count(queryset, group):
+    # a correlated COUNT(*) of ``queryset`` per ``group`` of the outer query
+    return Coalesce(Subquery(queryset.order_by().values(group).annotate(total=Count('pk')).values('total'),
+                             output_field=IntegerField()), 0)
+
+
+def semester_totals(using=DEFAULT_DB_ALIAS):
+    """
+    Sections, seats and registrations of every semester, in one query. Live semesters sum the
+    trigger-maintained Section.enrolled_count, so the work grows with the number of sections
+    rather than of registrations; archived ones count their archived rows.
+    """
+    archived_sections = ArchivedSection.objects.filter(semester=OuterRef('pk'))
+    rows = (Semester.objects.using(using).order_by('year__year', 'period__period_sequence')
+            .values('semester_id', 'is_archived', 'year__year', 'period__period_name')
+            .annotate(section_count=Count('sections'),
+                      capacity=Coalesce(Sum('sections__capacity'), 0),
+                      registrations=Coalesce(Sum('sections__enrolled_count'), 0),
+                      archived_section_count=_count(archived_sections, 'semester'),
+                      archived_capacity=Coalesce(Subquery(
+                          archived_sections.order_by().values('semester').annotate(total=Sum('capacity'))
+                          .values('total')), 0),
+                      archived_registrations=_count(ArchivedRegistration.objects.filter(
+                          section__semester=OuterRef('pk')), 'section__semester')))
+    totals = []
+    for row in rows:
+        row['year'], row['period'] = row.pop('year__year'), row.pop('period__period_name')
+        archived = {key: row.pop('archived_' + key) for key in ('section_count', 'capacity', 'registrations')}
+        if row['is_archived']:
+            row.update(archived)
+        totals.append(_fill(row))
+    return totals
+
+
+def semester_breakdown(semester, by, using=DEFAULT_DB_ALIAS):
+    """
+    Sections, seats and registrations of ``semester`` grouped by course or instructor (``by``),
+    in one GROUP BY over its sections; two for an archived semester, whose registration counts
+    come from the archive.
+    """
+    group, labels = BREAKDOWNS[by]
+    model = ArchivedSection if semester.is_archived else Section
+    rows = list(model.objects.using(using).filter(semester=semester).order_by(*labels)
+                .values(group, *labels)
+                .annotate(section_count=Count('pk'), capacity=Sum('capacity'),
+                          **({} if semester.is_archived else {'registrations': Sum('enrolled_count')})))
+    if semester.is_archived:
+        counts = dict(ArchivedRegistration.objects.using(using).filter(section__semester=semester).order_by()
+                      .values_list('section__' + group).annotate(Count('pk')))
+        for row in rows:
+            row['registrations'] = counts.get(row[group], 0)
+    return [_fill(row) for row in rows]
+
+
+def _bump(semester):
+    # ``semester`` is a query for the semester ID; it finds nothing for a section that is gone,
+    # as when a flush empties the tables in any order, and then only the overview is bumped
+    return (
+        'INSERT INTO courseinfo_semesterversion (semester_id, version) '
+        'SELECT semester_id, 1 FROM (%s UNION ALL SELECT %d) WHERE true '
+        'ON CONFLICT (semester_id) DO UPDATE SET version = version + 1;' % (semester, ALL_SEMESTERS)
+    )
+
+
+def _triggers(kind, table, semester, columns=None):
+    update = 'UPDATE OF %s' % ', '.join(columns) if columns else 'UPDATE'
+    return {
+        'courseinfo_analytics_%s_ai' % kind: (
+            'CREATE TRIGGER courseinfo_analytics_%s_ai AFTER INSERT ON %s BEGIN %s END'
+            % (kind, table, _bump(semester % 'NEW'))
+        ),
+        'courseinfo_analytics_%s_au' % kind: (
+            'CREATE TRIGGER courseinfo_analytics_%s_au AFTER %s ON %s BEGIN %s %s END'
+            % (kind, update, table, _bump(semester % 'OLD'), _bump(semester % 'NEW'))
+        ),
+        'courseinfo_analytics_%s_ad' % kind: (
+            'CREATE TRIGGER courseinfo_analytics_%s_ad AFTER DELETE ON %s BEGIN %s END'
+            % (kind, table, _bump(semester % 'OLD'))
+        ),
+    }
+
+
+# SemesterVersion is maintained by the database itself, so every write path to a semester's
+# sections and registrations bumps that semester alone. Section.enrolled_count is left out:
+# the registration writes that change it already bump. Renamed courses and instructors show
+# once the cached reports expire.
+TRIGGERS = {
+    **_triggers('semester', 'courseinfo_semester', 'SELECT %s.semester_id AS semester_id'),
+    **_triggers('section', 'courseinfo_section', 'SELECT %s.semester_id AS semester_id',
+                ['semester_id', 'course_id', 'instructor_id', 'capacity']),
+    **_triggers('archivedsection', 'courseinfo_archivedsection', 'SELECT %s.semester_id AS semester_id',
+                ['semester_id', 'course_id', 'instructor_id', 'capacity']),
+    **_triggers('registration', 'courseinfo_registration',
+                'SELECT semester_id FROM courseinfo_section WHERE section_id = %s.section_id',
+                ['section_id']),
+    **_triggers('archivedregistration', 'courseinfo_archivedregistration',
+                'SELECT semester_id FROM courseinfo_archivedsection WHERE section_id = %s.section_id',
+                ['section_id']),
+}
+
+
+def _cached(key, semester_id, compute, using):
+    cache = caches[settings.ANALYTICS['CACHE']]
+    version = (SemesterVersion.objects.using(using).filter(semester_id=semester_id)
+               .values_list('version', flat=True).first())
+    key = 'analytics:%s:%s' % (key, version or 0)
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.set(key, result, timeout=settings.ANALYTICS['TIMEOUT'])
+    return result
+
+
+def overview(using=DEFAULT_DB_ALIAS):
+    """semester_totals(), cached until the next write to any semester, section or registration."""
+    return _cached('semesters', ALL_SEMESTERS, lambda: semester_totals(using), using)
+
+
+def semester_report(semester, using=DEFAULT_DB_ALIAS):
+    """Every breakdown of ``semester``, cached until the next write to its sections or registrations."""
+    return _cached('semester:%d' % semester.pk, semester.pk,
+                   lambda: {by: semester_breakdown(semester, by, using) for by in BREAKDOWNS}, using)
+
+
+def teaching_load(semester, sort='students', using=DEFAULT_DB_ALIAS):
+    """
+    Every instructor annotated with the sections, students and distinct courses they teach in
+    ``semester`` (zero when they teach nothing that term), ordered by ``sort``, one of
+    LOAD_ORDERINGS. This is a single GROUP BY over the instructors joined to their sections,
+    so any slice of it is one query however many instructors there are. Live semesters sum
+    Section.enrolled_count; archived ones count their archived registrations.
+    """
+    if semester.is_archived:
+        in_term = Q(archived_sections__semester=semester)
+        counts = {'section_count': Count('archived_sections', filter=in_term, distinct=True),
+                  'student_count': Count('archived_sections__registrations', filter=in_term),
+                  'course_count': Count('archived_sections__course', filter=in_term, distinct=True)}
+    else:
+        in_term = Q(sections__semester=semester)
+        counts = {'section_count': Count('sections', filter=in_term),
+                  'student_count': Coalesce(Sum('sections__enrolled_count', filter=in_term), 0),
+                  'course_count': Count('sections__course', filter=in_term, distinct=True)}
+    return Instructor.objects.using(using).annotate(**counts).order_by(*LOAD_ORDERINGS[sort])
+
+
+def install_semester_versions(sender, using=DEFAULT_DB_ALIAS, apps=None, **kwargs):
+    """
+    post_migrate handler: create the version triggers. If any were missing, sections and
+    registrations may have changed without a bump, so every semester's version is bumped.
+    """
+    if apps is not None:
+        try:
+            apps.get_model('courseinfo', 'SemesterVersion')
+        except LookupError:
+            # migrated back to before analytics were versioned
+            return
+    connection = connections[using]
+    if install_triggers(connection, TRIGGERS):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO courseinfo_semesterversion (semester_id, version) '
+                'SELECT semester_id, 1 FROM (SELECT semester_id FROM courseinfo_semester UNION ALL SELECT %s) '
+                'WHERE true ON CONFLICT (semester_id) DO UPDATE SET version = version + 1', [ALL_SEMESTERS]
+            )
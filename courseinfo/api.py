@@ -0,0 +1,188 @@
+import base64
+import binascii
+
+from django.apps import apps
+
+# Models served by the read-only JSON API, by URL name.
+RESOURCES = ('period', 'year', 'semester', 'course', 'instructor', 'student', 'section', 'registration')
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+MAX_BATCH = 500
+
+
+class ApiError(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Resource:
+    """
+    The fields of a model as the API shows them: every concrete column under its column name
+    (foreign keys as ``<relation>_id``), plus its foreign keys to other resources, which can be
+    embedded as nested objects under the relation's name.
+    """
+
+    def __init__(self, name):
+        if name not in RESOURCES:
+            raise ApiError('Unknown resource %r.' % name, status=404)
+        self.name = name
+        self.model = apps.get_model('courseinfo', name)
+        self.pk = self.model._meta.pk.attname
+        self.fields = [field.attname for field in self.model._meta.concrete_fields]
+        self.relations = {field.name: (field.attname, field.related_model._meta.model_name)
+                          for field in self.model._meta.concrete_fields
+                          if field.is_relation and field.related_model._meta.model_name in RESOURCES}
+
+    @property
+    def permission(self):
+        return 'courseinfo.view_%s' % self.name
+
+    def select_fields(self, text):
+        if not text:
+            return list(self.fields)
+        fields = text.split(',')
+        unknown = [field for field in fields if field not in self.fields]
+        if unknown:
+            raise ApiError('Unknown %s fields: %s.' % (self.name, ', '.join(unknown)))
+        return fields
+
+
+def encode_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ApiError('Invalid cursor.')
+
+
+class Query:
+    """
+    A page of one resource, with the fields and embedded relations asked for in ``params``:
+
+    * ``fields=a,b`` picks the fields of the resource, ``fields[<embed>]=a,b`` those of an
+      embedded object;
+    * ``embed=section,section.course`` nests related objects, to any depth;
+    * ``limit`` and ``cursor`` page through the rows in primary key order, so every page is an
+      index range scan however deep into the table it is.
+
+    Rows are read with values() and never become model instances. A page costs one query, plus
+    one per embedded path for all of the page's rows at once.
+    """
+
+    def __init__(self, resource, params):
+        self.resource = Resource(resource)
+        self.fields = self.resource.select_fields(params.get('fields'))
+        self.embeds = {}
+        for path in sorted(filter(None, params.get('embed', '').split(','))):
+            parent = self.resource
+            for depth, name in enumerate(path.split('.'), 1):
+                if name not in parent.relations:
+                    raise ApiError('%s has no relation %r to embed.' % (parent.name, name))
+                prefix = '.'.join(path.split('.')[:depth])
+                if prefix not in self.embeds:
+                    target = Resource(parent.relations[name][1])
+                    self.embeds[prefix] = (parent, name, target,
+                                           target.select_fields(params.get('fields[%s]' % prefix)))
+                parent = self.embeds[prefix][2]
+        try:
+            self.limit = min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise ApiError('Invalid limit.')
+        if self.limit < 1:
+            raise ApiError('Invalid limit.')
+        self.after = decode_cursor(params['cursor']) if params.get('cursor') else None
+
+    def permissions(self):
+        return {self.resource.permission} | {target.permission for _, _, target, _ in self.embeds.values()}
+
+    def columns(self, resource, fields, path):
+        # the requested fields, plus the key of the row and those of its relations to embed
+        needed = {resource.pk}
+        for prefix, (parent, name, _, _) in self.embeds.items():
+            if prefix.rpartition('.')[0] == path:
+                needed.add(resource.relations[name][0])
+        return fields + sorted(needed - set(fields))
+
+    def fetch(self, queryset):
+        """Return the rows of ``queryset`` (of the resource's model) as dicts, with their embeds."""
+        queryset = queryset.order_by('pk').values(*self.columns(self.resource, self.fields, ''))
+        if self.after is not None:
+            queryset = queryset.filter(pk__gt=self.after)
+        rows = list(queryset[:self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.last_pk = rows[-1][self.resource.pk] if rows else None
+
+        levels = {'': (rows, self.fields)}
+        for prefix in sorted(self.embeds, key=lambda path: path.count('.')):
+            parent, name, target, fields = self.embeds[prefix]
+            attname = parent.relations[name][0]
+            owners = levels[prefix.rpartition('.')[0]][0]
+            ids = {row[attname] for row in owners if row[attname] is not None}
+            embedded = {}
+            if ids:
+                embedded = {row[target.pk]: row for row in
+                            target.model.objects.order_by().filter(pk__in=ids)
+                            .values(*self.columns(target, fields, prefix))}
+            for row in owners:
+                row[name] = embedded.get(row[attname])
+            levels[prefix] = (list(embedded.values()), fields)
+
+        # drop the keys that were only read to join the embeds
+        for path, (level_rows, fields) in levels.items():
+            keep = set(fields) | {name for prefix, (_, name, _, _) in self.embeds.items()
+                                  if prefix.rpartition('.')[0] == path}
+            for row in level_rows:
+                for key in [key for key in row if key not in keep]:
+                    del row[key]
+        return rows
+
+    def next_cursor(self):
+        return encode_cursor(self.last_pk) if self.has_next else None
+
+
+def parse_ids(text):
+    try:
+        ids = [int(pk) for pk in text.split(',') if pk.strip()]
+    except ValueError:
+        raise ApiError('ids must be a comma-separated list of integers.')
+    if not ids:
+        raise ApiError('No ids given.')
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH:
+        raise ApiError('At most %d ids per request.' % MAX_BATCH)
+    return ids
+
+
+class BatchQuery(Query):
+    """
+    The rows of one resource with the primary keys in ``ids=1,2,3``, with the fields and embeds
+    of Query, in the order asked for. However many IDs, that is one ``IN`` query for the rows
+    plus one per embedded path, each row shaped as the detail endpoint shows it.
+    """
+
+    def __init__(self, resource, params):
+        super().__init__(resource, params)
+        self.ids = parse_ids(params.get('ids', ''))
+        self.limit = len(self.ids)
+        self.after = None
+
+    def fetch(self, queryset):
+        fields = self.fields
+        # the key is needed to put the rows in order, even when it was not asked for
+        self.fields = fields + [self.resource.pk] if self.resource.pk not in fields else fields
+        try:
+            rows = {row[self.resource.pk]: row for row in super().fetch(queryset.filter(pk__in=self.ids))}
+        finally:
+            self.fields = fields
+        if self.resource.pk not in fields:
+            for row in rows.values():
+                del row[self.resource.pk]
+        self.missing = [pk for pk in self.ids if pk not in rows]
+        return [rows[pk] for pk in self.ids if pk in rows]
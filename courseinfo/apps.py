@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_migrate, pre_migrate
 
 
 class CourseinfoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courseinfo'
+
+    def ready(self):
+        from .analytics import install_semester_versions
+        from .changelog import install_change_log
+        from .enrollment import install_enrollment_counters
+        from .search import install_search_index
+        from .throttling import forget_user_rates
+        from .transcript import install_transcript_versions
+        from .triggers import drop_triggers
+        pre_migrate.connect(drop_triggers, sender=self)
+        post_migrate.connect(install_search_index, sender=self)
+        post_migrate.connect(install_enrollment_counters, sender=self)
+        post_migrate.connect(install_change_log, sender=self)
+        post_migrate.connect(install_transcript_versions, sender=self)
+        post_migrate.connect(install_semester_versions, sender=self)
+        m2m_changed.connect(forget_user_rates, sender=get_user_model().groups.through)
@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchivedRegistration, ArchivedSection, Registration, RegistrationRequest, Section, WaitlistEntry
+
+DEFAULT_BATCH_SIZE = 500
+
+SECTION_FIELDS = ('section_id', 'section_name', 'semester_id', 'course_id', 'instructor_id', 'capacity')
+REGISTRATION_FIELDS = ('registration_id', 'student_id', 'section_id')
+
+# the RegistrationRequest column pointing at each section table
+REQUEST_SECTION_FIELDS = {Section: 'section_id', ArchivedSection: 'archived_section_id'}
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def _move_sections(semester, from_sections, from_registrations, to_sections, to_registrations, batch_size):
+    """
+    Copy a semester's sections and their registrations from one pair of tables to the other,
+    point the sections' registration requests at the copies and delete the originals,
+    ``batch_size`` sections per transaction. Primary keys are kept, so URLs to the moved rows
+    stay valid.
+    """
+    moved_sections = moved_registrations = 0
+    while True:
+        with transaction.atomic():
+            section_ids = list(from_sections.objects.filter(semester=semester)
+                               .order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not section_ids:
+                return moved_sections, moved_registrations
+            sections = from_sections.objects.filter(pk__in=section_ids).order_by()
+            registrations = from_registrations.objects.filter(section_id__in=section_ids).order_by()
+            to_sections.objects.bulk_create(
+                [to_sections(**row) for row in sections.values(*SECTION_FIELDS)]
+            )
+            moved_registrations += len(to_registrations.objects.bulk_create(
+                [to_registrations(**row) for row in registrations.values(*REGISTRATION_FIELDS)]
+            ))
+            from_field, to_field = REQUEST_SECTION_FIELDS[from_sections], REQUEST_SECTION_FIELDS[to_sections]
+            requests = RegistrationRequest.objects.filter(**{'%s__in' % from_field: section_ids})
+            # one queued since archive_semester() checked is turned down rather than left for a
+            # worker that can no longer register into the section
+            requests.filter(status=RegistrationRequest.PENDING).update(
+                status=RegistrationRequest.REJECTED, reason='semester archived', processed_at=timezone.now()
+            )
+            requests.update(**{to_field: F(from_field), from_field: None})
+            registrations.delete()
+            sections.delete()
+            moved_sections += len(section_ids)
+
+
+def archive_semester(semester, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Move a closed semester's sections and registrations into the archive tables, and return
+    how many sections and registrations were moved and how many waitlist entries deleted.
+    Waitlists end with the term and have no archive table, so unarchiving does not bring
+    them back. Raises ArchiveError while registration requests for the semester are still
+    queued; finished ones move with their sections.
+    """
+    pending = RegistrationRequest.objects.filter(section__semester=semester, status=RegistrationRequest.PENDING)
+    if pending.exists():
+        raise ArchiveError('%d registration requests for %s are still queued; process them first.'
+                           % (pending.count(), semester))
+    # flag the semester first so no new sections can be scheduled into it while it is being moved
+    semester.is_archived = True
+    semester.save(update_fields=['is_archived'])
+    waitlisted = WaitlistEntry.objects.filter(section__semester=semester).delete()[0]
+    return _move_sections(semester, Section, Registration, ArchivedSection, ArchivedRegistration,
+                          batch_size) + (waitlisted,)
+
+
+def unarchive_semester(semester, batch_size=DEFAULT_BATCH_SIZE):
+    """Move an archived semester's sections and registrations back into the live tables."""
+    moved = _move_sections(semester, ArchivedSection, ArchivedRegistration, Section, Registration, batch_size)
+    semester.is_archived = False
+    semester.save(update_fields=['is_archived'])
+    return moved
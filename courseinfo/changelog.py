@@ -0,0 +1,154 @@
+import json
+from datetime import timedelta
+
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Max, Min
+from django.urls import reverse
+from django.utils import timezone
+
+from .api import RESOURCES, ApiError
+from .loaders import delete_in_batches
+from .models import ChangeFeedConsumer, ChangeLogEntry
+from .triggers import install_triggers
+
+# Models whose writes are logged, by model name. The bookkeeping tables (registration requests,
+# duplicate scans, idempotency keys, the change log itself) are not mirrored downstream.
+LOGGED_MODELS = ('period', 'year', 'semester', 'course', 'instructor', 'student', 'section',
+                 'registration', 'waitlistentry', 'archivedsection', 'archivedregistration')
+
+# Columns the database derives from other tables; a change to one of them alone is not logged,
+# since the change that caused it already was.
+DERIVED_COLUMNS = {'section': {'enrolled_count'}}
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+
+
+def _log(model, key, action):
+    return (
+        "INSERT INTO courseinfo_changelogentry (model, object_id, action, changed_at) "
+        "VALUES ('%s', %s, '%s', strftime('%%Y-%%m-%%d %%H:%%M:%%f', 'now'));" % (model, key, action)
+    )
+
+
+def changelog_triggers(apps=global_apps):
+    """
+    The CREATE TRIGGER statements recording every insert, update and delete of LOGGED_MODELS,
+    built from the models in ``apps`` so they match the schema being migrated to.
+
+    Being triggers, they see every write path: the views, the admin, bulk_create(),
+    queryset.update()/delete(), cascades and raw SQL. An UPDATE that leaves every column as it
+    was (such as the row lock of enrollment.reserve_seat()) is not logged.
+    """
+    triggers = {}
+    for name in LOGGED_MODELS:
+        try:
+            model = apps.get_model('courseinfo', name)
+        except LookupError:
+            continue
+        table = model._meta.db_table
+        pk = model._meta.pk.column
+        changed = ' OR '.join(
+            'OLD.%s IS NOT NEW.%s' % (field.column, field.column) for field in model._meta.concrete_fields
+            if field.column not in DERIVED_COLUMNS.get(name, ())
+        )
+        triggers['courseinfo_changelog_%s_ai' % name] = (
+            'CREATE TRIGGER courseinfo_changelog_%s_ai AFTER INSERT ON %s BEGIN %s END'
+            % (name, table, _log(name, 'NEW.' + pk, ChangeLogEntry.CREATE))
+        )
+        triggers['courseinfo_changelog_%s_au' % name] = (
+            'CREATE TRIGGER courseinfo_changelog_%s_au AFTER UPDATE ON %s WHEN %s BEGIN %s END'
+            % (name, table, changed, _log(name, 'NEW.' + pk, ChangeLogEntry.UPDATE))
+        )
+        triggers['courseinfo_changelog_%s_ad' % name] = (
+            'CREATE TRIGGER courseinfo_changelog_%s_ad AFTER DELETE ON %s BEGIN %s END'
+            % (name, table, _log(name, 'OLD.' + pk, ChangeLogEntry.DELETE))
+        )
+    return triggers
+
+
+def install_change_log(sender, using=DEFAULT_DB_ALIAS, apps=None, **kwargs):
+    """
+    post_migrate handler: create the change log triggers. If any were missing, writes made
+    without them (by data migrations, say) went unrecorded, so a reset entry tells consumers
+    to pull everything again.
+    """
+    apps = apps or global_apps
+    try:
+        entries = apps.get_model('courseinfo', 'ChangeLogEntry')
+    except LookupError:
+        # migrated back to before the change log existed
+        return
+    if install_triggers(connections[using], changelog_triggers(apps)):
+        entries.objects.using(using).create(model='', action=ChangeLogEntry.RESET)
+
+
+class FeedQuery:
+    """
+    A page of the change feed: the entries after change ID ``after``, at most ``limit`` of
+    them. ``consumer`` names the reader, which by asking for the entries after ``after``
+    acknowledges everything up to it.
+    """
+
+    def __init__(self, params):
+        try:
+            self.after = int(params.get('after', 0))
+            self.limit = min(int(params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise ApiError('after and limit must be integers.')
+        if self.after < 0 or self.limit < 1:
+            raise ApiError('Invalid after or limit.')
+        self.consumer = params.get('consumer', '')
+        if len(self.consumer) > ChangeFeedConsumer._meta.get_field('name').max_length:
+            raise ApiError('Consumer name too long.')
+
+    def check(self, using=DEFAULT_DB_ALIAS):
+        """Raise ApiError (410) if entries after ``after`` have already been compacted away."""
+        oldest = (ChangeLogEntry.objects.using(using).order_by('change_id')
+                  .values_list('change_id', flat=True).first())
+        if oldest is not None and self.after < oldest - 1:
+            raise ApiError('Changes before #%d have been compacted; pull everything again and continue '
+                           'from there.' % oldest, status=410)
+
+    def acknowledge(self, using=DEFAULT_DB_ALIAS):
+        if self.consumer:
+            ChangeFeedConsumer.objects.using(using).update_or_create(
+                name=self.consumer, defaults={'acknowledged_change_id': self.after}
+            )
+
+    def lines(self, using=DEFAULT_DB_ALIAS):
+        """The entries as NDJSON lines; a line's ``seq`` is the ``after`` of the next request."""
+        # the API detail URL is its list URL plus the primary key (see courseinfo.urls)
+        api_urls = {name: reverse('courseinfo_api_list_urlpattern', kwargs={'resource': name}) + '%d/'
+                    for name in RESOURCES}
+        entries = (ChangeLogEntry.objects.using(using).filter(change_id__gt=self.after).order_by('change_id')
+                   .values_list('change_id', 'model', 'object_id', 'action', 'changed_at')[:self.limit])
+        for change_id, model, object_id, action, changed_at in entries.iterator(chunk_size=CHUNK_SIZE):
+            url = None
+            if model in api_urls and action != ChangeLogEntry.DELETE:
+                url = api_urls[model] % object_id
+            yield json.dumps({'seq': change_id, 'model': model, 'id': object_id, 'action': action,
+                              'at': changed_at.isoformat(), 'url': url}) + '\n'
+
+
+def compact_change_log(idle_days=None, batch_size=BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Delete the change log entries every consumer has acknowledged and return how many.
+
+    Consumers that have not read the feed for ``idle_days`` no longer hold history back; they
+    get a 410 and pull everything again. With no consumers nothing is acknowledged, so nothing
+    is deleted. The newest entry is always kept, so the feed can still tell a consumer that
+    fell behind from one that is up to date.
+    """
+    consumers = ChangeFeedConsumer.objects.using(using)
+    if idle_days is not None:
+        consumers = consumers.filter(acknowledged_at__gte=timezone.now() - timedelta(days=idle_days))
+    acknowledged = consumers.aggregate(seq=Min('acknowledged_change_id'))['seq']
+    latest = ChangeLogEntry.objects.using(using).aggregate(seq=Max('change_id'))['seq']
+    if acknowledged is None or latest is None:
+        return 0
+    entries = ChangeLogEntry.objects.using(using).filter(change_id__lte=min(acknowledged, latest - 1))
+    return delete_in_batches(entries, batch_size)
@@ -0,0 +1,143 @@
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from django.db import transaction
+
+from .models import DuplicateCandidate, DuplicateScan, Instructor, Student
+
+PERSON_MODELS = {
+    'student': Student,
+    'instructor': Instructor,
+}
+
+DEFAULT_THRESHOLD = 0.85
+
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6',
+}
+
+
+def normalize_name(value):
+    """Lower-case, strip accents and collapse everything that is not a letter or digit to single spaces."""
+    value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(re.findall(r'[a-z0-9]+', value.lower()))
+
+
+def soundex(value):
+    letters = value.replace(' ', '')
+    if not letters:
+        return ''
+    code = letters[0]
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+        if letter not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+class Person:
+    __slots__ = ('pk', 'label', 'first', 'last', 'full', 'disambiguator')
+
+    def __init__(self, pk, first_name, last_name, disambiguator):
+        self.pk = pk
+        self.first = normalize_name(first_name)
+        self.last = normalize_name(last_name)
+        self.full = '%s %s' % (self.first, self.last)
+        self.disambiguator = normalize_name(disambiguator)
+        self.label = '%s, %s' % (last_name.strip(), first_name.strip())
+        if disambiguator.strip():
+            self.label += ' (%s)' % disambiguator.strip()
+
+    def blocking_keys(self):
+        # A phonetic key catches spelling variants ("Jon"/"John"), a prefix key catches typos
+        # that change the sound of a name ("Smtih"/"Smith").
+        return (
+            ('phonetic', soundex(self.last), soundex(self.first)),
+            ('prefix', self.last[:3], self.first[:1]),
+        )
+
+
+def score(first, second, threshold):
+    """Similarity of two people in [0, 1], or None if they cannot be duplicates."""
+    if first.disambiguator and second.disambiguator and first.disambiguator != second.disambiguator:
+        # two different disambiguators mean somebody already marked them as distinct people
+        return None
+    if first.full == second.full:
+        return 1.0
+    matcher = SequenceMatcher(None, first.full, second.full)
+    # real_quick_ratio and quick_ratio are cheap upper bounds of ratio, so most pairs are
+    # rejected without running the full comparison
+    if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+        return None
+    ratio = matcher.ratio()
+    return ratio if ratio >= threshold else None
+
+
+def find_candidate_pairs(people, new_pks=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Yield ``(first, second, score)`` for every pair of people sharing a blocking key whose score
+    reaches ``threshold``. When ``new_pks`` is given, only pairs involving one of those people
+    are compared.
+    """
+    blocks = defaultdict(list)
+    for person in people:
+        for key in person.blocking_keys():
+            blocks[key].append(person)
+    seen = set()
+    for block in blocks.values():
+        if len(block) < 2:
+            continue
+        for i, first in enumerate(block):
+            for second in block[i + 1:]:
+                if new_pks is not None and first.pk not in new_pks and second.pk not in new_pks:
+                    continue
+                pair = (first.pk, second.pk) if first.pk < second.pk else (second.pk, first.pk)
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                similarity = score(first, second, threshold)
+                if similarity is not None:
+                    yield (first, second, similarity) if first.pk < second.pk else (second, first, similarity)
+
+
+def find_duplicates(person_type, incremental=False, threshold=DEFAULT_THRESHOLD, batch_size=1000):
+    """
+    Scan Student or Instructor rows for likely duplicates and store them as pending
+    DuplicateCandidate rows. An incremental scan only compares rows added since the
+    last scan of the same type. Returns the DuplicateScan recorded for this run.
+    """
+    model = PERSON_MODELS[person_type]
+    rows = model.objects.order_by().values_list('pk', 'first_name', 'last_name', 'disambiguator')
+    people = [Person(*row) for row in rows.iterator(chunk_size=10000)]
+    last_pk = max((person.pk for person in people), default=0)
+
+    new_pks = None
+    if incremental:
+        previous = DuplicateScan.objects.filter(person_type=person_type).order_by('-duplicate_scan_id').first()
+        if previous is not None:
+            new_pks = {person.pk for person in people if person.pk > previous.last_pk}
+
+    candidates = [
+        DuplicateCandidate(person_type=person_type,
+                           first_id=first.pk, first_label=first.label,
+                           second_id=second.pk, second_label=second.label,
+                           score=round(similarity, 4))
+        for first, second, similarity in find_candidate_pairs(people, new_pks, threshold)
+    ]
+    with transaction.atomic():
+        # pairs that were already reported (and possibly reviewed) are left untouched
+        DuplicateCandidate.objects.bulk_create(candidates, batch_size=batch_size, ignore_conflicts=True)
+        return DuplicateScan.objects.create(person_type=person_type,
+                                            last_pk=last_pk,
+                                            rows_compared=len(people) if new_pks is None else len(new_pks),
+                                            candidates_found=len(candidates))
@@ -0,0 +1,228 @@
+from collections import defaultdict, namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from .models import Registration, RegistrationRequest, Section, Student, WaitlistEntry
+from .triggers import install_triggers
+
+BATCH_SIZE = 500
+
+# the outcomes of bulk_register(), which queued RegistrationRequests record as their status
+REGISTERED = RegistrationRequest.REGISTERED
+ALREADY_REGISTERED = RegistrationRequest.ALREADY_REGISTERED
+REJECTED = RegistrationRequest.REJECTED
+
+# Section.enrolled_count is maintained by the database itself, so it stays exact for every write
+# path: form views, the admin, queryset.update()/delete(), bulk_create() and raw SQL alike.
+TRIGGERS = {
+    'courseinfo_enrollment_ai': (
+        'CREATE TRIGGER courseinfo_enrollment_ai AFTER INSERT ON courseinfo_registration BEGIN '
+        'UPDATE courseinfo_section SET enrolled_count = enrolled_count + 1 WHERE section_id = NEW.section_id; '
+        'END'
+    ),
+    'courseinfo_enrollment_ad': (
+        'CREATE TRIGGER courseinfo_enrollment_ad AFTER DELETE ON courseinfo_registration BEGIN '
+        'UPDATE courseinfo_section SET enrolled_count = enrolled_count - 1 WHERE section_id = OLD.section_id; '
+        'END'
+    ),
+    'courseinfo_enrollment_au': (
+        'CREATE TRIGGER courseinfo_enrollment_au AFTER UPDATE OF section_id ON courseinfo_registration '
+        'WHEN OLD.section_id != NEW.section_id BEGIN '
+        'UPDATE courseinfo_section SET enrolled_count = enrolled_count - 1 WHERE section_id = OLD.section_id; '
+        'UPDATE courseinfo_section SET enrolled_count = enrolled_count + 1 WHERE section_id = NEW.section_id; '
+        'END'
+    ),
+}
+
+
+class SectionFull(Exception):
+    pass
+
+
+def reserve_seat(section, using=DEFAULT_DB_ALIAS):
+    """
+    Claim a seat in ``section`` for a registration the caller inserts next, in the same transaction.
+
+    The check is a single conditional UPDATE rather than a read followed by a write: it matches
+    the row only while ``enrolled_count < capacity`` and, by writing to it, holds the row's write
+    lock until the transaction ends, so a concurrent registration waits instead of claiming the
+    same seat. The INSERT's trigger then bumps the counter. Raises SectionFull when no seat is free.
+    """
+    if not transaction.get_connection(using).in_atomic_block:
+        raise transaction.TransactionManagementError('reserve_seat() must be called inside a transaction.')
+    section_id = getattr(section, 'pk', section)
+    reserved = (Section.objects.using(using).filter(pk=section_id, enrolled_count__lt=F('capacity'))
+                .update(enrolled_count=F('enrolled_count')))
+    if not reserved:
+        raise SectionFull('This section is full.')
+
+
+def register(student, section, using=DEFAULT_DB_ALIAS):
+    """Reserve a seat in ``section`` and register ``student`` for it, atomically."""
+    with transaction.atomic(using=using):
+        reserve_seat(section, using)
+        return Registration.objects.using(using).create(student=student, section=section)
+
+
+class RegistrationOutcome(namedtuple('RegistrationOutcome', ['student_id', 'status', 'reason'])):
+
+    def __str__(self):
+        if self.reason:
+            return 'Student %s: %s (%s)' % (self.student_id, self.status, self.reason)
+        return 'Student %s: %s' % (self.student_id, self.status)
+
+
+def bulk_register(section, student_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Register a whole cohort for ``section`` and return a RegistrationOutcome per requested student,
+    in request order: registered, already registered, or rejected because the student does not
+    exist or the section ran out of seats. Seats go to students in the order given.
+
+    The batch costs a fixed number of queries: one to lock the section, one to read its free
+    seats, one for unknown students, one for the unique_registration conflicts of the whole
+    batch, and one INSERT per BATCH_SIZE new registrations, all in one transaction.
+    """
+    section_id = getattr(section, 'pk', section)
+    student_ids = [int(student_id) for student_id in student_ids]
+    outcomes = []
+    with transaction.atomic(using=using):
+        # like reserve_seat(): a write to the row holds its lock until the transaction ends
+        if not Section.objects.using(using).filter(pk=section_id).update(enrolled_count=F('enrolled_count')):
+            raise Section.DoesNotExist('Section %s does not exist.' % section_id)
+        free = (Section.objects.using(using).filter(pk=section_id)
+                .values_list(F('capacity') - F('enrolled_count'), flat=True).get())
+        known = set(Student.objects.using(using).filter(pk__in=student_ids).values_list('pk', flat=True))
+        registered = set(Registration.objects.using(using).filter(section_id=section_id, student_id__in=known)
+                         .values_list('student_id', flat=True))
+        new_registrations = []
+        for student_id in student_ids:
+            if student_id not in known:
+                outcomes.append(RegistrationOutcome(student_id, REJECTED, 'no such student'))
+            elif student_id in registered:
+                outcomes.append(RegistrationOutcome(student_id, ALREADY_REGISTERED, ''))
+            elif len(new_registrations) >= free:
+                outcomes.append(RegistrationOutcome(student_id, REJECTED, 'section is full'))
+            else:
+                registered.add(student_id)
+                new_registrations.append(Registration(section_id=section_id, student_id=student_id))
+                outcomes.append(RegistrationOutcome(student_id, REGISTERED, ''))
+        Registration.objects.using(using).bulk_create(new_registrations, batch_size=BATCH_SIZE)
+    return outcomes
+
+
+def process_registration_requests(batch_size=BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Process the oldest ``batch_size`` pending RegistrationRequests in one transaction and return
+    how many were processed.
+
+    Requests are grouped by section and each group goes through bulk_register(), so a batch
+    costs a handful of queries per section plus one UPDATE per distinct outcome, instead of a
+    transaction per request. Within a section, seats go to the oldest requests. On backends
+    with row locks, concurrent workers skip each other's batches; SQLite takes one at a time.
+    """
+    with transaction.atomic(using=using):
+        pending = list(RegistrationRequest.objects.using(using).select_for_update(skip_locked=True)
+                       .filter(status=RegistrationRequest.PENDING).order_by('pk')
+                       .values_list('pk', 'section_id', 'student_id')[:batch_size])
+        by_section = defaultdict(list)
+        for pk, section_id, student_id in pending:
+            by_section[section_id].append((pk, student_id))
+        by_outcome = defaultdict(list)
+        for section_id, requests in by_section.items():
+            outcomes = bulk_register(section_id, [student_id for _, student_id in requests], using)
+            for (pk, _), outcome in zip(requests, outcomes):
+                by_outcome[outcome.status, outcome.reason].append(pk)
+        now = timezone.now()
+        for (status, reason), pks in by_outcome.items():
+            RegistrationRequest.objects.using(using).filter(pk__in=pks).update(status=status, reason=reason,
+                                                                               processed_at=now)
+    return len(pending)
+
+
+def promote_waitlist(section_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Fill the free seats of the given sections from their waitlists, oldest entry first, and return
+    the new registrations. Called in the same transaction as the drop that freed the seats.
+
+    However many seats opened, the work is a fixed number of queries per batch of sections: one
+    to lock the sections, one to pick the first ``capacity - enrolled_count`` entries of every
+    waitlist with a window function, one bulk insert and one delete.
+    """
+    section_ids = sorted(set(section_ids))
+    promoted = []
+    with transaction.atomic(using=using):
+        for start in range(0, len(section_ids), BATCH_SIZE):
+            batch = section_ids[start:start + BATCH_SIZE]
+            free = list(Section.objects.using(using).select_for_update().order_by()
+                        .filter(pk__in=batch, enrolled_count__lt=F('capacity'))
+                        .values_list('pk', flat=True))
+            if not free:
+                continue
+            already_registered = Registration.objects.filter(section=OuterRef('section'),
+                                                             student=OuterRef('student'))
+            entries = list(WaitlistEntry.objects.using(using).order_by()
+                           .filter(section__in=free).exclude(Exists(already_registered))
+                           .annotate(place=Window(RowNumber(), partition_by=F('section'),
+                                                  order_by=F('waitlist_entry_id').asc()))
+                           .filter(place__lte=F('section__capacity') - F('section__enrolled_count'))
+                           .values_list('pk', 'section_id', 'student_id'))
+            promoted += Registration.objects.using(using).bulk_create(
+                [Registration(section_id=section_id, student_id=student_id) for _, section_id, student_id in entries]
+            )
+            # entries of students who registered by other means are stale, so they go too
+            WaitlistEntry.objects.using(using).filter(
+                Q(pk__in=[pk for pk, _, _ in entries]) | Q(section__in=free) & Exists(already_registered)
+            ).delete()
+    return promoted
+
+
+def drop_registrations(registrations, using=DEFAULT_DB_ALIAS):
+    """Delete ``registrations`` (a queryset) and promote waitlisted students into the freed seats."""
+    with transaction.atomic(using=using):
+        section_ids = set(registrations.using(using).order_by().values_list('section_id', flat=True))
+        deleted, _ = registrations.using(using).delete()
+        promoted = promote_waitlist(section_ids, using)
+    return deleted, promoted
+
+
+def reconcile_enrolled_counts(fix=True, using=DEFAULT_DB_ALIAS):
+    """
+    Compare every Section.enrolled_count with its actual number of registrations, counted in a
+    single GROUP BY, and return ``(section_id, stored, actual)`` for each section that drifted.
+    With ``fix``, the drifted counters are recomputed in one UPDATE.
+    """
+    actual = dict(Registration.objects.using(using).order_by()
+                  .values_list('section').annotate(Count('pk')))
+    stored = Section.objects.using(using).order_by().values_list('pk', 'enrolled_count')
+    drift = [(section_id, count, actual.get(section_id, 0))
+             for section_id, count in stored.iterator(chunk_size=10000)
+             if count != actual.get(section_id, 0)]
+    if fix and drift:
+        # recount inside the UPDATE itself rather than writing the numbers read above, so
+        # registrations committed in the meantime are not lost
+        registrations = (Registration.objects.filter(section=OuterRef('pk')).order_by()
+                         .values('section').annotate(total=Count('pk')).values('total'))
+        section_ids = [section_id for section_id, _, _ in drift]
+        for start in range(0, len(section_ids), BATCH_SIZE):
+            Section.objects.using(using).filter(pk__in=section_ids[start:start + BATCH_SIZE]).update(
+                enrolled_count=Coalesce(Subquery(registrations), 0)
+            )
+    return drift
+
+
+def install_enrollment_counters(sender, using=DEFAULT_DB_ALIAS, apps=None, **kwargs):
+    """post_migrate handler: create the counter triggers, recounting if any were missing."""
+    if apps is not None:
+        try:
+            section_model_class = apps.get_model('courseinfo', 'Section')
+        except LookupError:
+            # migrated back to before sections existed
+            return
+        if 'enrolled_count' not in {field.name for field in section_model_class._meta.fields}:
+            # migrated back to before the counter existed
+            return
+    if install_triggers(connections[using], TRIGGERS):
+        reconcile_enrolled_counts(using=using)
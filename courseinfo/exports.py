@@ -0,0 +1,77 @@
+import csv
+
+from django.http import StreamingHttpResponse
+
+# Rows fetched from the database at a time; memory use is bounded by this, not by the export size.
+CHUNK_SIZE = 2000
+
+# (CSV header, queryset lookup) pairs. Exports read plain value tuples through the joins instead
+# of model instances.
+PERSON_COLUMNS = [
+    ('last_name', 'last_name'),
+    ('first_name', 'first_name'),
+    ('disambiguator', 'disambiguator'),
+]
+
+STUDENT_COLUMNS = [('student_id', 'student_id')] + PERSON_COLUMNS
+
+INSTRUCTOR_COLUMNS = [('instructor_id', 'instructor_id')] + PERSON_COLUMNS
+
+# over analytics.teaching_load()
+TEACHING_LOAD_COLUMNS = INSTRUCTOR_COLUMNS + [
+    ('sections', 'section_count'),
+    ('students', 'student_count'),
+    ('courses', 'course_count'),
+]
+
+# shared by Registration and ArchivedRegistration, whose relations have the same names
+ROSTER_COLUMNS = [
+    ('student_id', 'student_id'),
+    ('last_name', 'student__last_name'),
+    ('first_name', 'student__first_name'),
+    ('disambiguator', 'student__disambiguator'),
+]
+
+REGISTRATION_COLUMNS = [
+    ('registration_id', 'registration_id'),
+    *ROSTER_COLUMNS,
+    ('section_id', 'section_id'),
+    ('course_number', 'section__course__course_number'),
+    ('course_name', 'section__course__course_name'),
+    ('section_name', 'section__section_name'),
+    ('year', 'section__semester__year__year'),
+    ('period', 'section__semester__period__period_name'),
+    ('instructor_id', 'section__instructor_id'),
+    ('instructor_last_name', 'section__instructor__last_name'),
+    ('instructor_first_name', 'section__instructor__first_name'),
+]
+
+
+class Echo:
+    # csv.writer writes each row to this and hands back the line, which is streamed at once.
+
+    def write(self, value):
+        return value
+
+
+def escape_cell(value):
+    # a cell starting with one of these is run as a formula by spreadsheet programs
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value
+    return value
+
+
+def csv_lines(columns, queryset, ordering=('pk',)):
+    writer = csv.writer(Echo())
+    # the header goes out before the query runs, so the client sees the download start at once
+    yield writer.writerow([header for header, _ in columns])
+    rows = queryset.order_by(*ordering).values_list(*[lookup for _, lookup in columns])
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow([escape_cell(value) for value in row])
+
+
+def stream_csv(filename, columns, queryset, ordering=('pk',)):
+    """A response streaming ``columns`` of every row in ``queryset`` as a CSV download."""
+    response = StreamingHttpResponse(csv_lines(columns, queryset, ordering), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="%s"' % filename
+    return response
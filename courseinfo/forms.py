@@ -1,6 +1,8 @@
 from django import forms
 
-from courseinfo.models import Instructor, Section, Course, Semester, Student, Registration
+from courseinfo.models import Instructor, Section, Course, Semester, Student, Registration, WaitlistEntry
+
+CAPACITY_BELOW_ENROLLMENT = 'Capacity cannot be lower than the %d students already registered.'
 
 
 class InstructorForm(forms.ModelForm):
@@ -29,6 +31,12 @@ class SectionForm(forms.ModelForm):
     def clean_section_name(self):
         return self.cleaned_data['section_name'].strip()
 
+    def clean_capacity(self):
+        capacity = self.cleaned_data['capacity']
+        if capacity < self.instance.enrolled_count:
+            raise forms.ValidationError(CAPACITY_BELOW_ENROLLMENT % self.instance.enrolled_count)
+        return capacity
+
 
 class CourseForm(forms.ModelForm):
     class Meta:
@@ -71,3 +79,65 @@ class RegistrationForm(forms.ModelForm):
     class Meta:
         model = Registration
         fields = '__all__'
+
+
+class WaitlistEntryForm(forms.ModelForm):
+    class Meta:
+        model = WaitlistEntry
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        student, section = cleaned_data.get('student'), cleaned_data.get('section')
+        if student is None or section is None:
+            return cleaned_data
+        if section.registrations.filter(student=student).exists():
+            raise forms.ValidationError('This student is already registered for this section.')
+        if section.enrolled_count < section.capacity:
+            raise forms.ValidationError('This section still has free seats; register the student instead.')
+        return cleaned_data
+
+
+class BulkRegistrationForm(forms.Form):
+    section = forms.ModelChoiceField(queryset=Section.objects.filter(semester__is_archived=False))
+    students = forms.CharField(widget=forms.Textarea,
+                               help_text='Student IDs, separated by spaces, commas or new lines.')
+
+    def clean_students(self):
+        tokens = self.cleaned_data['students'].replace(',', ' ').split()
+        invalid = [token for token in tokens if not token.isdigit()]
+        if invalid:
+            raise forms.ValidationError('Not a student ID: %s' % ', '.join(invalid))
+        return [int(token) for token in tokens]
+
+
+class StudentImportForm(forms.Form):
+    file = forms.FileField(help_text='A CSV file with first_name, last_name and (optional) disambiguator columns.')
+
+
+class RollForwardForm(forms.Form):
+    target = forms.ModelChoiceField(queryset=Semester.objects.filter(is_archived=False),
+                                    label='Copy sections into')
+    courses = forms.ModelMultipleChoiceField(queryset=Course.objects.all(), required=False,
+                                             help_text='Only copy the sections of these courses; leave empty for all.')
+    reassign = forms.CharField(widget=forms.Textarea, required=False, label='Instructor changes',
+                               help_text='One "old instructor ID: new instructor ID" pair per line.')
+
+    def __init__(self, *args, source=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.source = source
+        if source is not None:
+            self.fields['target'].queryset = self.fields['target'].queryset.exclude(pk=source.pk)
+
+    def clean_reassign(self):
+        reassign = {}
+        for line in filter(None, (line.strip() for line in self.cleaned_data['reassign'].splitlines())):
+            old, _, new = line.partition(':')
+            if not (old.strip().isdigit() and new.strip().isdigit()):
+                raise forms.ValidationError('Not an "old ID: new ID" pair: %s' % line)
+            reassign[int(old)] = int(new)
+        unknown = set(reassign.values()) - set(Instructor.objects.filter(pk__in=reassign.values())
+                                               .values_list('pk', flat=True))
+        if unknown:
+            raise forms.ValidationError('No instructor with ID %s.' % ', '.join(str(pk) for pk in sorted(unknown)))
+        return reassign
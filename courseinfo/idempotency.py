@@ -0,0 +1,47 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponseRedirect
+from django.utils import timezone
+
+from .loaders import delete_in_batches
+from .models import IdempotencyKey
+
+# The hidden form field carrying the key, generated fresh each time a create form is rendered.
+FIELD_NAME = 'idempotency_key'
+
+BATCH_SIZE = 1000
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def replay(user, key):
+    """The response recorded for ``key``, or None if no request with that key has completed."""
+    outcome = (IdempotencyKey.objects.filter(user=user, key=key)
+               .values_list('status_code', 'location').first())
+    if outcome is None:
+        return None
+    status_code, location = outcome
+    response = HttpResponseRedirect(location)
+    response.status_code = status_code
+    return response
+
+
+def record(user, key, response):
+    """Remember a completed request's redirect; inside the transaction that did the work."""
+    return IdempotencyKey.objects.create(user=user, key=key,
+                                         status_code=response.status_code,
+                                         location=response['Location'])
+
+
+def purge_expired_keys(ttl=None, batch_size=BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """Delete keys older than ``ttl`` seconds (IDEMPOTENCY_KEY_TTL by default) and return how many."""
+    if ttl is None:
+        ttl = settings.IDEMPOTENCY_KEY_TTL
+    cutoff = timezone.now() - timedelta(seconds=ttl)
+    expired = IdempotencyKey.objects.using(using).filter(created_at__lt=cutoff)
+    return delete_in_batches(expired, batch_size)
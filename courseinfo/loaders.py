@@ -0,0 +1,216 @@
+import csv
+import time
+from collections import namedtuple
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+
+from .models import Student, natural_key, normalize_key
+
+DEFAULT_BATCH_SIZE = 500
+
+# The fields each loadable model is deduplicated on (its unique constraint). Keys of the models
+# whose constraints are on natural_key() expressions are compared in that normalized form.
+NATURAL_KEYS = {
+    'period': ('period_name',),
+    'year': ('year',),
+    'course': ('course_number', 'course_name'),
+    'instructor': ('first_name', 'last_name', 'disambiguator'),
+    'student': ('first_name', 'last_name', 'disambiguator'),
+}
+
+NORMALIZED_MODELS = {'course', 'instructor', 'student'}
+
+
+class LoadResult(namedtuple('LoadResult', ['model', 'inserted', 'skipped', 'seconds'])):
+
+    def __str__(self):
+        return '%s: %d inserted, %d skipped in %.3fs' % (self.model, self.inserted, self.skipped, self.seconds)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def delete_in_batches(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete the rows of ``queryset`` ``batch_size`` at a time and return how many were deleted."""
+    queryset = queryset.order_by()
+    deleted = 0
+    while True:
+        # small batches keep each delete from holding the write lock for long
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += queryset.model._default_manager.using(queryset.db).filter(pk__in=pks).delete()[0]
+
+
+def clean_row(row):
+    # the same whitespace stripping the model forms' clean_* methods apply
+    return {field: value.strip() if isinstance(value, str) else value for field, value in row.items()}
+
+
+class KeyIndex:
+    """The natural keys of one model, looked up for a whole batch of rows per query."""
+
+    def __init__(self, model, using=DEFAULT_DB_ALIAS):
+        self.model = model
+        self.using = using
+        self.fields = NATURAL_KEYS[model._meta.model_name]
+        self.normalized = model._meta.model_name in NORMALIZED_MODELS
+
+    def key(self, row):
+        if self.normalized:
+            return tuple(normalize_key(row.get(field, '')) for field in self.fields)
+        return tuple(row[field] for field in self.fields)
+
+    def _queryset(self, keys):
+        # filtering on the leading key column lets the unique index drive the lookup
+        queryset = self.model._default_manager.using(self.using).order_by()
+        leading = {'%s__in' % self.fields[0]: {key[0] for key in keys}}
+        if self.normalized:
+            return queryset.with_natural_key(**leading), [natural_key(field) for field in self.fields]
+        return queryset.filter(**leading), list(self.fields)
+
+    def existing(self, keys):
+        """Return the subset of ``keys`` already in the database, using a single query."""
+        if not keys:
+            return set()
+        queryset, columns = self._queryset(keys)
+        return set(queryset.values_list(*columns)) & set(keys)
+
+    def pks(self, keys, batch_size=DEFAULT_BATCH_SIZE):
+        """Map each of ``keys`` that is stored to the primary key of its row, one query per batch."""
+        keys = set(keys)
+        found = {}
+        for chunk in chunked(sorted(keys), batch_size):
+            queryset, columns = self._queryset(chunk)
+            for *key, pk in queryset.values_list(*columns, 'pk'):
+                if tuple(key) in keys:
+                    found[tuple(key)] = pk
+        return found
+
+
+def bulk_load(model, rows, batch_size=DEFAULT_BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Insert the dicts in ``rows`` as ``model`` objects, skipping every row whose natural key is
+    already stored or appeared earlier in ``rows``.
+
+    Each batch costs one query to find existing keys and one multi-row INSERT, all inside a
+    single transaction. ``rows`` may be any iterable, so large sources can be streamed.
+    """
+    started = time.perf_counter()
+    index = KeyIndex(model, using)
+    manager = model._default_manager.db_manager(using)
+    total = 0
+    with transaction.atomic(using=using):
+        before = manager.count()
+        for chunk in chunked(rows, batch_size):
+            total += len(chunk)
+            chunk = [clean_row(row) for row in chunk]
+            keys = [index.key(row) for row in chunk]
+            seen = index.existing(keys)
+            new_objects = []
+            for row, key in zip(chunk, keys):
+                if key not in seen:
+                    seen.add(key)
+                    new_objects.append(model(**row))
+            # ignore_conflicts covers rows committed by someone else since the lookup above
+            manager.bulk_create(new_objects, batch_size=batch_size, ignore_conflicts=True)
+        inserted = manager.count() - before
+    return LoadResult(model._meta.verbose_name_plural, inserted, total - inserted, time.perf_counter() - started)
+
+
+STUDENT_IMPORT_COLUMNS = ('first_name', 'last_name', 'disambiguator')
+
+# what StudentForm says about a student that already exists
+DUPLICATE_STUDENT_MESSAGE = next(constraint.get_violation_error_message() for constraint in Student._meta.constraints
+                                 if constraint.name == 'unique_student')
+
+
+class RowError(namedtuple('RowError', ['line', 'message'])):
+
+    def __str__(self):
+        return 'Line %d: %s' % (self.line, self.message)
+
+
+class ImportReport(namedtuple('ImportReport', ['rows', 'created', 'errors', 'seconds'])):
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0
+
+    def __str__(self):
+        return '%d rows: %d created, %d rejected in %.3fs (%.0f rows/s)' % (
+            self.rows, self.created, len(self.errors), self.seconds, self.rows_per_second)
+
+
+def validate_student(row):
+    """Return the row cleaned the way StudentForm cleans it, and an error message or None."""
+    row = clean_row({field: row.get(field) or '' for field in STUDENT_IMPORT_COLUMNS})
+    for field in STUDENT_IMPORT_COLUMNS:
+        max_length = Student._meta.get_field(field).max_length
+        if field != 'disambiguator' and not row[field]:
+            return row, '%s: This field is required.' % field
+        if len(row[field]) > max_length:
+            return row, '%s: Ensure this value has at most %d characters (it has %d).' % (
+                field, max_length, len(row[field]))
+    return row, None
+
+
+def import_students(csv_file, batch_size=DEFAULT_BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Create the students in ``csv_file`` (a text file with a first_name, last_name and optional
+    disambiguator header) and return an ImportReport listing every rejected line.
+
+    The file is read a batch at a time. Each batch is validated in memory, checked against
+    the unique_student constraint with one query for the whole batch (see KeyIndex) and
+    inserted with one multi-row INSERT in its own transaction, so a large intake commits as it
+    goes instead of holding the database for the whole file.
+    """
+    started = time.perf_counter()
+    reader = csv.DictReader(csv_file)
+    columns = set(reader.fieldnames or ())
+    if not {'first_name', 'last_name'} <= columns:
+        raise ValueError('The file needs a header row with first_name and last_name columns.')
+    unknown = columns - set(STUDENT_IMPORT_COLUMNS)
+    if unknown:
+        raise ValueError('Unknown columns: %s.' % ', '.join(sorted(unknown)))
+    index = KeyIndex(Student, using)
+    manager = Student._default_manager.db_manager(using)
+    first_lines = {}
+    total = created = 0
+    errors = []
+    for chunk in chunked(((reader.line_num, row) for row in reader), batch_size):
+        total += len(chunk)
+        valid = []
+        for line, row in chunk:
+            row, message = validate_student(row)
+            if message:
+                errors.append(RowError(line, message))
+            elif index.key(row) in first_lines:
+                errors.append(RowError(line, 'Duplicate of line %d.' % first_lines[index.key(row)]))
+            else:
+                first_lines[index.key(row)] = line
+                valid.append((line, row))
+        if not valid:
+            continue
+        for attempt in range(2):
+            try:
+                with transaction.atomic(using=using):
+                    existing = index.existing([index.key(row) for _, row in valid])
+                    new_students = [Student(**row) for _, row in valid if index.key(row) not in existing]
+                    manager.bulk_create(new_students)
+                break
+            except IntegrityError:
+                # a student was added by someone else since the lookup; look again
+                if attempt:
+                    raise
+        errors += [RowError(line, DUPLICATE_STUDENT_MESSAGE) for line, row in valid if index.key(row) in existing]
+        created += len(new_students)
+    errors.sort()
+    return ImportReport(total, created, errors, time.perf_counter() - started)
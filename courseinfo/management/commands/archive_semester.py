@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courseinfo.archive import DEFAULT_BATCH_SIZE, ArchiveError, archive_semester, unarchive_semester
+from courseinfo.models import Semester
+
+
+class Command(BaseCommand):
+    help = "Move a semester's sections and registrations into (or back out of) the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('semester_id', type=int)
+        parser.add_argument('--unarchive', action='store_true',
+                            help='Move an archived semester back into the live tables.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Sections moved per transaction.')
+
+    def handle(self, *args, **options):
+        try:
+            semester = Semester.objects.get(pk=options['semester_id'])
+        except Semester.DoesNotExist:
+            raise CommandError('Semester %s does not exist.' % options['semester_id'])
+        started = time.perf_counter()
+        if options['unarchive']:
+            sections, registrations = unarchive_semester(semester, options['batch_size'])
+            action, waitlisted = 'Restored', 0
+        else:
+            try:
+                sections, registrations, waitlisted = archive_semester(semester, options['batch_size'])
+            except ArchiveError as error:
+                raise CommandError(error)
+            action = 'Archived'
+        self.stdout.write(self.style.SUCCESS('%s %d sections and %d registrations of %s in %.2fs.' % (
+            action, sections, registrations, semester, time.perf_counter() - started)))
+        if waitlisted:
+            self.stdout.write('Deleted %d waitlist entries.' % waitlisted)
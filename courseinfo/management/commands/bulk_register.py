@@ -0,0 +1,36 @@
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courseinfo.enrollment import bulk_register
+from courseinfo.models import Section
+
+
+class Command(BaseCommand):
+    help = 'Register a cohort of students for one section and report the outcome for each student.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('section', type=int, help='Section ID.')
+        parser.add_argument('students', nargs='*', type=int, help='Student IDs.')
+        parser.add_argument('--file', help='A file of student IDs separated by whitespace or commas.')
+
+    def handle(self, *args, **options):
+        student_ids = list(options['students'])
+        if options['file']:
+            tokens = Path(options['file']).read_text().replace(',', ' ').split()
+            try:
+                student_ids += [int(token) for token in tokens]
+            except ValueError as error:
+                raise CommandError(error)
+        if not student_ids:
+            raise CommandError('Give student IDs or --file.')
+        try:
+            outcomes = bulk_register(options['section'], student_ids)
+        except Section.DoesNotExist as error:
+            raise CommandError(error)
+        for outcome in outcomes:
+            self.stdout.write(str(outcome))
+        summary = Counter(outcome.status for outcome in outcomes)
+        self.stdout.write(self.style.SUCCESS(', '.join('%d %s' % (count, status)
+                                                       for status, count in sorted(summary.items()))))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courseinfo.changelog import compact_change_log
+
+
+class Command(BaseCommand):
+    help = 'Delete the change log entries every change feed consumer has acknowledged.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idle-days', type=int,
+                            help='Ignore consumers that have not read the feed for this many days.')
+
+    def handle(self, *args, **options):
+        compacted = compact_change_log(options['idle_days'])
+        self.stdout.write(self.style.SUCCESS('Compacted %d change log entries.' % compacted))
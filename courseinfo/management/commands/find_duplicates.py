@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courseinfo.duplicates import DEFAULT_THRESHOLD, PERSON_MODELS, find_duplicates
+from courseinfo.models import DuplicateCandidate
+
+
+class Command(BaseCommand):
+    help = 'Find likely duplicate students or instructors and queue them for review.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('person_type', choices=sorted(PERSON_MODELS))
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only compare rows added since the previous scan.')
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Minimum name similarity (0-1) to report a pair.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        scan = find_duplicates(options['person_type'],
+                               incremental=options['incremental'],
+                               threshold=options['threshold'])
+        self.stdout.write('Compared %d rows, found %d candidate pairs in %.2fs.' % (
+            scan.rows_compared, scan.candidates_found, time.perf_counter() - started))
+        pending = DuplicateCandidate.objects.filter(person_type=options['person_type'],
+                                                    status=DuplicateCandidate.PENDING)
+        for candidate in pending[:50]:
+            self.stdout.write('  %.2f  #%d %s  /  #%d %s' % (
+                candidate.score, candidate.first_id, candidate.first_label,
+                candidate.second_id, candidate.second_label))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courseinfo.loaders import DEFAULT_BATCH_SIZE, import_students
+
+
+class Command(BaseCommand):
+    help = ('Create students from a CSV file with first_name, last_name and disambiguator columns, '
+            'reporting every line that was rejected.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='A .csv file with a header row.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows validated and inserted per transaction.')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as csv_file:
+                report = import_students(csv_file, options['batch_size'])
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        for error in report.errors:
+            self.stdout.write(str(error))
+        self.stdout.write(self.style.SUCCESS(str(report)))
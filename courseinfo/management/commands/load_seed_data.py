@@ -0,0 +1,49 @@
+import csv
+import importlib
+import json
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from courseinfo.loaders import DEFAULT_BATCH_SIZE, NATURAL_KEYS, bulk_load
+
+# The seed data sets kept in courseinfo/archived_migrations.
+ARCHIVED_DATA_SETS = {
+    'instructor': ('courseinfo.archived_migrations.0004_load_instructor_test_data', 'INSTRUCTORS'),
+    'student': ('courseinfo.archived_migrations.0005_load_student_test_data', 'STUDENTS'),
+}
+
+
+def read_rows(path):
+    path = Path(path)
+    if path.suffix == '.json':
+        with path.open() as data_file:
+            return json.load(data_file)
+    if path.suffix == '.csv':
+        with path.open(newline='') as data_file:
+            return list(csv.DictReader(data_file))
+    raise CommandError('Unsupported file type %r: use .json or .csv.' % path.suffix)
+
+
+class Command(BaseCommand):
+    help = 'Bulk-load seed or reference data, skipping rows whose natural key already exists.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', nargs='?', choices=sorted(NATURAL_KEYS))
+        parser.add_argument('path', nargs='?', help='A .json list of objects or a .csv file with a header row.')
+        parser.add_argument('--archived', action='store_true',
+                            help='Load the instructor and student data sets from courseinfo/archived_migrations.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['archived']:
+            data_sets = [(name, getattr(importlib.import_module(module), attribute))
+                         for name, (module, attribute) in ARCHIVED_DATA_SETS.items()]
+        elif options['model'] and options['path']:
+            data_sets = [(options['model'], read_rows(options['path']))]
+        else:
+            raise CommandError('Give a model and a data file, or --archived.')
+        for model_name, rows in data_sets:
+            result = bulk_load(apps.get_model('courseinfo', model_name), rows, options['batch_size'])
+            self.stdout.write(str(result))
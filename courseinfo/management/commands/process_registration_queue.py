@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courseinfo.enrollment import BATCH_SIZE, process_registration_requests
+
+
+class Command(BaseCommand):
+    help = ('Process queued registration requests in batches, one transaction per batch. Runs until '
+            'interrupted unless --once is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help='Requests processed per transaction.')
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty.')
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                processed = process_registration_requests(options['batch_size'])
+                total += processed
+                if processed:
+                    self.stdout.write('Processed %d registration requests.' % processed)
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Processed %d registration requests in total.' % total))
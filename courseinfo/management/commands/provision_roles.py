@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from courseinfo.roles import ROLES_FILE, load_roles, provision_roles
+
+
+class Command(BaseCommand):
+    help = 'Give each role (group) exactly the courseinfo permissions declared in the roles file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=ROLES_FILE,
+                            help='JSON mapping of role names to permission codenames (wildcards allowed).')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        try:
+            changes = provision_roles(load_roles(options['file']), using=options['database'])
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        for change in changes:
+            self.stdout.write(str(change))
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from courseinfo.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete the idempotency keys of create forms that are older than IDEMPOTENCY_KEY_TTL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl', type=int, default=settings.IDEMPOTENCY_KEY_TTL,
+                            help='Age in seconds after which keys are deleted.')
+
+    def handle(self, *args, **options):
+        purged = purge_expired_keys(options['ttl'])
+        self.stdout.write(self.style.SUCCESS('Purged %d idempotency keys.' % purged))
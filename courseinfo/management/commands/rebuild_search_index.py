@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from courseinfo.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over students, instructors, courses and sections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        entries = rebuild_search_index(options['database'])
+        self.stdout.write(self.style.SUCCESS(
+            'Indexed %d entries in %.2fs.' % (entries, time.perf_counter() - started)
+        ))
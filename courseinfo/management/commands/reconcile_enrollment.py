@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from courseinfo.enrollment import reconcile_enrolled_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount every section\'s enrolled_count from its registrations and report any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report drift; do not correct the counters.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        drift = reconcile_enrolled_counts(fix=not options['check'], using=options['database'])
+        for section_id, stored, actual in drift:
+            self.stdout.write('Section %d: stored %d, actual %d' % (section_id, stored, actual))
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All enrollment counters are exact.'))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING('%d sections have drifted.' % len(drift)))
+        else:
+            self.stdout.write(self.style.SUCCESS('Corrected %d sections.' % len(drift)))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courseinfo.models import Semester
+from courseinfo.schedule import roll_forward
+
+
+def instructor_pair(value):
+    old, _, new = value.partition(':')
+    return int(old), int(new)
+
+
+class Command(BaseCommand):
+    help = "Copy a semester's section schedule into another semester."
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', type=int, help='Semester ID to copy from.')
+        parser.add_argument('target', type=int, help='Semester ID to copy into.')
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help='Only copy the sections of this course ID; may be repeated.')
+        parser.add_argument('--reassign', type=instructor_pair, action='append', default=[],
+                            metavar='OLD:NEW', help='Give the sections of instructor OLD to instructor NEW.')
+
+    def handle(self, *args, **options):
+        try:
+            source = Semester.objects.get(pk=options['source'])
+            target = Semester.objects.get(pk=options['target'])
+            result = roll_forward(source, target, dict(options['reassign']), options['courses'])
+        except (Semester.DoesNotExist, ValueError) as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(str(result)))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courseinfo.loaders import DEFAULT_BATCH_SIZE
+from courseinfo.sync import SyncError, read_snapshot, sync_snapshot
+
+
+class Command(BaseCommand):
+    help = ('Make the sections and registrations of the semesters in a student information system snapshot '
+            'match it, writing only what changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='A .json snapshot with "sections" and "registrations" lists.')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without making them.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows written per transaction.')
+
+    def handle(self, *args, **options):
+        try:
+            result = sync_snapshot(read_snapshot(options['path']), options['dry_run'], options['batch_size'])
+        except (OSError, ValueError, SyncError) as error:
+            raise CommandError(error)
+        for problem in result.problems:
+            self.stderr.write(problem)
+        if options['dry_run']:
+            self.stdout.write('Dry run, nothing was written.')
+        self.stdout.write(self.style.SUCCESS(str(result)))
@@ -0,0 +1,180 @@
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+PROTECTED = 'protected'
+NORMAL = 'normal'
+LOW = 'low'
+
+PROCESSES_KEY = 'concurrency:processes'
+
+
+class ConcurrencyLimiter:
+    """
+    Count the requests in flight in this process and, through the cache, across every process
+    sharing it, and decide which new requests to shed.
+
+    The local count is exact. The other processes' counts come from gauges each process
+    publishes at most every ``REFRESH`` seconds, so the cluster-wide figure costs no cache
+    round trip on most requests and is at most that stale; the gauges expire, so a worker that
+    dies mid-request stops counting soon after.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.process_key = 'concurrency:process:%s:%d' % (socket.gethostname(), os.getpid())
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.in_flight = 0
+            self.peak = 0
+            self.admitted = 0
+            self.shed = Counter()
+            self.elsewhere = 0
+            self.refreshed = 0
+
+    def priority(self, request, limits):
+        try:
+            name = resolve(request.path_info).view_name
+        except Resolver404:
+            return NORMAL
+        if any(fnmatchcase(name, pattern) for pattern in limits['PROTECTED']):
+            return PROTECTED
+        if request.method in ('GET', 'HEAD') and any(fnmatchcase(name, pattern) for pattern in limits['LOW_PRIORITY']):
+            return LOW
+        return NORMAL
+
+    def enter(self, priority, limits):
+        """Count a new request in and return True, or return False when it is to be shed."""
+        if time.monotonic() - self.refreshed >= limits['REFRESH']:
+            self.refresh(limits)
+        # low-priority traffic goes first, while there is still room for everything else
+        share = limits['LOW_PRIORITY_SHARE'] if priority == LOW else 1
+        with self.lock:
+            if priority != PROTECTED and (self.in_flight >= limits['PROCESS'] * share
+                                          or self.in_flight + self.elsewhere >= limits['CLUSTER'] * share):
+                self.shed[priority] += 1
+                return False
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.admitted += 1
+            return True
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def gauge(self):
+        with self.lock:
+            return {'in_flight': self.in_flight, 'peak': self.peak, 'admitted': self.admitted,
+                    'shed': dict(self.shed)}
+
+    def refresh(self, limits):
+        """Publish this process's gauge and read the in-flight counts of the other processes."""
+        if not self.refresh_lock.acquire(blocking=False):
+            # another thread is at it; its figures will do
+            return
+        try:
+            cache = caches[limits['CACHE']]
+            cache.set(self.process_key, self.gauge(), timeout=limits['REFRESH'] * 5)
+            processes = cache.get(PROCESSES_KEY, [])
+            gauges = cache.get_many(processes)
+            live = [key for key in processes if key in gauges]
+            if self.process_key not in live:
+                # registering is a read-modify-write, so a concurrent one can undo it; every
+                # process re-registers on its next refresh
+                live.append(self.process_key)
+            if live != processes:
+                cache.set(PROCESSES_KEY, live, timeout=None)
+            self.elsewhere = sum(gauge['in_flight'] for key, gauge in gauges.items() if key != self.process_key)
+            self.refreshed = time.monotonic()
+        finally:
+            self.refresh_lock.release()
+
+    def metrics(self, limits):
+        """Gauges of this process and totals over every live process sharing the cache."""
+        self.refresh(limits)
+        cache = caches[limits['CACHE']]
+        gauges = cache.get_many(cache.get(PROCESSES_KEY, []))
+        gauges[self.process_key] = self.gauge()
+        shed = Counter()
+        for gauge in gauges.values():
+            shed.update(gauge['shed'])
+        return {
+            'limits': {'process': limits['PROCESS'], 'cluster': limits['CLUSTER'],
+                       'low_priority_share': limits['LOW_PRIORITY_SHARE']},
+            'process': dict(gauges[self.process_key], key=self.process_key),
+            'cluster': {
+                'processes': len(gauges),
+                'in_flight': sum(gauge['in_flight'] for gauge in gauges.values()),
+                'admitted': sum(gauge['admitted'] for gauge in gauges.values()),
+                'shed': dict(shed),
+            },
+        }
+
+
+limiter = ConcurrencyLimiter()
+
+
+def service_unavailable():
+    response = HttpResponse('The server is busy; try again in a moment.', status=503, content_type='text/plain')
+    response['Retry-After'] = '1'
+    return response
+
+
+def release_on_close(response):
+    """Make closing ``response`` leave the limiter, once however often it is closed."""
+    close = response.close
+    released = False
+
+    def close_and_release():
+        nonlocal released
+        try:
+            close()
+        finally:
+            if not released:
+                released = True
+                limiter.leave()
+
+    response.close = close_and_release
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    Shed load before the workers saturate: once the requests in flight reach the limits in
+    CONCURRENCY_LIMITS, new requests get an immediate 503 instead of queueing behind the rest.
+    Low-priority pages (lists, reports) are shed first, at a fraction of the limits; protected
+    views (login, registration writes, the metrics) are never shed. List it before the session
+    middleware so a shed request costs no database query.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        limits = settings.CONCURRENCY_LIMITS
+        if not limiter.enter(limiter.priority(request, limits), limits):
+            return service_unavailable()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            limiter.leave()
+            raise
+        if response.streaming:
+            # a streamed body (exports, the change feed) is produced as the server reads it, so
+            # the request keeps its slot until the server closes the response, which it does
+            # once the body is sent or the client has gone away
+            release_on_close(response)
+        else:
+            limiter.leave()
+        return response
@@ -0,0 +1,258 @@
+# Squashed from 0001_initial through 0011_section_enrolled_count.
+#
+# Every table is created once with its final columns, indexes and constraints, instead of being
+# rebuilt by each AddField/AlterUniqueTogether/AddConstraint SQLite cannot apply in place. The
+# groups of 0006_create_groups get the permissions of 0007_create_group_permissions at the end.
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.text
+
+from courseinfo.roles import create_courseinfo_permissions, provision_roles
+
+GROUP_NAMES = ['ci_user', 'ci_scheduler', 'ci_registrar']
+
+# The roles as 0007_create_group_permissions defined them; later changes go in courseinfo/roles.json.
+ROLES = {
+    'ci_user': ['view_instructor', 'view_period', 'view_year', 'view_student',
+                'view_semester', 'view_course', 'view_section', 'view_registration'],
+    'ci_scheduler': ['*_instructor', '*_period', '*_year', '*_semester', '*_course', '*_section',
+                     'view_student', 'view_registration'],
+    'ci_registrar': ['*_student', '*_registration', 'view_instructor', 'view_period',
+                     'view_year', 'view_course', 'view_semester', 'view_section'],
+}
+
+
+def add_group_data(apps, schema_editor):
+    group_model_class = apps.get_model('auth', 'Group')
+    group_model_class.objects.bulk_create([group_model_class(name=name) for name in GROUP_NAMES])
+
+
+def remove_group_data(apps, schema_editor):
+    group_model_class = apps.get_model('auth', 'Group')
+    group_model_class.objects.filter(name__in=GROUP_NAMES).delete()
+
+
+def add_group_permissions_data(apps, schema_editor):
+    create_courseinfo_permissions(apps, schema_editor.connection.alias)
+    provision_roles(ROLES, apps, schema_editor.connection.alias)
+
+
+def remove_group_permissions_data(apps, schema_editor):
+    provision_roles({role: [] for role in ROLES}, apps, schema_editor.connection.alias)
+
+
+def natural_key(field_name):
+    return django.db.models.functions.text.Lower(django.db.models.functions.text.Trim(field_name))
+
+
+class Migration(migrations.Migration):
+
+    replaces = [
+        ('courseinfo', '0001_initial'),
+        ('courseinfo', '0002_alter_course_options_course_unique_course'),
+        ('courseinfo', '0003_alter_instructor_options_alter_period_options_and_more'),
+        ('courseinfo', '0006_create_groups'),
+        ('courseinfo', '0007_create_group_permissions'),
+        ('courseinfo', '0008_duplicate_detection'),
+        ('courseinfo', '0009_natural_key_indexes'),
+        ('courseinfo', '0010_semester_archive'),
+        ('courseinfo', '0011_section_enrolled_count'),
+    ]
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Period',
+            fields=[
+                ('period_id', models.AutoField(primary_key=True, serialize=False)),
+                ('period_sequence', models.IntegerField(unique=True)),
+                ('period_name', models.CharField(max_length=45, unique=True)),
+            ],
+            options={
+                'ordering': ['period_sequence'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Year',
+            fields=[
+                ('year_id', models.AutoField(primary_key=True, serialize=False)),
+                ('year', models.IntegerField(unique=True)),
+            ],
+            options={
+                'ordering': ['year'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Semester',
+            fields=[
+                ('semester_id', models.AutoField(primary_key=True, serialize=False)),
+                ('year', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='semesters', to='courseinfo.year')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='semesters', to='courseinfo.period')),
+                ('is_archived', models.BooleanField(default=False, editable=False)),
+            ],
+            options={
+                'ordering': ['year__year', 'period__period_sequence'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('year', 'period'), name='unique_semester'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('course_id', models.AutoField(primary_key=True, serialize=False)),
+                ('course_number', models.CharField(max_length=20)),
+                ('course_name', models.CharField(max_length=255)),
+            ],
+            options={
+                'ordering': ['course_number', 'course_name'],
+                'indexes': [
+                    models.Index(natural_key('course_number'), name='course_number_key'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(natural_key('course_number'), natural_key('course_name'), name='unique_course', violation_error_message='A course with this number and name already exists.'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='Instructor',
+            fields=[
+                ('instructor_id', models.AutoField(primary_key=True, serialize=False)),
+                ('first_name', models.CharField(max_length=45)),
+                ('last_name', models.CharField(max_length=45)),
+                ('disambiguator', models.CharField(blank=True, default='', max_length=45)),
+            ],
+            options={
+                'ordering': ['last_name', 'first_name', 'disambiguator'],
+                'indexes': [
+                    models.Index(natural_key('last_name'), natural_key('first_name'), name='instructor_name_key'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(natural_key('first_name'), natural_key('last_name'), natural_key('disambiguator'), name='unique_instructor', violation_error_message='An instructor with this name and disambiguator already exists.'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='Student',
+            fields=[
+                ('student_id', models.AutoField(primary_key=True, serialize=False)),
+                ('first_name', models.CharField(max_length=45)),
+                ('last_name', models.CharField(max_length=45)),
+                ('disambiguator', models.CharField(blank=True, default='', max_length=45)),
+            ],
+            options={
+                'ordering': ['last_name', 'first_name', 'disambiguator'],
+                'indexes': [
+                    models.Index(natural_key('last_name'), natural_key('first_name'), name='student_name_key'),
+                ],
+                'constraints': [
+                    models.UniqueConstraint(natural_key('first_name'), natural_key('last_name'), natural_key('disambiguator'), name='unique_student', violation_error_message='A student with this name and disambiguator already exists.'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='Section',
+            fields=[
+                ('section_id', models.AutoField(primary_key=True, serialize=False)),
+                ('section_name', models.CharField(max_length=20)),
+                ('semester', models.ForeignKey(limit_choices_to={'is_archived': False}, on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='courseinfo.semester')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='courseinfo.course')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='courseinfo.instructor')),
+                ('enrolled_count', models.PositiveIntegerField(default=0, editable=False)),
+            ],
+            options={
+                'ordering': ['course', 'section_name', 'semester'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('semester', 'course', 'section_name'), name='unique_section'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='Registration',
+            fields=[
+                ('registration_id', models.AutoField(primary_key=True, serialize=False)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='registrations', to='courseinfo.student')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='registrations', to='courseinfo.section')),
+            ],
+            options={
+                'ordering': ['section', 'student'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('section', 'student'), name='unique_registration'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedSection',
+            fields=[
+                ('section_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('section_name', models.CharField(max_length=20)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_sections', to='courseinfo.semester')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_sections', to='courseinfo.course')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_sections', to='courseinfo.instructor')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['course', 'section_name', 'semester'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedRegistration',
+            fields=[
+                ('registration_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_registrations', to='courseinfo.student')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='registrations', to='courseinfo.archivedsection')),
+            ],
+            options={
+                'ordering': ['section', 'student'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateScan',
+            fields=[
+                ('duplicate_scan_id', models.AutoField(primary_key=True, serialize=False)),
+                ('person_type', models.CharField(max_length=20)),
+                ('last_pk', models.IntegerField()),
+                ('rows_compared', models.IntegerField()),
+                ('candidates_found', models.IntegerField()),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-finished_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('duplicate_candidate_id', models.AutoField(primary_key=True, serialize=False)),
+                ('person_type', models.CharField(max_length=20)),
+                ('first_id', models.IntegerField()),
+                ('first_label', models.CharField(max_length=150)),
+                ('second_id', models.IntegerField()),
+                ('second_label', models.CharField(max_length=150)),
+                ('score', models.FloatField()),
+                ('status', models.CharField(choices=[('pending', 'Pending review'), ('duplicate', 'Duplicate'), ('distinct', 'Distinct people')], default='pending', max_length=20)),
+                ('found_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['person_type', '-score'],
+                'constraints': [
+                    models.UniqueConstraint(fields=('person_type', 'first_id', 'second_id'), name='unique_duplicate_candidate'),
+                ],
+            },
+        ),
+        migrations.RunPython(
+            add_group_data,
+            remove_group_data
+        ),
+        migrations.RunPython(
+            add_group_permissions_data,
+            remove_group_permissions_data
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0007_create_group_permissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('duplicate_candidate_id', models.AutoField(primary_key=True, serialize=False)),
+                ('person_type', models.CharField(max_length=20)),
+                ('first_id', models.IntegerField()),
+                ('first_label', models.CharField(max_length=150)),
+                ('second_id', models.IntegerField()),
+                ('second_label', models.CharField(max_length=150)),
+                ('score', models.FloatField()),
+                ('status', models.CharField(choices=[('pending', 'Pending review'), ('duplicate', 'Duplicate'), ('distinct', 'Distinct people')], default='pending', max_length=20)),
+                ('found_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['person_type', '-score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateScan',
+            fields=[
+                ('duplicate_scan_id', models.AutoField(primary_key=True, serialize=False)),
+                ('person_type', models.CharField(max_length=20)),
+                ('last_pk', models.IntegerField()),
+                ('rows_compared', models.IntegerField()),
+                ('candidates_found', models.IntegerField()),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-finished_at'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='registration',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='duplicatecandidate',
+            constraint=models.UniqueConstraint(fields=('person_type', 'first_id', 'second_id'), name='unique_duplicate_candidate'),
+        ),
+    ]
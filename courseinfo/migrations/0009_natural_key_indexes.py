@@ -0,0 +1,50 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:25
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0008_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='course',
+            name='unique_course',
+        ),
+        migrations.RemoveConstraint(
+            model_name='instructor',
+            name='unique_instructor',
+        ),
+        migrations.RemoveConstraint(
+            model_name='student',
+            name='unique_student',
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('course_number')), name='course_number_key'),
+        ),
+        migrations.AddIndex(
+            model_name='instructor',
+            index=models.Index(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('last_name')), django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('first_name')), name='instructor_name_key'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('last_name')), django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('first_name')), name='student_name_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='course',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('course_number')), django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('course_name')), name='unique_course', violation_error_message='A course with this number and name already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='instructor',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('first_name')), django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('last_name')), django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('disambiguator')), name='unique_instructor', violation_error_message='An instructor with this name and disambiguator already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='student',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('first_name')), django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('last_name')), django.db.models.functions.text.Lower(django.db.models.functions.text.Trim('disambiguator')), name='unique_student', violation_error_message='A student with this name and disambiguator already exists.'),
+        ),
+    ]
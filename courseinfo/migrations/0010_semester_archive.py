@@ -0,0 +1,49 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0009_natural_key_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semester',
+            name='is_archived',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='section',
+            name='semester',
+            field=models.ForeignKey(limit_choices_to={'is_archived': False}, on_delete=django.db.models.deletion.PROTECT, related_name='sections', to='courseinfo.semester'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedSection',
+            fields=[
+                ('section_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('section_name', models.CharField(max_length=20)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_sections', to='courseinfo.course')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_sections', to='courseinfo.instructor')),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_sections', to='courseinfo.semester')),
+            ],
+            options={
+                'ordering': ['course', 'section_name', 'semester'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedRegistration',
+            fields=[
+                ('registration_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='registrations', to='courseinfo.archivedsection')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_registrations', to='courseinfo.student')),
+            ],
+            options={
+                'ordering': ['section', 'student'],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0010_semester_archive'),
+    ]
+
+    # Existing rows are counted by courseinfo.enrollment.install_enrollment_counters, which runs after
+    # migrate and recounts whenever the counter triggers had to be (re)created.
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Assigns the roles declared in courseinfo/roles.json on top of those of 0007 (and the squashed
+# migration replacing it); afterwards edit roles.json and run the provision_roles command.
+
+from django.db import migrations
+
+from courseinfo.roles import create_courseinfo_permissions, provision_roles
+
+
+def provision(apps, schema_editor):
+    create_courseinfo_permissions(apps, schema_editor.connection.alias)
+    provision_roles(apps=apps, using=schema_editor.connection.alias, strict=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('courseinfo', '0011_section_enrolled_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(provision, migrations.RunPython.noop),
+    ]
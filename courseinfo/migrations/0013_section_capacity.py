@@ -0,0 +1,41 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+
+def fit_capacity_to_registrations(apps, schema_editor):
+    # Recount first (the counter triggers are not installed while migrating), then make sure no
+    # existing section starts out over its new capacity.
+    section_model_class = apps.get_model('courseinfo', 'Section')
+    registration_model_class = apps.get_model('courseinfo', 'Registration')
+    registrations = (registration_model_class.objects.filter(section=OuterRef('pk')).order_by()
+                     .values('section').annotate(total=Count('pk')).values('total'))
+    section_model_class.objects.update(enrolled_count=Coalesce(Subquery(registrations), 0))
+    section_model_class.objects.update(capacity=Greatest('capacity', 'enrolled_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0012_provision_roles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedsection',
+            name='capacity',
+            field=models.PositiveIntegerField(default=30),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='capacity',
+            field=models.PositiveIntegerField(default=30),
+        ),
+        migrations.RunPython(fit_capacity_to_registrations, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='section',
+            constraint=models.CheckConstraint(check=models.Q(('enrolled_count__lte', models.F('capacity'))), name='section_within_capacity', violation_error_message='A section cannot hold more registrations than its capacity.'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from courseinfo.roles import create_courseinfo_permissions, provision_roles
+
+
+def provision(apps, schema_editor):
+    # give the roles in courseinfo/roles.json their waitlist permissions
+    create_courseinfo_permissions(apps, schema_editor.connection.alias)
+    provision_roles(apps=apps, using=schema_editor.connection.alias, strict=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0013_section_capacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('waitlist_entry_id', models.AutoField(primary_key=True, serialize=False)),
+                ('joined_at', models.DateTimeField(auto_now_add=True)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='courseinfo.section')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='courseinfo.student')),
+            ],
+            options={
+                'verbose_name_plural': 'waitlist entries',
+                'ordering': ['section', 'waitlist_entry_id'],
+                'indexes': [models.Index(fields=['section', 'waitlist_entry_id'], name='waitlist_position')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(fields=('section', 'student'), name='unique_waitlist_entry'),
+        ),
+        migrations.RunPython(provision, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.10 on 2026-10-19 02:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from courseinfo.roles import create_courseinfo_permissions, provision_roles
+
+
+def provision(apps, schema_editor):
+    # give the roles in courseinfo/roles.json their registration request permissions
+    create_courseinfo_permissions(apps, schema_editor.connection.alias)
+    provision_roles(apps=apps, using=schema_editor.connection.alias, strict=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('courseinfo', '0015_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationRequest',
+            fields=[
+                ('registration_request_id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('registered', 'Registered'), ('already registered', 'Already registered'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('reason', models.CharField(blank=True, default='', max_length=50)),
+                ('requested_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registration_requests', to='courseinfo.section')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registration_requests', to='courseinfo.student')),
+            ],
+            options={
+                'ordering': ['registration_request_id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['registration_request_id'], name='pending_registration_requests')],
+            },
+        ),
+        migrations.RunPython(provision, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.10 on 2026-10-19 03:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0016_registration_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeFeedConsumer',
+            fields=[
+                ('change_feed_consumer_id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('acknowledged_change_id', models.IntegerField(default=0)),
+                ('acknowledged_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('change_id', models.AutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=30)),
+                ('object_id', models.IntegerField(null=True)),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete'), ('reset', 'Reset')], max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'change log entries',
+                'ordering': ['change_id'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.10 on 2026-10-19 03:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0017_change_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptVersion',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='courseinfo.student')),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
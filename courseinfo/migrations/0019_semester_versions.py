@@ -0,0 +1,20 @@
+# Generated by Django 4.2.10 on 2026-10-19 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0018_transcript_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SemesterVersion',
+            fields=[
+                ('semester_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('version', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
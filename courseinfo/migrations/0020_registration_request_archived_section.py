@@ -0,0 +1,24 @@
+# Generated by Django 4.2.10 on 2026-10-19 05:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courseinfo', '0019_semester_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrationrequest',
+            name='archived_section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='registration_requests', to='courseinfo.archivedsection'),
+        ),
+        migrations.AlterField(
+            model_name='registrationrequest',
+            name='section',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='registration_requests', to='courseinfo.section'),
+        ),
+    ]
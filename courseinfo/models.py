@@ -1,8 +1,49 @@
+import string
+
+from django.conf import settings
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import CheckConstraint, F, Index, Q, UniqueConstraint, Value
+from django.db.models.functions import Lower, Trim
 from django.urls import reverse
 
 
+ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def natural_key(expression):
+    """The normalized form natural keys are compared and indexed on: trimmed and lower-cased."""
+    return Lower(Trim(expression))
+
+
+def normalize_key(value):
+    """
+    Python twin of natural_key() for comparing keys in memory. It follows SQLite's semantics
+    exactly: TRIM only strips spaces and LOWER only folds ASCII letters.
+    """
+    return value.strip(' ').translate(ASCII_LOWER)
+
+
+class NaturalKeyQuerySet(models.QuerySet):
+
+    def with_natural_key(self, **values):
+        """
+        Case- and whitespace-insensitive lookup, e.g. ``with_natural_key(last_name='smith ')``;
+        ``with_natural_key(last_name__in=[...])`` matches any of several values.
+
+        Both sides are normalized by the database with the same expression the functional
+        indexes are built on, so the lookup is an index search rather than an ``iexact`` scan.
+        """
+        aliases, lookups = {}, {}
+        for lookup, value in values.items():
+            field, _, suffix = lookup.partition('__')
+            aliases['%s_key' % field] = natural_key(field)
+            if suffix == 'in':
+                lookups['%s_key__in' % field] = [natural_key(Value(item)) for item in value]
+            else:
+                lookups['%s_key' % field] = natural_key(Value(value))
+        return self.alias(**aliases).filter(**lookups)
+
+
 class Period(models.Model):
     period_id = models.AutoField(primary_key=True)
     period_sequence = models.IntegerField(unique=True)
@@ -30,6 +71,7 @@ class Semester(models.Model):
     semester_id = models.AutoField(primary_key=True)
     year = models.ForeignKey(Year, related_name='semesters', on_delete=models.PROTECT)
     period = models.ForeignKey(Period, related_name='semesters', on_delete=models.PROTECT)
+    is_archived = models.BooleanField(default=False, editable=False)
 
     def __str__(self):
         return '%s - %s' % (self.year.year, self.period.period_name)
@@ -56,11 +98,25 @@ class Semester(models.Model):
         ]
 
 
+class SemesterVersion(models.Model):
+    # Bumped by database triggers on every write to a semester, its sections and their
+    # registrations, live or archived, so cached analytics keyed on it are never stale; see
+    # courseinfo.analytics. Semester 0 is bumped with every semester. A plain integer rather
+    # than a foreign key, so the triggers never have to order their writes around deletes.
+    semester_id = models.IntegerField(primary_key=True)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '%s (v%d)' % (self.semester_id, self.version)
+
+
 class Course(models.Model):
     course_id = models.AutoField(primary_key=True)
     course_number = models.CharField(max_length=20)
     course_name = models.CharField(max_length=255)
 
+    objects = NaturalKeyQuerySet.as_manager()
+
     def __str__(self):
         return '%s - %s' % (self.course_number, self.course_name)
 
@@ -81,8 +137,13 @@ class Course(models.Model):
 
     class Meta:
         ordering = ['course_number', 'course_name']
+        indexes = [
+            Index(natural_key('course_number'), name='course_number_key')
+        ]
         constraints = [
-            UniqueConstraint(fields=['course_number', 'course_name'], name='unique_course')
+            UniqueConstraint(natural_key('course_number'), natural_key('course_name'),
+                             name='unique_course',
+                             violation_error_message='A course with this number and name already exists.')
         ]
 
 
@@ -92,6 +153,8 @@ class Instructor(models.Model):
     last_name = models.CharField(max_length=45)
     disambiguator = models.CharField(max_length=45, blank=True, default='')
 
+    objects = NaturalKeyQuerySet.as_manager()
+
     def __str__(self):
         result = ''
         if self.disambiguator =='':
@@ -117,8 +180,13 @@ class Instructor(models.Model):
 
     class Meta:
         ordering = ['last_name', 'first_name', 'disambiguator']
+        indexes = [
+            Index(natural_key('last_name'), natural_key('first_name'), name='instructor_name_key')
+        ]
         constraints = [
-            UniqueConstraint(fields=['first_name', 'last_name', 'disambiguator'], name='unique_instructor')
+            UniqueConstraint(natural_key('first_name'), natural_key('last_name'), natural_key('disambiguator'),
+                             name='unique_instructor',
+                             violation_error_message='An instructor with this name and disambiguator already exists.')
         ]
 
 
@@ -128,6 +196,8 @@ class Student(models.Model):
     last_name = models.CharField(max_length=45)
     disambiguator = models.CharField(max_length=45, blank=True, default='')
 
+    objects = NaturalKeyQuerySet.as_manager()
+
     def __str__(self):
         result = ''
         if self.disambiguator =='':
@@ -153,22 +223,44 @@ class Student(models.Model):
 
     class Meta:
         ordering = ['last_name', 'first_name', 'disambiguator']
+        indexes = [
+            Index(natural_key('last_name'), natural_key('first_name'), name='student_name_key')
+        ]
         constraints = [
-            UniqueConstraint(fields=['first_name', 'last_name', 'disambiguator'],
-                             name='unique_student')
+            UniqueConstraint(natural_key('first_name'), natural_key('last_name'), natural_key('disambiguator'),
+                             name='unique_student',
+                             violation_error_message='A student with this name and disambiguator already exists.')
         ]
 
 
+class TranscriptVersion(models.Model):
+    # Bumped by database triggers on every write to the student's registrations, live or archived,
+    # so cached transcripts keyed on it are never stale; see courseinfo.transcript.
+    student = models.OneToOneField(Student, primary_key=True, related_name='+', on_delete=models.CASCADE)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return '%s (v%d)' % (self.student_id, self.version)
+
+
 class Section(models.Model):
     section_id = models.AutoField(primary_key=True)
     section_name = models.CharField(max_length=20)
-    semester = models.ForeignKey(Semester, related_name='sections', on_delete=models.PROTECT)
+    semester = models.ForeignKey(Semester, related_name='sections', on_delete=models.PROTECT,
+                                 limit_choices_to={'is_archived': False})
     course = models.ForeignKey(Course, related_name='sections', on_delete=models.PROTECT)
     instructor = models.ForeignKey(Instructor, related_name='sections', on_delete=models.PROTECT)
+    capacity = models.PositiveIntegerField(default=30)
+    # maintained by database triggers, see courseinfo.enrollment
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return '%s - %s (%s)' % (self.course.course_number, self.section_name, self.semester.__str__())
 
+    @property
+    def seats_available(self):
+        return max(self.capacity - self.enrolled_count, 0)
+
     def get_absolute_url(self):
         return reverse('courseinfo_section_detail_urlpattern',
                        kwargs={'pk': self.pk}
@@ -188,7 +280,11 @@ class Section(models.Model):
         ordering = ['course', 'section_name', 'semester']
         constraints = [
             UniqueConstraint(fields=['semester', 'course', 'section_name'],
-                             name='unique_section')
+                             name='unique_section'),
+            # the backstop for every write path that does not reserve a seat first
+            CheckConstraint(check=Q(enrolled_count__lte=F('capacity')),
+                            name='section_within_capacity',
+                            violation_error_message="A section cannot hold more registrations than its capacity.")
         ]
 
 
@@ -221,3 +317,242 @@ class Registration(models.Model):
             UniqueConstraint(fields=['section', 'student'],
                              name='unique_registration')
         ]
+
+
+class WaitlistEntry(models.Model):
+    # A waitlist only means something while both the section and the student exist.
+    waitlist_entry_id = models.AutoField(primary_key=True)
+    student = models.ForeignKey(Student, related_name='waitlist_entries', on_delete=models.CASCADE)
+    section = models.ForeignKey(Section, related_name='waitlist_entries', on_delete=models.CASCADE)
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '%s / %s (waitlisted)' % (self.section, self.student)
+
+    @property
+    def position(self):
+        # first-in, first-out by primary key, counted on the (section, pk) index
+        return WaitlistEntry.objects.filter(section_id=self.section_id, pk__lte=self.pk).count()
+
+    def get_delete_url(self):
+        return reverse('courseinfo_waitlistentry_delete_urlpattern',
+                       kwargs={'pk': self.pk}
+                       )
+
+    class Meta:
+        ordering = ['section', 'waitlist_entry_id']
+        verbose_name_plural = 'waitlist entries'
+        indexes = [
+            Index(fields=['section', 'waitlist_entry_id'], name='waitlist_position'),
+        ]
+        constraints = [
+            UniqueConstraint(fields=['section', 'student'],
+                             name='unique_waitlist_entry')
+        ]
+
+
+class RegistrationRequest(models.Model):
+    # A registration accepted while ASYNC_REGISTRATION is on, and processed later by the
+    # process_registration_queue worker (see courseinfo.enrollment.process_registration_requests).
+    PENDING = 'pending'
+    REGISTERED = 'registered'
+    ALREADY_REGISTERED = 'already registered'
+    REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (REGISTERED, 'Registered'),
+        (ALREADY_REGISTERED, 'Already registered'),
+        (REJECTED, 'Rejected'),
+    ]
+
+    registration_request_id = models.AutoField(primary_key=True)
+    student = models.ForeignKey(Student, related_name='registration_requests', on_delete=models.CASCADE)
+    # Archiving a semester moves its requests' section to archived_section, so the status pages of
+    # finished requests keep working; see courseinfo.archive.
+    section = models.ForeignKey(Section, related_name='registration_requests', null=True, blank=True,
+                                on_delete=models.CASCADE)
+    archived_section = models.ForeignKey('ArchivedSection', related_name='registration_requests', null=True,
+                                         blank=True, on_delete=models.PROTECT)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', null=True,
+                                     on_delete=models.SET_NULL)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    reason = models.CharField(max_length=50, blank=True, default='')
+    requested_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return '%s / %s (%s)' % (self.requested_section, self.student, self.status)
+
+    @property
+    def requested_section(self):
+        return self.section if self.archived_section_id is None else self.archived_section
+
+    def get_absolute_url(self):
+        return reverse('courseinfo_registrationrequest_detail_urlpattern',
+                       kwargs={'pk': self.pk}
+                       )
+
+    @property
+    def queue_position(self):
+        # first-in, first-out by primary key, counted on the partial index of pending requests
+        return RegistrationRequest.objects.filter(status=self.PENDING, pk__lte=self.pk).count()
+
+    class Meta:
+        ordering = ['registration_request_id']
+        indexes = [
+            Index(fields=['registration_request_id'], condition=Q(status='pending'),
+                  name='pending_registration_requests'),
+        ]
+
+
+# Sections and registrations of archived semesters are moved here (keeping their primary keys) so the
+# live tables only hold current terms; see courseinfo.archive.
+class ArchivedSection(models.Model):
+    section_id = models.IntegerField(primary_key=True)
+    section_name = models.CharField(max_length=20)
+    semester = models.ForeignKey(Semester, related_name='archived_sections', on_delete=models.PROTECT)
+    course = models.ForeignKey(Course, related_name='archived_sections', on_delete=models.PROTECT)
+    instructor = models.ForeignKey(Instructor, related_name='archived_sections', on_delete=models.PROTECT)
+    capacity = models.PositiveIntegerField(default=30)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    def __str__(self):
+        return '%s - %s (%s)' % (self.course.course_number, self.section_name, self.semester.__str__())
+
+    def get_absolute_url(self):
+        return reverse('courseinfo_section_detail_urlpattern',
+                       kwargs={'pk': self.pk}
+                       )
+
+    class Meta:
+        ordering = ['course', 'section_name', 'semester']
+
+
+class ArchivedRegistration(models.Model):
+    registration_id = models.IntegerField(primary_key=True)
+    student = models.ForeignKey(Student, related_name='archived_registrations', on_delete=models.PROTECT)
+    section = models.ForeignKey(ArchivedSection, related_name='registrations', on_delete=models.PROTECT)
+
+    is_archived = True
+
+    def __str__(self):
+        return '%s / %s' % (self.section, self.student)
+
+    def get_absolute_url(self):
+        return reverse('courseinfo_registration_detail_urlpattern',
+                       kwargs={'pk': self.pk}
+                       )
+
+    class Meta:
+        ordering = ['section', 'student']
+
+
+class DuplicateScan(models.Model):
+    duplicate_scan_id = models.AutoField(primary_key=True)
+    person_type = models.CharField(max_length=20)
+    last_pk = models.IntegerField()
+    rows_compared = models.IntegerField()
+    candidates_found = models.IntegerField()
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '%s scan up to %s (%s candidates)' % (self.person_type, self.last_pk, self.candidates_found)
+
+    class Meta:
+        ordering = ['-finished_at']
+
+
+class DuplicateCandidate(models.Model):
+    PENDING = 'pending'
+    DUPLICATE = 'duplicate'
+    DISTINCT = 'distinct'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending review'),
+        (DUPLICATE, 'Duplicate'),
+        (DISTINCT, 'Distinct people'),
+    ]
+
+    duplicate_candidate_id = models.AutoField(primary_key=True)
+    person_type = models.CharField(max_length=20)
+    first_id = models.IntegerField()
+    first_label = models.CharField(max_length=150)
+    second_id = models.IntegerField()
+    second_label = models.CharField(max_length=150)
+    score = models.FloatField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    found_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '%s / %s (%.2f)' % (self.first_label, self.second_label, self.score)
+
+    class Meta:
+        ordering = ['person_type', '-score']
+        constraints = [
+            UniqueConstraint(fields=['person_type', 'first_id', 'second_id'],
+                             name='unique_duplicate_candidate')
+        ]
+
+
+class IdempotencyKey(models.Model):
+    # The outcome of a completed create POST, replayed when the same form is submitted again
+    # (see IdempotentCreateMixin). Rows older than IDEMPOTENCY_KEY_TTL are purged.
+    idempotency_key_id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+', on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField()
+    location = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return '%s -> %s' % (self.key, self.location)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['user', 'key'],
+                             name='unique_idempotency_key')
+        ]
+
+
+class ChangeLogEntry(models.Model):
+    # One row per insert, update or delete of a mirrored courseinfo table, written by the triggers
+    # in courseinfo.changelog and read in change_id order through the change feed. Rows are never
+    # updated; compact_change_log deletes the ones every consumer has acknowledged.
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    RESET = 'reset'
+    ACTION_CHOICES = [
+        (CREATE, 'Create'),
+        (UPDATE, 'Update'),
+        (DELETE, 'Delete'),
+        (RESET, 'Reset'),
+    ]
+
+    change_id = models.AutoField(primary_key=True)
+    model = models.CharField(max_length=30)
+    object_id = models.IntegerField(null=True)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return '#%d %s %s %s' % (self.change_id, self.action, self.model, self.object_id)
+
+    class Meta:
+        ordering = ['change_id']
+        verbose_name_plural = 'change log entries'
+
+
+class ChangeFeedConsumer(models.Model):
+    # A downstream system reading the change feed, and how far into it it has got.
+    change_feed_consumer_id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=100, unique=True)
+    acknowledged_change_id = models.IntegerField(default=0)
+    acknowledged_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '%s (#%d)' % (self.name, self.acknowledged_change_id)
+
+    class Meta:
+        ordering = ['name']
@@ -0,0 +1,103 @@
+import json
+from collections import namedtuple
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from django.apps import apps as global_apps
+from django.contrib.auth.management import create_permissions
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+# Role name -> list of courseinfo permission codenames, where shell-style wildcards are allowed:
+# "view_section" grants one permission, "*_section" every permission on sections.
+ROLES_FILE = Path(__file__).resolve().parent / 'roles.json'
+
+
+class RoleChange(namedtuple('RoleChange', ['role', 'added', 'removed'])):
+
+    def __str__(self):
+        return '%s: %d added, %d removed' % (self.role, self.added, self.removed)
+
+
+def load_roles(path=ROLES_FILE):
+    with Path(path).open() as roles_file:
+        return json.load(roles_file)
+
+
+def resolve_permissions(patterns, codenames, role, strict=True):
+    """Return the pks of the permissions in ``codenames`` (codename -> pk) matched by ``patterns``."""
+    pks = set()
+    for pattern in patterns:
+        matches = {pk for codename, pk in codenames.items() if fnmatchcase(codename, pattern)}
+        if not matches and strict:
+            raise ValueError('Role %r: no courseinfo permission matches %r.' % (role, pattern))
+        pks |= matches
+    return pks
+
+
+def create_courseinfo_permissions(apps=global_apps, using=DEFAULT_DB_ALIAS):
+    """
+    Create the courseinfo permissions now rather than after migrate, so a migration can assign
+    them on a fresh database.
+    """
+    app_config = apps.get_app_config('courseinfo')
+    models_module = getattr(app_config, 'models_module', None)
+    # the stub app configs of a migration's historical state have no models module, which
+    # create_permissions() takes to mean the app has no models
+    app_config.models_module = models_module or True
+    try:
+        create_permissions(app_config, verbosity=0, using=using, apps=apps)
+    finally:
+        app_config.models_module = models_module
+
+
+def provision_roles(roles=None, apps=global_apps, using=DEFAULT_DB_ALIAS, strict=True):
+    """
+    Make the courseinfo permissions of each group in ``roles`` (defaults to ROLES_FILE) exactly
+    the ones declared there, creating missing groups, and return a RoleChange per role.
+
+    A pattern that matches no permission is an error unless ``strict`` is false, which migrations
+    need: roles.json may already name models that are only created by a later migration, and
+    each migration creating such a model provisions the roles again.
+
+    All courseinfo permissions are read in one query, the current assignments in another, and the
+    difference is applied with one bulk insert and one delete on the group-permission table.
+    Permissions from other apps that were granted to a group by hand are left alone.
+    """
+    if roles is None:
+        roles = load_roles()
+    group_model_class = apps.get_model('auth', 'Group')
+    permission_model_class = apps.get_model('auth', 'Permission')
+    through = group_model_class.permissions.through
+
+    with transaction.atomic(using=using):
+        codenames = dict(permission_model_class.objects.using(using)
+                         .filter(content_type__app_label='courseinfo')
+                         .values_list('codename', 'pk'))
+        wanted = {role: resolve_permissions(patterns, codenames, role, strict) for role, patterns in roles.items()}
+
+        groups = dict(group_model_class.objects.using(using).filter(name__in=roles).values_list('name', 'pk'))
+        missing = [group_model_class(name=role) for role in roles if role not in groups]
+        if missing:
+            group_model_class.objects.using(using).bulk_create(missing)
+            groups = dict(group_model_class.objects.using(using).filter(name__in=roles).values_list('name', 'pk'))
+
+        current = {}
+        for pk, group_id, permission_id in (through.objects.using(using)
+                                            .filter(group_id__in=groups.values(),
+                                                    permission_id__in=codenames.values())
+                                            .values_list('pk', 'group_id', 'permission_id')):
+            current[group_id, permission_id] = pk
+        desired = {(groups[role], permission_id) for role, pks in wanted.items() for permission_id in pks}
+
+        additions = desired - set(current)
+        removals = set(current) - desired
+        through.objects.using(using).bulk_create(
+            [through(group_id=group_id, permission_id=permission_id) for group_id, permission_id in additions]
+        )
+        if removals:
+            through.objects.using(using).filter(pk__in=[current[key] for key in removals]).delete()
+
+    return [RoleChange(role,
+                       sum(1 for group_id, _ in additions if group_id == groups[role]),
+                       sum(1 for group_id, _ in removals if group_id == groups[role]))
+            for role in roles]
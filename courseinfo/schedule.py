@@ -0,0 +1,54 @@
+import time
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import ArchivedSection, Instructor, Section
+
+
+class RollForwardResult(namedtuple('RollForwardResult', ['created', 'skipped', 'seconds'])):
+
+    def __str__(self):
+        return '%d sections created, %d already scheduled, in %.3fs' % (self.created, self.skipped, self.seconds)
+
+
+def roll_forward(source, target, reassign=None, course_ids=None, using=DEFAULT_DB_ALIAS):
+    """
+    Copy the section schedule of semester ``source`` into semester ``target`` and return a
+    RollForwardResult.
+
+    Each section keeps its course, name, instructor and capacity, with the instructors in
+    ``reassign`` (old ID -> new ID) swapped for their replacements; ``course_ids`` limits the
+    copy to those courses. A source semester that has been archived is copied from the archive
+    tables. Sections the target already has (by unique_section) are skipped, and everything
+    else is inserted with one bulk_create in a single transaction.
+    """
+    started = time.perf_counter()
+    if target.is_archived:
+        raise ValueError('Semester %s is archived; sections cannot be added to it.' % target)
+    if source.pk == target.pk:
+        raise ValueError('The source and target semesters are the same.')
+    reassign = reassign or {}
+    unknown = set(reassign.values()) - set(Instructor.objects.using(using)
+                                           .filter(pk__in=reassign.values()).values_list('pk', flat=True))
+    if unknown:
+        raise ValueError('No instructor with ID %s.' % ', '.join(str(pk) for pk in sorted(unknown)))
+
+    model = ArchivedSection if source.is_archived else Section
+    sections = model.objects.using(using).filter(semester=source).order_by('pk')
+    if course_ids is not None:
+        sections = sections.filter(course__in=course_ids)
+    with transaction.atomic(using=using):
+        scheduled = set(Section.objects.using(using).filter(semester=target).order_by()
+                        .values_list('course', 'section_name'))
+        new_sections = []
+        skipped = 0
+        for course, section_name, instructor, capacity in sections.values_list(
+                'course', 'section_name', 'instructor', 'capacity'):
+            if (course, section_name) in scheduled:
+                skipped += 1
+                continue
+            new_sections.append(Section(semester=target, course_id=course, section_name=section_name,
+                                        instructor_id=reassign.get(instructor, instructor), capacity=capacity))
+        Section.objects.using(using).bulk_create(new_sections)
+    return RollForwardResult(len(new_sections), skipped, time.perf_counter() - started)
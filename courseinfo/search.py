@@ -0,0 +1,219 @@
+import re
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.urls import reverse
+
+from .triggers import install_triggers
+
+# Every indexed object is stored under rowid = pk * len(KINDS) + kind code, so the triggers can
+# replace or drop a single entry by rowid instead of scanning the index for it.
+KINDS = ('student', 'instructor', 'course', 'section')
+STRIDE = len(KINDS)
+
+SEARCH_TABLE = 'courseinfo_search'
+
+CREATE_SEARCH_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS courseinfo_search USING fts5("
+    "label, keywords, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+# bm25 column weights: a hit in the displayed label outranks one in the extra keywords.
+RANK = 'bm25(courseinfo_search, 4.0, 1.0)'
+
+PERSON_LABEL = (
+    "{t}.last_name || ', ' || {t}.first_name || "
+    "CASE WHEN {t}.disambiguator = '' THEN '' ELSE ' (' || {t}.disambiguator || ')' END"
+)
+
+PERSON_COLUMNS = 'first_name, last_name, disambiguator'
+
+STUDENT_ROWS = (
+    "SELECT st.student_id * 4 + 0, " + PERSON_LABEL.format(t='st') + ", '' "
+    "FROM courseinfo_student st WHERE {where}"
+)
+
+INSTRUCTOR_ROWS = (
+    "SELECT ins.instructor_id * 4 + 1, " + PERSON_LABEL.format(t='ins') + ", '' "
+    "FROM courseinfo_instructor ins WHERE {where}"
+)
+
+COURSE_ROWS = (
+    "SELECT co.course_id * 4 + 2, co.course_number || ' - ' || co.course_name, '' "
+    "FROM courseinfo_course co WHERE {where}"
+)
+
+SECTION_FROM = (
+    "FROM courseinfo_section sec "
+    "JOIN courseinfo_course co ON co.course_id = sec.course_id "
+    "JOIN courseinfo_semester sem ON sem.semester_id = sec.semester_id "
+    "JOIN courseinfo_year yr ON yr.year_id = sem.year_id "
+    "JOIN courseinfo_period per ON per.period_id = sem.period_id "
+    "JOIN courseinfo_instructor ins ON ins.instructor_id = sec.instructor_id "
+    "WHERE {where}"
+)
+
+SECTION_ROWS = (
+    "SELECT sec.section_id * 4 + 3, "
+    "co.course_number || ' - ' || sec.section_name || ' (' || yr.year || ' - ' || per.period_name || ')', "
+    "co.course_name || ' ' || ins.first_name || ' ' || ins.last_name "
+    + SECTION_FROM
+)
+
+
+def _insert(rows, where):
+    return 'INSERT INTO courseinfo_search (rowid, label, keywords) %s;' % rows.format(where=where)
+
+
+def _delete(rowid):
+    return 'DELETE FROM courseinfo_search WHERE rowid = %s;' % rowid
+
+
+def _refresh_sections(where):
+    # Section labels embed course, semester and instructor data, so changes to those rows re-index
+    # the sections that show them.
+    return (
+        'DELETE FROM courseinfo_search WHERE rowid IN (SELECT sec.section_id * 4 + 3 %s);'
+        % SECTION_FROM.format(where=where)
+        + _insert(SECTION_ROWS, where)
+    )
+
+
+def _object_triggers(kind, table, pk, columns, rows, alias, extra_update=''):
+    code = KINDS.index(kind)
+    new_rowid = 'NEW.%s * 4 + %d' % (pk, code)
+    old_rowid = 'OLD.%s * 4 + %d' % (pk, code)
+    where = '%s.%s = NEW.%s' % (alias, pk, pk)
+    return {
+        'courseinfo_search_%s_ai' % kind: (
+            'CREATE TRIGGER courseinfo_search_%s_ai AFTER INSERT ON %s BEGIN %s %s END'
+            % (kind, table, _delete(new_rowid), _insert(rows, where))
+        ),
+        'courseinfo_search_%s_au' % kind: (
+            # only the columns that feed the index, so e.g. enrollment counter updates don't re-index
+            'CREATE TRIGGER courseinfo_search_%s_au AFTER UPDATE OF %s ON %s BEGIN %s %s %s END'
+            % (kind, columns, table, _delete(old_rowid), _insert(rows, where), extra_update)
+        ),
+        'courseinfo_search_%s_ad' % kind: (
+            'CREATE TRIGGER courseinfo_search_%s_ad AFTER DELETE ON %s BEGIN %s END'
+            % (kind, table, _delete(old_rowid))
+        ),
+    }
+
+
+TRIGGERS = {
+    **_object_triggers('student', 'courseinfo_student', 'student_id', PERSON_COLUMNS, STUDENT_ROWS, 'st'),
+    **_object_triggers('instructor', 'courseinfo_instructor', 'instructor_id', PERSON_COLUMNS, INSTRUCTOR_ROWS,
+                       'ins', _refresh_sections('sec.instructor_id = NEW.instructor_id')),
+    **_object_triggers('course', 'courseinfo_course', 'course_id', 'course_number, course_name',
+                       COURSE_ROWS, 'co', _refresh_sections('sec.course_id = NEW.course_id')),
+    **_object_triggers('section', 'courseinfo_section', 'section_id',
+                       'section_name, semester_id, course_id, instructor_id', SECTION_ROWS, 'sec'),
+    'courseinfo_search_semester_au': (
+        'CREATE TRIGGER courseinfo_search_semester_au AFTER UPDATE OF year_id, period_id ON courseinfo_semester '
+        'BEGIN %s END'
+        % _refresh_sections('sec.semester_id = NEW.semester_id')
+    ),
+    'courseinfo_search_year_au': (
+        'CREATE TRIGGER courseinfo_search_year_au AFTER UPDATE OF year ON courseinfo_year BEGIN %s END'
+        % _refresh_sections('sem.year_id = NEW.year_id')
+    ),
+    'courseinfo_search_period_au': (
+        'CREATE TRIGGER courseinfo_search_period_au AFTER UPDATE OF period_name ON courseinfo_period BEGIN %s END'
+        % _refresh_sections('sem.period_id = NEW.period_id')
+    ),
+}
+
+
+class SearchResult(namedtuple('SearchResult', ['kind', 'pk', 'label'])):
+
+    def __str__(self):
+        return self.label
+
+    def get_absolute_url(self):
+        return reverse('courseinfo_%s_detail_urlpattern' % self.kind,
+                       kwargs={'pk': self.pk}
+                       )
+
+
+def build_match_expression(text):
+    # Quote every word so user input can never be parsed as FTS5 query syntax, and prefix-match
+    # each one so results show up while a name is still being typed.
+    return ' '.join('"%s"*' % term for term in re.findall(r'\w+', text))
+
+
+class SearchResults:
+    """
+    Ranked matches for a search string, restricted to the given kinds.
+
+    Supports ``count()`` and slicing so it can be handed to a Paginator: each page is one
+    ``LIMIT``/``OFFSET`` query against the index and never touches the model tables.
+    """
+
+    def __init__(self, text, kinds=KINDS, using=DEFAULT_DB_ALIAS):
+        self.match = build_match_expression(text)
+        self.codes = [KINDS.index(kind) for kind in kinds]
+        self.using = using
+
+    def _where(self):
+        return (
+            'courseinfo_search MATCH %%s AND rowid %%%% %d IN (%s)'
+            % (STRIDE, ', '.join(str(code) for code in self.codes))
+        )
+
+    def count(self):
+        if not self.match or not self.codes:
+            return 0
+        with connections[self.using].cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM courseinfo_search WHERE ' + self._where(), [self.match])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        if not self.match or not self.codes:
+            return []
+        offset = key.start or 0
+        limit = -1 if key.stop is None else max(key.stop - offset, 0)
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                'SELECT rowid, label FROM courseinfo_search WHERE ' + self._where()
+                + ' ORDER BY ' + RANK + ' LIMIT %s OFFSET %s',
+                [self.match, limit, offset]
+            )
+            return [SearchResult(KINDS[rowid % STRIDE], rowid // STRIDE, label)
+                    for rowid, label in cursor.fetchall()]
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """Repopulate the whole index from the model tables and return the number of entries."""
+    connection = connections[using]
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(CREATE_SEARCH_TABLE)
+        cursor.execute('DELETE FROM courseinfo_search')
+        for rows in (STUDENT_ROWS, INSTRUCTOR_ROWS, COURSE_ROWS, SECTION_ROWS):
+            cursor.execute(_insert(rows, '1 = 1'))
+        cursor.execute("INSERT INTO courseinfo_search (courseinfo_search) VALUES ('optimize')")
+        cursor.execute('SELECT COUNT(*) FROM courseinfo_search')
+        return cursor.fetchone()[0]
+
+
+def install_search_index(sender, using=DEFAULT_DB_ALIAS, apps=None, **kwargs):
+    """post_migrate handler: create the index and its triggers, rebuilding when either was missing."""
+    if apps is not None:
+        try:
+            apps.get_model('courseinfo', 'Section')
+        except LookupError:
+            # migrated back to before the indexed tables existed
+            return
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    created = SEARCH_TABLE not in connection.introspection.table_names()
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_SEARCH_TABLE)
+    if install_triggers(connection, TRIGGERS) or created:
+        rebuild_search_index(using)
@@ -0,0 +1,202 @@
+import json
+import time
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .loaders import DEFAULT_BATCH_SIZE, KeyIndex, chunked, clean_row
+from .models import Course, Instructor, Registration, Section, Semester, Student
+
+# Columns of the two lists in a snapshot file. Sections and registrations are identified by the
+# natural keys of unique_section and unique_registration, spelled out in names rather than IDs.
+SECTION_KEY_COLUMNS = ('year', 'period', 'course_number', 'course_name', 'section_name')
+SECTION_COLUMNS = SECTION_KEY_COLUMNS + ('instructor_first_name', 'instructor_last_name',
+                                         'instructor_disambiguator', 'capacity')
+REGISTRATION_COLUMNS = SECTION_KEY_COLUMNS + ('student_first_name', 'student_last_name', 'student_disambiguator')
+
+
+class SyncError(Exception):
+    pass
+
+
+class SyncResult(namedtuple('SyncResult', ['sections_created', 'sections_updated', 'sections_deleted',
+                                           'registrations_created', 'registrations_deleted',
+                                           'problems', 'seconds'])):
+
+    @property
+    def changed(self):
+        return any(self[:5])
+
+    def __str__(self):
+        return ('Sections: %d created, %d updated, %d deleted. Registrations: %d created, %d deleted. '
+                '%d rows skipped in %.3fs' % (*self[:5], len(self.problems), self.seconds))
+
+
+def read_snapshot(path):
+    with open(path) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    for name, columns in (('sections', SECTION_COLUMNS), ('registrations', REGISTRATION_COLUMNS)):
+        for number, row in enumerate(snapshot.get(name, []), 1):
+            missing = [column for column in columns if column not in row and not column.endswith('disambiguator')]
+            if missing:
+                raise SyncError('%s #%d lacks %s.' % (name, number, ', '.join(missing)))
+    return snapshot
+
+
+def person(row, prefix):
+    return {field: row.get('%s_%s' % (prefix, field), '') for field in ('first_name', 'last_name', 'disambiguator')}
+
+
+class Snapshot:
+    """
+    A snapshot with its natural keys resolved to the IDs of semesters, courses, instructors and
+    students, each kind looked up in batched queries. Rows naming something that does not exist
+    are set aside as problems.
+    """
+
+    def __init__(self, snapshot, batch_size, using):
+        self.problems = []
+        sections = [clean_row(row) for row in snapshot.get('sections', [])]
+        registrations = [clean_row(row) for row in snapshot.get('registrations', [])]
+
+        semesters = {(year, period): (pk, is_archived) for year, period, pk, is_archived in
+                     Semester.objects.using(using).values_list('year__year', 'period__period_name', 'pk',
+                                                               'is_archived')}
+        courses = KeyIndex(Course, using)
+        instructors = KeyIndex(Instructor, using)
+        students = KeyIndex(Student, using)
+        course_pks = courses.pks({courses.key(row) for row in sections + registrations}, batch_size)
+        instructor_pks = instructors.pks({instructors.key(person(row, 'instructor')) for row in sections}, batch_size)
+        student_pks = students.pks({students.key(person(row, 'student')) for row in registrations}, batch_size)
+
+        def section_key(row, label):
+            semester = semesters.get((int(row['year']), row['period']))
+            course = course_pks.get(courses.key(row))
+            if semester is None:
+                self.problems.append('%s: no semester %s - %s.' % (label, row['year'], row['period']))
+            elif semester[1]:
+                self.problems.append('%s: semester %s - %s is archived.' % (label, row['year'], row['period']))
+            elif course is None:
+                self.problems.append('%s: no course %s - %s.' % (label, row['course_number'], row['course_name']))
+            else:
+                return semester[0], course, row['section_name']
+            return None
+
+        # key -> (instructor_id, capacity); None when the instructor is unknown, which leaves a
+        # stored section as it is rather than deleting it
+        self.sections = {}
+        for row in sections:
+            label = 'Section %s %s' % (row['course_number'], row['section_name'])
+            key = section_key(row, label)
+            if key is None:
+                continue
+            instructor = instructor_pks.get(instructors.key(person(row, 'instructor')))
+            if instructor is None:
+                self.problems.append('%s: no instructor %s, %s.' % (
+                    label, row['instructor_last_name'], row['instructor_first_name']))
+            self.sections[key] = None if instructor is None else (instructor, int(row['capacity']))
+        # every semester the snapshot has sections in is covered by it, even when some of those
+        # sections could not be resolved
+        self.semester_ids = {semesters[int(row['year']), row['period']][0] for row in sections
+                             if semesters.get((int(row['year']), row['period']), (None, True))[1] is False}
+
+        # section key -> student IDs
+        self.registrations = {}
+        for row in registrations:
+            label = 'Registration of %s, %s in %s %s' % (row['student_last_name'], row['student_first_name'],
+                                                         row['course_number'], row['section_name'])
+            key = section_key(row, label)
+            student = student_pks.get(students.key(person(row, 'student')))
+            if key is None:
+                continue
+            if key not in self.sections:
+                self.problems.append('%s: the section is not in the snapshot.' % label)
+            elif student is None:
+                self.problems.append('%s: no such student.' % label)
+            else:
+                self.registrations.setdefault(key, set()).add(student)
+
+        for key, student_ids in self.registrations.items():
+            if self.sections[key] is not None and len(student_ids) > self.sections[key][1]:
+                raise SyncError('Section %s has %d registrations but a capacity of %d.'
+                                % (key[2], len(student_ids), self.sections[key][1]))
+
+
+def sync_snapshot(snapshot, dry_run=False, batch_size=DEFAULT_BATCH_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Make the sections and registrations of every semester in ``snapshot`` (a dict as returned
+    by read_snapshot()) match it, and return a SyncResult.
+
+    Everything is diffed in memory on natural keys: the stored sections and registrations of
+    the snapshot's semesters are read with one query each, and only the differences are
+    written, kind by kind, in transactions of ``batch_size`` rows. Registrations are deleted
+    before capacities are lowered and capacities raised before registrations are inserted, so
+    section_within_capacity holds throughout. A snapshot that matches the database writes
+    nothing. A run that fails part way leaves earlier batches applied, and the next run
+    finishes the job.
+
+    Sections of other semesters are left alone, as are stored rows the snapshot names but could
+    not be resolved (see Snapshot). Waitlists are not promoted into seats the sync frees: the
+    next snapshot would take those registrations away again.
+    """
+    started = time.perf_counter()
+    wanted = Snapshot(snapshot, batch_size, using)
+
+    stored_sections = {}
+    for pk, semester, course, name, instructor, capacity in (
+            Section.objects.using(using).order_by().filter(semester__in=wanted.semester_ids)
+            .values_list('pk', 'semester', 'course', 'section_name', 'instructor', 'capacity')):
+        stored_sections[semester, course, name] = (pk, instructor, capacity)
+    stored_registrations = {}
+    for pk, section, student in (Registration.objects.using(using).order_by()
+                                 .filter(section__semester__in=wanted.semester_ids)
+                                 .values_list('pk', 'section', 'student').iterator(chunk_size=10000)):
+        stored_registrations[section, student] = pk
+
+    section_keys = {pk: key for key, (pk, _, _) in stored_sections.items()}
+    deleted_sections = [pk for key, (pk, _, _) in stored_sections.items() if key not in wanted.sections]
+    updated_sections = [Section(pk=pk, instructor_id=wanted.sections[key][0], capacity=wanted.sections[key][1])
+                        for key, (pk, instructor, capacity) in stored_sections.items()
+                        if wanted.sections.get(key) not in (None, (instructor, capacity))]
+    new_sections = [Section(semester_id=key[0], course_id=key[1], section_name=key[2],
+                            instructor_id=value[0], capacity=value[1])
+                    for key, value in wanted.sections.items() if key not in stored_sections and value is not None]
+    deleted_registrations = [pk for (section, student), pk in stored_registrations.items()
+                             if student not in wanted.registrations.get(section_keys[section], ())]
+    stored_pairs = {(section_keys[section], student) for section, student in stored_registrations}
+    new_registrations = [(key, student) for key, student_ids in wanted.registrations.items()
+                         for student in student_ids if (key, student) not in stored_pairs]
+    # sections that are neither stored nor insertable (unknown instructor) cannot take registrations
+    new_registrations = [(key, student) for key, student in new_registrations
+                         if key in stored_sections or wanted.sections[key] is not None]
+
+    if not dry_run:
+        for chunk in chunked(deleted_registrations, batch_size):
+            with transaction.atomic(using=using):
+                Registration.objects.using(using).filter(pk__in=chunk).delete()
+        for chunk in chunked(deleted_sections, batch_size):
+            with transaction.atomic(using=using):
+                Section.objects.using(using).filter(pk__in=chunk).delete()
+        for chunk in chunked(updated_sections, batch_size):
+            with transaction.atomic(using=using):
+                Section.objects.using(using).bulk_update(chunk, ['instructor', 'capacity'])
+        for chunk in chunked(new_sections, batch_size):
+            with transaction.atomic(using=using):
+                Section.objects.using(using).bulk_create(chunk)
+        section_pks = {key: pk for key, (pk, _, _) in stored_sections.items()}
+        section_pks.update({(section.semester_id, section.course_id, section.section_name): section.pk
+                            for section in new_sections})
+        if None in section_pks.values():
+            # backends that cannot return the IDs of a bulk insert
+            section_pks.update({(semester, course, name): pk for pk, semester, course, name in
+                                Section.objects.using(using).order_by().filter(semester__in=wanted.semester_ids)
+                                .values_list('pk', 'semester', 'course', 'section_name')})
+        for chunk in chunked(new_registrations, batch_size):
+            with transaction.atomic(using=using):
+                Registration.objects.using(using).bulk_create(
+                    [Registration(section_id=section_pks[key], student_id=student) for key, student in chunk]
+                )
+
+    return SyncResult(len(new_sections), len(updated_sections), len(deleted_sections),
+                      len(new_registrations), len(deleted_registrations),
+                      wanted.problems, time.perf_counter() - started)
@@ -0,0 +1,95 @@
+import hashlib
+import sqlite3
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TemplateDatabaseRunner(DiscoverRunner):
+    """
+    Test runner that restores SQLite test databases from a prebuilt template file instead of
+    replaying migrations.
+
+    The first run migrates as usual and saves the result, post_migrate work included, under
+    TEST_DB_TEMPLATE_DIR. The file name is a fingerprint of the migrations, app modules and roles
+    file, so any schema change builds a fresh template. Runs with --keepdb or --parallel, and
+    databases other than SQLite, are set up the normal way.
+
+    Rate-limit buckets, cached transcripts and analytics are kept in a dummy cache during the
+    run, so they neither leak from one test into the next (rolled-back IDs are reused) nor use
+    up the tokens of a server running against the same cache; tests of the caching itself
+    override it again.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        dummy = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+        self.cache_override = override_settings(CACHES={
+            **settings.CACHES,
+            settings.REGISTRATION_RATE_LIMITS['CACHE']: dummy,
+            settings.TRANSCRIPTS['CACHE']: dummy,
+            settings.ANALYTICS['CACHE']: dummy,
+        })
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_override.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def template_path(self):
+        digest = hashlib.sha256(django.get_version().encode())
+        for app_name in settings.INSTALLED_APPS:
+            digest.update(app_name.encode())
+        app_dir = Path(__file__).resolve().parent
+        for pattern in ('*.py', '*.json', 'migrations/*.py'):
+            for path in sorted(app_dir.glob(pattern)):
+                if path.name != 'tests.py':
+                    digest.update(path.read_bytes())
+        return Path(settings.TEST_DB_TEMPLATE_DIR).resolve() / ('%s.sqlite3' % digest.hexdigest()[:16])
+
+    def use_template(self, aliases):
+        return (not self.keepdb and self.parallel <= 1 and set(aliases) == {'default'}
+                and connections['default'].vendor == 'sqlite')
+
+    def setup_databases(self, **kwargs):
+        if not self.use_template(kwargs.get('aliases', ())):
+            return super().setup_databases(**kwargs)
+        template = self.template_path()
+        if not template.exists():
+            old_config = super().setup_databases(**kwargs)
+            self.save_template(template)
+            return old_config
+        with self.time_keeper.timed("  Restoring 'default'"):
+            old_config = self.restore_template(template)
+        if 'default' in kwargs.get('serialized_aliases', ()):
+            connection = connections['default']
+            connection._test_serialized_contents = connection.creation.serialize_db_to_string()
+        return old_config
+
+    def save_template(self, template):
+        template.parent.mkdir(parents=True, exist_ok=True)
+        partial = template.with_suffix('.partial')
+        target = sqlite3.connect(partial)
+        connections['default'].ensure_connection()
+        connections['default'].connection.backup(target)
+        target.close()
+        partial.replace(template)
+
+    def restore_template(self, template):
+        connection = connections['default']
+        old_name = connection.settings_dict['NAME']
+        test_name = connection.creation._get_test_db_name()
+        if self.verbosity >= 1:
+            self.log('Restoring test database for alias %r from %s...' % (connection.alias, template))
+        connection.close()
+        settings.DATABASES[connection.alias]['NAME'] = test_name
+        connection.settings_dict['NAME'] = test_name
+        connection.ensure_connection()
+        source = sqlite3.connect(template)
+        source.backup(connection.connection)
+        source.close()
+        return [(connection, old_name, True)]
@@ -1,15 +1,45 @@
 
+import csv
+import json
 import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
 
 from django.conf import settings
-from django.contrib.auth.models import User, Group
+from django.contrib.auth.models import User, Group, Permission
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.core.management import call_command
 from django.shortcuts import get_object_or_404
-from django.test import TestCase
-
+from django.db.models import Count, Max
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+
+from courseinfo.analytics import overview, semester_report, teaching_load
+from courseinfo.archive import ArchiveError, archive_semester, unarchive_semester
+from courseinfo.changelog import compact_change_log
+from courseinfo.enrollment import SectionFull, bulk_register, drop_registrations, promote_waitlist, reconcile_enrolled_counts, register
+from courseinfo.enrollment import process_registration_requests
+from courseinfo.idempotency import purge_expired_keys
+from courseinfo.loaders import KeyIndex, RowError, bulk_load, import_students
+from courseinfo.middleware import PROCESSES_KEY, PROTECTED, limiter
+from courseinfo.roles import load_roles, provision_roles
+from courseinfo.throttling import Rate, take_token
+from courseinfo.forms import InstructorForm, SectionForm, StudentForm
+from courseinfo.duplicates import find_duplicates, normalize_name, soundex
 from courseinfo.models import Period, Year, Semester, Course, Instructor, Student, Section, Registration
-from django.db import IntegrityError
+from courseinfo.models import ArchivedRegistration, ArchivedSection, DuplicateCandidate, IdempotencyKey, WaitlistEntry
+from courseinfo.models import ChangeFeedConsumer, ChangeLogEntry, RegistrationRequest, TranscriptVersion
+from courseinfo.schedule import roll_forward
+from courseinfo.search import KINDS, SearchResults
+from courseinfo.sync import SyncError, sync_snapshot
+from courseinfo.views import SectionUpdate
+from django.db import IntegrityError, OperationalError, connection, transaction
 from django.urls import reverse
+from django.utils import timezone
 
 
 # NOTE: Template Tests all required the additional 'name=' param in urls.py configuration for reverse() to work
@@ -1198,8 +1228,8 @@ class LoginLogoutBehavior(TestCase):
 
 # For Week 14 (testing Week 13: Authentication and Authorization)
 class AuthenticationAuthorizationTests(TestCase):
-    # For now, we can only test the superuser and user authentications. The latest migration does not seem to apply to
-    # the testing DB for some reason. Cannot figure out.
+    # The group permissions are assigned by migration 0012 (see courseinfo/roles.json), which also runs on the
+    # testing DB.
     def setUp(self):
         User.objects.create_superuser(username='sysadmin', password='pass')
         user = User.objects.create_user(username='user', password='pass')
@@ -1242,13 +1272,1643 @@ class AuthenticationAuthorizationTests(TestCase):
     def test_non_superuser(self):
         user = self.refresh_user('user')
         self.client.force_login(user)
-        no_permission_objects = ['semester', 'course', 'section', 'instructor', 'student', 'registration']
-        for obj in no_permission_objects:
+        view_only_objects = ['semester', 'course', 'section', 'instructor', 'student', 'registration']
+        for obj in view_only_objects:
             view_response = self.client.get(reverse(f"courseinfo_{obj}_list_urlpattern"))
             create_response = self.client.get(reverse(f"courseinfo_{obj}_create_urlpattern"))
             update_response = self.client.get(reverse(f"courseinfo_{obj}_update_urlpattern", kwargs={'pk': 1}))
             delete_response = self.client.get(reverse(f"courseinfo_{obj}_delete_urlpattern", kwargs={'pk': 1}))
-            self.assertEqual(view_response.status_code, 403)
+            self.assertEqual(view_response.status_code, 200)
             self.assertEqual(create_response.status_code, 403)
             self.assertEqual(update_response.status_code, 403)
             self.assertEqual(delete_response.status_code, 403)
+
+
+# Full-text search index (kept in sync by SQLite triggers)
+class SearchTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.period = Period.objects.create(period_sequence=1, period_name="Spring")
+        cls.year = Year.objects.create(year=2024)
+        cls.semester = Semester.objects.create(year=cls.year, period=cls.period)
+        cls.course = Course.objects.create(course_number="IS439",
+                                           course_name="Web Development Using Application Frameworks")
+        cls.instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        cls.student = Student.objects.create(first_name="Harvey", last_name="Specter", disambiguator="New York")
+        cls.section = Section.objects.create(section_name="AOG/AOU", semester=cls.semester,
+                                             course=cls.course, instructor=cls.instructor)
+
+    @staticmethod
+    def labels(text, kinds=KINDS):
+        return [(result.kind, result.label) for result in SearchResults(text, kinds)[:25]]
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        self.assertEqual(self.labels("spec"), [('student', "Specter, Harvey (New York)")])
+        Student.objects.filter(pk=self.student.pk).update(last_name="Litt")
+        self.assertEqual(self.labels("spec"), [])
+        self.assertEqual(self.labels("litt harv"), [('student', "Litt, Harvey (New York)")])
+        Student.objects.filter(pk=self.student.pk).delete()
+        self.assertEqual(self.labels("litt"), [])
+
+    def test_section_entries_follow_related_rows(self):
+        self.assertIn(('section', "IS439 - AOG/AOU (2024 - Spring)"), self.labels("is439"))
+        Course.objects.filter(pk=self.course.pk).update(course_number="IS440")
+        self.assertEqual(self.labels("is439"), [])
+        self.assertEqual(self.labels("is440", ['section']), [('section', "IS440 - AOG/AOU (2024 - Spring)")])
+        # Sections are also found through their course name and instructor
+        self.assertEqual(len(self.labels("gerard", ['section'])), 1)
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.labels('"spec OR (" NEAR'), [])
+        self.assertEqual(SearchResults("").count(), 0)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM courseinfo_search")
+        self.assertEqual(self.labels("specter"), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.labels("specter"), [('student', "Specter, Harvey (New York)")])
+
+    def test_search_view(self):
+        response = self.client.get(reverse('courseinfo_search_urlpattern'), {'q': 'harv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'courseinfo/search.html')
+        self.assertContains(response, self.student.get_absolute_url())
+        self.assertContains(response, self.instructor.get_absolute_url())
+        response = self.client.get(reverse('courseinfo_search_urlpattern'), {'q': 'harv', 'kind': 'student'})
+        self.assertNotContains(response, self.instructor.get_absolute_url())
+
+    def test_search_view_respects_permissions(self):
+        user = User.objects.create_user(username='registrar', password='pass')
+        user.user_permissions.add(Permission.objects.get(codename='view_student'))
+        self.client.force_login(user)
+        response = self.client.get(reverse('courseinfo_search_urlpattern'), {'q': 'harv'})
+        self.assertContains(response, self.student.get_absolute_url())
+        self.assertNotContains(response, self.instructor.get_absolute_url())
+
+
+# Duplicate-person detection
+class DuplicateDetectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.john = Student.objects.create(first_name="John", last_name="Smith")
+        cls.jon = Student.objects.create(first_name="Jon", last_name="Smith ")
+        Student.objects.create(first_name="Jane", last_name="Doe")
+        # Different disambiguators mark people that are known to be distinct
+        Student.objects.create(first_name="Mary", last_name="Jones", disambiguator="Chicago")
+        Student.objects.create(first_name="Mary", last_name="Jones", disambiguator="Boston")
+
+    def test_normalize_and_soundex(self):
+        self.assertEqual(normalize_name("  José  O'Neil "), "jose o neil")
+        self.assertEqual(soundex("robert"), soundex("rupert"))
+        self.assertEqual(soundex("jon"), soundex("john"))
+
+    def test_full_scan_finds_near_duplicates(self):
+        scan = find_duplicates('student')
+        self.assertEqual(scan.rows_compared, 5)
+        candidates = list(DuplicateCandidate.objects.filter(person_type='student'))
+        self.assertEqual([(c.first_id, c.second_id) for c in candidates], [(self.john.pk, self.jon.pk)])
+        self.assertEqual(candidates[0].status, DuplicateCandidate.PENDING)
+
+    def test_incremental_scan_only_compares_new_rows(self):
+        find_duplicates('student')
+        DuplicateCandidate.objects.update(status=DuplicateCandidate.DISTINCT)
+        jane = Student.objects.create(first_name="Jayne", last_name="Doe")
+        scan = find_duplicates('student', incremental=True)
+        self.assertEqual(scan.rows_compared, 1)
+        self.assertEqual(scan.candidates_found, 1)
+        # The reviewed pair is kept as it was
+        self.assertEqual(DuplicateCandidate.objects.filter(status=DuplicateCandidate.DISTINCT).count(), 1)
+        self.assertTrue(DuplicateCandidate.objects.filter(second_id=jane.pk, status=DuplicateCandidate.PENDING)
+                        .exists())
+
+    def test_find_duplicates_command(self):
+        out = StringIO()
+        call_command('find_duplicates', 'student', stdout=out)
+        self.assertIn("Smith, John", out.getvalue())
+
+
+# Case- and whitespace-insensitive natural keys
+class NaturalKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.student = Student.objects.create(first_name="Harvey", last_name="Specter", disambiguator="New York")
+        cls.instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard")
+        cls.course = Course.objects.create(course_number="IS439",
+                                           course_name="Web Development Using Application Frameworks")
+
+    def test_lookups_ignore_case_and_whitespace(self):
+        self.assertEqual(Student.objects.with_natural_key(first_name=" harvey", last_name="SPECTER ").get(),
+                         self.student)
+        self.assertEqual(Instructor.objects.with_natural_key(last_name="gerard").get(), self.instructor)
+        self.assertEqual(Course.objects.with_natural_key(course_number="is439 ").get(), self.course)
+        self.assertEqual(Student.objects.with_natural_key(last_name__in=["Ross", " specter"]).get(), self.student)
+        self.assertFalse(Student.objects.with_natural_key(last_name="Spectre").exists())
+
+    def test_lookups_use_functional_indexes(self):
+        for queryset, index in [
+            (Student.objects.with_natural_key(first_name="harvey", last_name="specter", disambiguator="new york"),
+             'unique_student'),
+            (Student.objects.with_natural_key(last_name="specter"), 'student_name_key'),
+            (Course.objects.with_natural_key(course_number="is439"), 'course_number_key'),
+            (KeyIndex(Student)._queryset([("harvey", "specter", "new york")])[0], 'unique_student'),
+        ]:
+            plan = queryset.order_by().explain()
+            self.assertIn('USING INDEX %s' % index, plan)
+
+    def test_uniqueness_is_on_normalized_form(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Student.objects.create(first_name="harvey", last_name="SPECTER ", disambiguator="new york")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Course.objects.create(course_number="is439",
+                                  course_name="web development using application frameworks")
+
+    def test_forms_report_normalized_duplicates(self):
+        form = StudentForm(data={'first_name': 'HARVEY', 'last_name': ' specter', 'disambiguator': 'New York'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('A student with this name and disambiguator already exists.', form.non_field_errors())
+        form = InstructorForm(data={'first_name': 'henry', 'last_name': 'GERARD', 'disambiguator': ''})
+        self.assertFalse(form.is_valid())
+
+
+# Semester archival
+class ArchiveTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        period = Period.objects.create(period_sequence=1, period_name="Spring")
+        cls.old_semester = Semester.objects.create(year=Year.objects.create(year=2020), period=period)
+        cls.current_semester = Semester.objects.create(year=Year.objects.create(year=2024), period=period)
+        cls.course = Course.objects.create(course_number="IS439",
+                                           course_name="Web Development Using Application Frameworks")
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard")
+        cls.students = [Student.objects.create(first_name="Student", last_name=str(i)) for i in range(3)]
+        cls.old_sections = [Section.objects.create(section_name="S%d" % i, semester=cls.old_semester,
+                                                   course=cls.course, instructor=instructor) for i in range(3)]
+        cls.current_section = Section.objects.create(section_name="S1", semester=cls.current_semester,
+                                                     course=cls.course, instructor=instructor)
+        cls.old_registration = Registration.objects.create(student=cls.students[0], section=cls.old_sections[0])
+        for student in cls.students:
+            Registration.objects.create(student=student, section=cls.old_sections[1])
+            Registration.objects.create(student=student, section=cls.current_section)
+
+    def test_archive_and_unarchive_in_batches(self):
+        self.assertEqual(archive_semester(self.old_semester, batch_size=2), (3, 4, 0))
+        self.assertTrue(Semester.objects.get(pk=self.old_semester.pk).is_archived)
+        self.assertEqual(list(Section.objects.all()), [self.current_section])
+        self.assertEqual(Registration.objects.count(), 3)
+        self.assertEqual(ArchivedSection.objects.count(), 3)
+        self.assertEqual(ArchivedRegistration.objects.get(pk=self.old_registration.pk).section_id,
+                         self.old_sections[0].pk)
+
+        self.assertEqual(unarchive_semester(self.old_semester, batch_size=2), (3, 4))
+        self.assertFalse(Semester.objects.get(pk=self.old_semester.pk).is_archived)
+        self.assertEqual(Section.objects.count(), 4)
+        self.assertEqual(Registration.objects.get(pk=self.old_registration.pk).section, self.old_sections[0])
+        self.assertFalse(ArchivedSection.objects.exists())
+        self.assertFalse(ArchivedRegistration.objects.exists())
+
+    def test_detail_pages_resolve_archived_rows(self):
+        call_command('archive_semester', self.old_semester.pk, stdout=StringIO())
+        section = self.old_sections[0]
+        response = self.client.get(reverse('courseinfo_section_detail_urlpattern', kwargs={'pk': section.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "IS439 - S0 (2020 - Spring)")
+        self.assertContains(response, "read-only")
+        self.assertNotContains(response, section.get_update_url())
+        self.assertContains(response, self.old_registration.get_absolute_url())
+        response = self.client.get(self.old_registration.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "read-only")
+        response = self.client.get(self.old_semester.get_absolute_url())
+        self.assertContains(response, section.get_absolute_url())
+        response = self.client.get(reverse('courseinfo_section_detail_urlpattern', kwargs={'pk': 9999}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_archiving_deletes_the_waitlists(self):
+        WaitlistEntry.objects.create(student=self.students[2], section=self.old_sections[0])
+        current = WaitlistEntry.objects.create(student=self.students[1], section=self.current_section)
+        out = StringIO()
+        call_command('archive_semester', self.old_semester.pk, stdout=out)
+        self.assertIn('Deleted 1 waitlist entries.', out.getvalue())
+        self.assertEqual(list(WaitlistEntry.objects.all()), [current])
+        self.assertEqual(unarchive_semester(self.old_semester), (3, 4))
+        self.assertEqual(list(WaitlistEntry.objects.all()), [current])
+
+    def test_archived_semesters_cannot_be_scheduled(self):
+        archive_semester(self.old_semester)
+        semesters = SectionForm().fields['semester'].queryset
+        self.assertNotIn(self.old_semester, semesters)
+        self.assertIn(self.current_semester, semesters)
+
+    def test_archived_rows_refuse_delete(self):
+        for semester in (self.old_semester, self.current_semester):
+            archive_semester(semester)
+        instructor = self.current_section.instructor
+        for name, obj in (('instructor', instructor), ('course', self.course), ('semester', self.old_semester),
+                          ('student', self.students[0])):
+            response = self.client.get(reverse('courseinfo_%s_delete_urlpattern' % name, kwargs={'pk': obj.pk}))
+            self.assertTemplateUsed(response, 'courseinfo/%s_refuse_delete.html' % name)
+            self.assertContains(response, 'IS439 - S0 (2020 - Spring)')
+
+
+# Trigger-maintained Section.enrolled_count
+class EnrollmentCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        period = Period.objects.create(period_sequence=1, period_name="Spring")
+        semester = Semester.objects.create(year=Year.objects.create(year=2024), period=period)
+        course = Course.objects.create(course_number="IS439",
+                                       course_name="Web Development Using Application Frameworks")
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard")
+        cls.first, cls.second = [Section.objects.create(section_name=name, semester=semester, course=course,
+                                                        instructor=instructor) for name in ("A", "B")]
+        cls.students = [Student.objects.create(first_name="Student", last_name=str(i)) for i in range(5)]
+
+    def counts(self):
+        return list(Section.objects.order_by('section_name').values_list('enrolled_count', flat=True))
+
+    def test_counter_follows_create_move_and_delete(self):
+        registration = Registration.objects.create(student=self.students[0], section=self.first)
+        self.assertEqual(self.counts(), [1, 0])
+        registration.section = self.second
+        registration.save()
+        self.assertEqual(self.counts(), [0, 1])
+        registration.delete()
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_counter_follows_bulk_paths(self):
+        Registration.objects.bulk_create([Registration(student=student, section=self.first)
+                                          for student in self.students])
+        self.assertEqual(self.counts(), [5, 0])
+        Registration.objects.filter(student__in=self.students[:2]).update(section=self.second)
+        self.assertEqual(self.counts(), [3, 2])
+        Registration.objects.all().delete()
+        self.assertEqual(self.counts(), [0, 0])
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        Registration.objects.create(student=self.students[0], section=self.first)
+        Section.objects.filter(pk=self.first.pk).update(enrolled_count=7)
+        Section.objects.filter(pk=self.second.pk).update(enrolled_count=2)
+        out = StringIO()
+        call_command('reconcile_enrollment', '--check', stdout=out)
+        self.assertIn("Section %d: stored 7, actual 1" % self.first.pk, out.getvalue())
+        self.assertEqual(self.counts(), [7, 2])
+        self.assertEqual(reconcile_enrolled_counts(), [(self.first.pk, 7, 1), (self.second.pk, 2, 0)])
+        self.assertEqual(self.counts(), [1, 0])
+        self.assertEqual(reconcile_enrolled_counts(), [])
+
+
+# Batched seed/reference data loader
+class BulkLoadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        Student.objects.create(first_name="Harvey", last_name="Specter")
+
+    def test_bulk_load_skips_existing_and_repeated_keys(self):
+        rows = [
+            {'first_name': 'harvey ', 'last_name': 'SPECTER', 'disambiguator': ''},
+            {'first_name': ' Mike', 'last_name': 'Ross', 'disambiguator': ''},
+            {'first_name': 'mike', 'last_name': 'ross', 'disambiguator': ''},
+            {'first_name': 'Mike', 'last_name': 'Ross', 'disambiguator': 'Brooklyn'},
+        ]
+        with self.assertNumQueries(8):
+            # savepoint, count, 2 x (key lookup, insert), count, release
+            result = bulk_load(Student, rows, batch_size=2)
+        self.assertEqual((result.inserted, result.skipped), (2, 2))
+        self.assertEqual(Student.objects.get(last_name__iexact='specter').first_name, "Harvey")
+        self.assertTrue(Student.objects.filter(first_name="Mike", last_name="Ross", disambiguator='').exists())
+
+    def test_bulk_load_reference_data(self):
+        result = bulk_load(Year, [{'year': 2024}, {'year': 2025}, {'year': 2024}])
+        self.assertEqual((result.inserted, result.skipped), (2, 1))
+
+    def test_load_archived_data_sets(self):
+        out = StringIO()
+        call_command('load_seed_data', '--archived', stdout=out)
+        instructors, students = Instructor.objects.count(), Student.objects.count()
+        self.assertGreater(instructors, 25)
+        self.assertIn("inserted", out.getvalue())
+        # Loading again inserts nothing
+        call_command('load_seed_data', '--archived', stdout=out)
+        self.assertEqual((Instructor.objects.count(), Student.objects.count()), (instructors, students))
+
+
+# Role (group permission) provisioning
+class RoleProvisioningTests(TestCase):
+    @staticmethod
+    def codenames(role):
+        return set(Group.objects.get(name=role).permissions.values_list('codename', flat=True))
+
+    def test_migrations_provision_declared_roles(self):
+        self.assertEqual(self.codenames('ci_user'),
+                         {'view_instructor', 'view_period', 'view_year', 'view_student',
+                          'view_semester', 'view_course', 'view_section', 'view_registration',
+                          'view_waitlistentry'})
+        self.assertIn('delete_section', self.codenames('ci_scheduler'))
+        self.assertNotIn('add_student', self.codenames('ci_scheduler'))
+        self.assertIn('add_registration', self.codenames('ci_registrar'))
+        changes = provision_roles()
+        self.assertEqual([(change.added, change.removed) for change in changes], [(0, 0)] * len(load_roles()))
+
+    def test_provision_applies_only_the_difference(self):
+        other_app_permission = Permission.objects.get(codename='view_user')
+        Group.objects.get(name='ci_user').permissions.add(other_app_permission)
+        roles = {'ci_user': ['view_section', 'view_course', '*_registration'], 'ci_auditor': ['view_*']}
+        # permissions, groups, group creation, groups again, assignments, insert, delete, plus a savepoint
+        with self.assertNumQueries(9):
+            changes = provision_roles(roles)
+        self.assertEqual([str(change) for change in changes],
+                         ["ci_user: 3 added, 6 removed", "ci_auditor: %d added, 0 removed"
+                          % Permission.objects.filter(content_type__app_label='courseinfo',
+                                                      codename__startswith='view_').count()])
+        self.assertEqual(self.codenames('ci_user'),
+                         {'view_section', 'view_course', 'view_registration', 'add_registration',
+                          'change_registration', 'delete_registration', 'view_user'})
+
+    def test_unknown_permission_is_rejected(self):
+        with self.assertRaises(ValueError):
+            provision_roles({'ci_user': ['view_sectoin']})
+        self.assertIn('view_section', self.codenames('ci_user'))
+
+    def test_provision_roles_command(self):
+        Group.objects.get(name='ci_registrar').permissions.clear()
+        out = StringIO()
+        call_command('provision_roles', stdout=out)
+        self.assertIn("ci_registrar: 19 added, 0 removed", out.getvalue())
+
+
+# Section capacity and seat reservation
+class SeatReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                           period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        course = Course.objects.create(course_number="IS439",
+                                       course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=semester, course=course,
+                                             instructor=instructor, capacity=2)
+        cls.other_section = Section.objects.create(section_name="AOU", semester=semester, course=course,
+                                                   instructor=instructor, capacity=2)
+        cls.students = [Student.objects.create(first_name="Student", last_name=str(i)) for i in range(3)]
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def register_through_view(self, student, section):
+        return self.client.post(reverse('courseinfo_registration_create_urlpattern'),
+                                data={'student': student.pk, 'section': section.pk})
+
+    def test_full_section_is_rejected(self):
+        for student in self.students[:2]:
+            self.assertEqual(self.register_through_view(student, self.section).status_code, 302)
+        response = self.register_through_view(self.students[2], self.section)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "This section is full.")
+        self.section.refresh_from_db()
+        self.assertEqual((self.section.enrolled_count, self.section.registrations.count()), (2, 2))
+        with self.assertRaises(SectionFull):
+            register(self.students[2], self.section)
+
+    def test_moving_a_registration_needs_a_free_seat(self):
+        registration = register(self.students[0], self.other_section)
+        register(self.students[1], self.section)
+        register(self.students[2], self.section)
+        url = reverse('courseinfo_registration_update_urlpattern', kwargs={'pk': registration.pk})
+        response = self.client.post(url, data={'student': self.students[0].pk, 'section': self.section.pk})
+        self.assertContains(response, "This section is full.")
+        # changing only the student does not need a seat
+        new_student = Student.objects.create(first_name="Mike", last_name="Ross")
+        response = self.client.post(url, data={'student': new_student.pk, 'section': self.other_section.pk})
+        self.assertEqual(response.status_code, 302)
+
+    def test_database_refuses_oversubscription(self):
+        Registration.objects.bulk_create([Registration(student=student, section=self.section)
+                                          for student in self.students[:2]])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Registration.objects.create(student=self.students[2], section=self.section)
+        self.section.refresh_from_db()
+        form = SectionForm(instance=self.section, data={'section_name': 'AOG', 'semester': self.section.semester_id,
+                                                        'course': self.section.course_id,
+                                                        'instructor': self.section.instructor_id, 'capacity': 1})
+        self.assertEqual(form.errors['capacity'], ["Capacity cannot be lower than the 2 students already registered."])
+
+    def test_capacity_edit_racing_registrations_is_a_form_error(self):
+        form = SectionForm(instance=Section.objects.get(pk=self.section.pk),
+                           data={'section_name': 'AOG', 'semester': self.section.semester_id,
+                                 'course': self.section.course_id, 'instructor': self.section.instructor_id,
+                                 'capacity': 1})
+        self.assertTrue(form.is_valid())
+        # registrations committed between the form's validation and its save
+        register(self.students[0], self.section)
+        register(self.students[1], self.section)
+        request = RequestFactory().post('/')
+        request.user = User.objects.get(username='test')
+        view = SectionUpdate()
+        view.setup(request, pk=self.section.pk)
+        response = view.form_valid(form)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(form.errors['capacity'], ["Capacity cannot be lower than the 2 students already registered."])
+        self.section.refresh_from_db()
+        self.assertEqual((self.section.capacity, self.section.enrolled_count), (2, 2))
+
+
+class SeatReservationStressTests(TransactionTestCase):
+    THREADS = 8
+
+    def test_concurrent_registrations_never_oversubscribe(self):
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard")
+        semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                           period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        course = Course.objects.create(course_number="IS439", course_name="Web Development")
+        sections = [Section.objects.create(section_name=str(i), semester=semester, course=course,
+                                           instructor=instructor, capacity=25) for i in range(4)]
+        students = Student.objects.bulk_create([Student(first_name="Student", last_name=str(i)) for i in range(200)])
+        outcomes = {'registered': 0, 'full': 0}
+        lock = threading.Lock()
+
+        def attempt(student, section):
+            # The in-memory test database reports a lock conflict at once instead of waiting for
+            # it like a database file does, so retry the whole (rolled back) registration.
+            while True:
+                try:
+                    register(student, section)
+                    return 'registered'
+                except SectionFull:
+                    return 'full'
+                except OperationalError:
+                    time.sleep(0.001)
+
+        def worker(chunk):
+            try:
+                for student in chunk:
+                    for section in sections:
+                        result = attempt(student, section)
+                        with lock:
+                            outcomes[result] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(students[i::self.THREADS],)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(outcomes, {'registered': 100, 'full': 700})
+        for section in Section.objects.annotate(registered=Count('registrations')):
+            self.assertEqual((section.enrolled_count, section.registered), (25, 25))
+        self.assertEqual(reconcile_enrolled_counts(fix=False), [])
+
+
+# Waitlists and promotion into freed seats
+class WaitlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                           period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        course = Course.objects.create(course_number="IS439",
+                                       course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=semester, course=course,
+                                             instructor=instructor, capacity=2)
+        cls.students = [Student.objects.create(first_name="Student", last_name=str(i)) for i in range(6)]
+        cls.registrations = [register(student, cls.section) for student in cls.students[:2]]
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def join(self, student):
+        return self.client.post(reverse('courseinfo_waitlistentry_create_urlpattern'),
+                                data={'student': student.pk, 'section': self.section.pk})
+
+    def waitlisted(self):
+        return list(self.section.waitlist_entries.values_list('student__last_name', flat=True))
+
+    def registered(self):
+        return sorted(self.section.registrations.values_list('student__last_name', flat=True))
+
+    def test_join_and_positions(self):
+        for student in self.students[2:5]:
+            self.assertRedirects(self.join(student), self.section.get_absolute_url())
+        self.assertEqual(self.waitlisted(), ['2', '3', '4'])
+        self.assertEqual([entry.position for entry in self.section.waitlist_entries.all()], [1, 2, 3])
+        response = self.client.get(self.section.get_absolute_url())
+        self.assertEqual([entry.student for entry in response.context['waitlist']], self.students[2:5])
+        self.assertContains(self.join(self.students[0]), "This student is already registered for this section.")
+
+    def test_cannot_join_while_seats_are_free(self):
+        Registration.objects.filter(pk=self.registrations[0].pk).delete()
+        self.assertContains(self.join(self.students[2]), "This section still has free seats")
+
+    def test_drop_promotes_oldest_entry(self):
+        for student in self.students[2:5]:
+            WaitlistEntry.objects.create(student=student, section=self.section)
+        response = self.client.post(reverse('courseinfo_registration_delete_urlpattern',
+                                            kwargs={'pk': self.registrations[0].pk}))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.registered(), ['1', '2'])
+        self.assertEqual(self.waitlisted(), ['3', '4'])
+        self.section.refresh_from_db()
+        self.assertEqual(self.section.enrolled_count, 2)
+
+    def test_mass_drop_promotes_in_one_batch(self):
+        for student in self.students[2:6]:
+            WaitlistEntry.objects.create(student=student, section=self.section)
+        # an entry for a student who got a seat some other way is stale and is dropped, not promoted
+        Section.objects.filter(pk=self.section.pk).update(capacity=3)
+        register(self.students[3], self.section)
+        dropped = Registration.objects.filter(pk__in=[registration.pk for registration in self.registrations])
+        with self.assertNumQueries(10):
+            # 2 savepoints and their releases, the drop (select + delete), lock sections, pick entries,
+            # insert, delete entries
+            deleted, promoted = drop_registrations(dropped)
+        self.assertEqual((deleted, len(promoted)), (2, 2))
+        self.assertEqual(self.registered(), ['2', '3', '4'])
+        self.assertEqual(self.waitlisted(), ['5'])
+
+    def test_raising_capacity_promotes(self):
+        for student in self.students[2:5]:
+            WaitlistEntry.objects.create(student=student, section=self.section)
+        response = self.client.post(reverse('courseinfo_section_update_urlpattern', kwargs={'pk': self.section.pk}),
+                                    data={'section_name': 'AOG', 'semester': self.section.semester_id,
+                                          'course': self.section.course_id, 'instructor': self.section.instructor_id,
+                                          'capacity': 4})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.registered(), ['0', '1', '2', '3'])
+        self.assertEqual(promote_waitlist([self.section.pk]), [])
+
+
+# Bulk (cohort) registration
+class BulkRegistrationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                           period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        course = Course.objects.create(course_number="IS439",
+                                       course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=semester, course=course,
+                                             instructor=instructor, capacity=300)
+        cls.students = Student.objects.bulk_create([Student(first_name="Student", last_name=str(i))
+                                                    for i in range(301)])
+        register(cls.students[0], cls.section)
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def test_cohort_is_registered_in_a_fixed_number_of_queries(self):
+        student_ids = [student.pk for student in self.students] + [999999]
+        # savepoint, lock, free seats, known students, conflicts, insert, release
+        with self.assertNumQueries(7):
+            outcomes = bulk_register(self.section, student_ids)
+        self.assertEqual(outcomes[0].status, 'already registered')
+        self.assertEqual([outcome.status for outcome in outcomes[1:300]], ['registered'] * 299)
+        self.assertEqual(str(outcomes[300]), "Student %d: rejected (section is full)" % self.students[300].pk)
+        self.assertEqual(str(outcomes[301]), "Student 999999: rejected (no such student)")
+        self.section.refresh_from_db()
+        self.assertEqual(self.section.enrolled_count, 300)
+
+    def test_bulk_registration_view(self):
+        response = self.client.post(reverse('courseinfo_registration_bulk_urlpattern'),
+                                    data={'section': self.section.pk,
+                                          'students': '%d, %d\n999999' % (self.students[0].pk, self.students[1].pk)})
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'courseinfo/registration_bulk_form.html')
+        self.assertEqual(response.context['summary'], [('already registered', 1), ('registered', 1), ('rejected', 1)])
+        self.assertContains(response, "rejected (no such student)")
+        response = self.client.post(reverse('courseinfo_registration_bulk_urlpattern'),
+                                    data={'section': self.section.pk, 'students': '12 abc'})
+        self.assertContains(response, "Not a student ID: abc")
+
+    def test_bulk_register_command(self):
+        out = StringIO()
+        call_command('bulk_register', str(self.section.pk), str(self.students[0].pk), str(self.students[2].pk),
+                     stdout=out)
+        self.assertIn("1 already registered, 1 registered", out.getvalue())
+
+
+# Idempotency keys on create forms
+class IdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                           period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        course = Course.objects.create(course_number="IS439",
+                                       course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=semester, course=course,
+                                             instructor=instructor)
+        cls.student = Student.objects.create(first_name="Harvey", last_name="Specter", disambiguator="New York")
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def test_create_forms_embed_a_fresh_key(self):
+        url = reverse('courseinfo_registration_create_urlpattern')
+        first, second = self.client.get(url), self.client.get(url)
+        self.assertContains(first, 'type="hidden" name="idempotency_key"')
+        self.assertNotEqual(first.context['form']['idempotency_key'].value(),
+                            second.context['form']['idempotency_key'].value())
+
+    def test_repeated_registration_post_is_replayed(self):
+        data = {'student': self.student.pk, 'section': self.section.pk, 'idempotency_key': 'a' * 32}
+        url = reverse('courseinfo_registration_create_urlpattern')
+        first = self.client.post(url, data=data)
+        registration = Registration.objects.get()
+        self.assertRedirects(first, registration.get_absolute_url())
+        # session and user, then the key lookup: no validation queries and no insert
+        with self.assertNumQueries(3):
+            second = self.client.post(url, data=data)
+        self.assertEqual((second.status_code, second['Location']), (302, first['Location']))
+        self.assertEqual(Registration.objects.count(), 1)
+
+    def test_repeated_student_post_creates_one_student(self):
+        data = {'first_name': 'Mike', 'last_name': 'Ross', 'disambiguator': '', 'idempotency_key': 'b' * 32}
+        for _ in range(3):
+            self.client.post(reverse('courseinfo_student_create_urlpattern'), data=data)
+        self.assertEqual(Student.objects.filter(last_name='Ross').count(), 1)
+
+    def test_invalid_post_does_not_use_up_the_key(self):
+        url = reverse('courseinfo_student_create_urlpattern')
+        response = self.client.post(url, data={'first_name': '', 'last_name': 'Ross', 'idempotency_key': 'c' * 32})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        response = self.client.post(url, data={'first_name': 'Mike', 'last_name': 'Ross', 'disambiguator': '',
+                                               'idempotency_key': 'c' * 32})
+        self.assertEqual(response.status_code, 302)
+
+    def test_expired_keys_are_purged(self):
+        user = User.objects.get(username='test')
+        IdempotencyKey.objects.create(user=user, key='old', status_code=302, location='/')
+        IdempotencyKey.objects.create(user=user, key='new', status_code=302, location='/')
+        IdempotencyKey.objects.filter(key='old').update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(purge_expired_keys(), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['new'])
+
+
+THROTTLE_SETTINGS = {
+    'CACHES': {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'throttle': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'throttle-tests'},
+    },
+    'REGISTRATION_RATE_LIMITS': {
+        'CACHE': 'throttle',
+        'IP': '6/min',
+        'GROUPS': {'ci_registrar': '5/min', 'ci_user': '2/min'},
+        'DEFAULT': '2/min',
+    },
+}
+
+
+@override_settings(**THROTTLE_SETTINGS)
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                           period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        course = Course.objects.create(course_number="IS439",
+                                       course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=semester, course=course,
+                                             instructor=instructor)
+
+    def setUp(self):
+        caches['throttle'].clear()
+
+    def login(self, username, group=None, superuser=False):
+        if superuser:
+            user = User.objects.create_superuser(username, '%s@example.com' % username, 'pass')
+        else:
+            user = User.objects.create_user(username, '%s@example.com' % username, 'pass')
+        if group:
+            user.groups.add(Group.objects.get(name=group))
+        self.client.login(username=username, password='pass')
+
+    def post_registrations(self, count, **extra):
+        url = reverse('courseinfo_registration_create_urlpattern')
+        # an invalid form still costs a token, and keeps the tests from needing students
+        return [self.client.post(url, data={'section': self.section.pk}, **extra).status_code
+                for _ in range(count)]
+
+    def test_bucket_refills_over_time(self):
+        cache, rate = caches['throttle'], Rate.parse('2/min')
+        self.assertEqual(rate, Rate(2, 60))
+        self.assertEqual([take_token(cache, 'bucket', rate, now=0) for _ in range(3)], [0, 0, 30])
+        self.assertEqual(take_token(cache, 'bucket', rate, now=15), 15)
+        self.assertEqual(take_token(cache, 'bucket', rate, now=30), 0)
+
+    def test_user_limit_follows_the_most_generous_group(self):
+        self.login('clerk', 'ci_user')
+        # refused by the permission check, but a request that gets that far has used a token
+        self.assertEqual(self.post_registrations(3), [403, 403, 429])
+        self.client.logout()
+        self.login('registrar', 'ci_registrar')
+        User.objects.get(username='registrar').groups.add(Group.objects.get(name='ci_user'))
+        self.assertEqual(self.post_registrations(6, REMOTE_ADDR='10.0.0.2'), [200] * 5 + [429])
+
+    def test_leaving_a_group_drops_the_cached_rate(self):
+        self.login('registrar', 'ci_registrar')
+        self.assertEqual(self.post_registrations(1), [200])
+        registrar = User.objects.get(username='registrar')
+        with self.captureOnCommitCallbacks(execute=True):
+            registrar.groups.remove(Group.objects.get(name='ci_registrar'))
+        # the bucket keeps its tokens, capped at the new rate's two; the view now refuses too
+        self.assertEqual(self.post_registrations(3), [403, 403, 429])
+
+    def test_over_limit_response_says_when_to_retry(self):
+        self.login('clerk', 'ci_user')
+        self.post_registrations(2)
+        response = self.client.post(reverse('courseinfo_registration_bulk_urlpattern'))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_ip_limit_is_checked_before_any_query(self):
+        self.login('admin', superuser=True)
+        self.assertEqual(self.post_registrations(7), [200] * 6 + [429])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post_registrations(1), [429])
+        self.assertEqual(self.post_registrations(1, REMOTE_ADDR='10.0.0.3'), [200])
+
+    def test_reads_are_not_limited(self):
+        self.login('registrar', 'ci_registrar')
+        self.assertEqual(self.post_registrations(6)[-1], 429)
+        response = self.client.get(reverse('courseinfo_registration_create_urlpattern'))
+        self.assertEqual(response.status_code, 200)
+
+
+CONCURRENCY_SETTINGS = {
+    'CACHE': 'throttle',
+    'PROCESS': 4,
+    'CLUSTER': 6,
+    'LOW_PRIORITY_SHARE': 0.5,
+    'LOW_PRIORITY': ['courseinfo_*_list_urlpattern'],
+    'PROTECTED': ['login_urlpattern', 'courseinfo_registration_create_urlpattern',
+                  'courseinfo_concurrency_metrics_urlpattern'],
+    'REFRESH': 60,
+}
+
+
+@override_settings(CONCURRENCY_LIMITS=CONCURRENCY_SETTINGS)
+class LoadSheddingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.student = Student.objects.create(first_name="Harvey", last_name="Specter", disambiguator="New York")
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+        limiter.reset()
+        self.addCleanup(limiter.reset)
+
+    def hold(self, count):
+        # stand-ins for requests still being served by other threads
+        for _ in range(count):
+            self.assertTrue(limiter.enter(PROTECTED, CONCURRENCY_SETTINGS))
+
+    def get(self, urlpattern, **kwargs):
+        return self.client.get(reverse(urlpattern, kwargs=kwargs)).status_code
+
+    def test_low_priority_pages_are_shed_first(self):
+        self.hold(2)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('courseinfo_student_list_urlpattern'))
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '1'))
+        self.assertEqual(self.get('courseinfo_student_detail_urlpattern', pk=self.student.pk), 200)
+
+    def test_protected_views_are_never_shed(self):
+        self.hold(4)
+        self.assertEqual(self.get('courseinfo_student_detail_urlpattern', pk=self.student.pk), 503)
+        self.assertEqual(self.get('courseinfo_registration_create_urlpattern'), 200)
+        self.assertEqual(self.get('login_urlpattern'), 200)
+        limiter.leave()
+        self.assertEqual(self.get('courseinfo_student_detail_urlpattern', pk=self.student.pk), 200)
+        self.assertEqual(limiter.gauge()['in_flight'], 3)
+
+    def test_streaming_responses_hold_their_slot_until_closed(self):
+        with override_settings(CONCURRENCY_LIMITS=dict(CONCURRENCY_SETTINGS,
+                                                       LOW_PRIORITY=['courseinfo_*_export_urlpattern'])):
+            self.hold(1)
+            response = self.client.get(reverse('courseinfo_student_export_urlpattern'))
+            self.assertEqual(limiter.gauge()['in_flight'], 2)
+            self.assertEqual(self.get('courseinfo_student_export_urlpattern'), 503)
+            self.assertIn(b'Specter', b''.join(response.streaming_content))
+            self.assertEqual(limiter.gauge()['in_flight'], 1)
+            # a client that goes away mid-stream: the server stops reading and closes the response
+            response = self.client.get(reverse('courseinfo_student_export_urlpattern'))
+            next(iter(response.streaming_content))
+            self.assertEqual(limiter.gauge()['in_flight'], 2)
+            response.close()
+            response.close()
+            self.assertEqual(limiter.gauge()['in_flight'], 1)
+
+    @override_settings(CACHES=THROTTLE_SETTINGS['CACHES'])
+    def test_other_processes_count_toward_the_cluster_limit(self):
+        cache = caches['throttle']
+        cache.clear()
+        other = {'in_flight': 5, 'peak': 5, 'admitted': 9, 'shed': {'low': 2}}
+        cache.set('concurrency:process:elsewhere:1', other)
+        cache.set(PROCESSES_KEY, ['concurrency:process:elsewhere:1'])
+        limiter.refresh(CONCURRENCY_SETTINGS)
+        self.assertEqual(self.get('courseinfo_student_detail_urlpattern', pk=self.student.pk), 200)
+        self.hold(1)
+        self.assertEqual(self.get('courseinfo_student_detail_urlpattern', pk=self.student.pk), 503)
+        self.assertEqual(len(cache.get(PROCESSES_KEY)), 2)
+
+        metrics = self.client.get(reverse('courseinfo_concurrency_metrics_urlpattern')).json()
+        self.assertEqual(metrics['process']['shed'], {'normal': 1})
+        self.assertEqual(metrics['cluster'], {'processes': 2, 'in_flight': 7, 'admitted': 12,
+                                              'shed': {'low': 2, 'normal': 1}})
+
+    def test_metrics_are_for_staff_only(self):
+        User.objects.create_user('clerk', 'clerk@example.com', 'pass')
+        self.client.login(username='clerk', password='pass')
+        self.assertEqual(self.get('courseinfo_concurrency_metrics_urlpattern'), 403)
+
+
+class RegistrationQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                           period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        course = Course.objects.create(course_number="IS439",
+                                       course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=semester, course=course,
+                                             instructor=instructor, capacity=2)
+        cls.other_section = Section.objects.create(section_name="AOU", semester=semester, course=course,
+                                                   instructor=instructor, capacity=2)
+        cls.students = [Student.objects.create(first_name="Student", last_name=str(i)) for i in range(3)]
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def enqueue(self, student, section):
+        return RegistrationRequest.objects.create(student=student, section=section)
+
+    @override_settings(ASYNC_REGISTRATION=True)
+    def test_async_create_queues_the_request(self):
+        response = self.client.post(reverse('courseinfo_registration_create_urlpattern'),
+                                    data={'student': self.students[0].pk, 'section': self.section.pk})
+        registration_request = RegistrationRequest.objects.get()
+        self.assertRedirects(response, registration_request.get_absolute_url())
+        self.assertFalse(Registration.objects.exists())
+        self.assertEqual(registration_request.requested_by.username, 'test')
+        response = self.client.get(registration_request.get_absolute_url())
+        self.assertContains(response, "number 1 in line")
+
+        process_registration_requests()
+        registration = Registration.objects.get()
+        response = self.client.get(registration_request.get_absolute_url())
+        self.assertContains(response, "Registered")
+        self.assertContains(response, registration.get_absolute_url())
+
+    def test_batch_checks_capacity_and_duplicates(self):
+        for student in self.students:
+            self.enqueue(student, self.section)
+        self.enqueue(self.students[0], self.section)
+        self.enqueue(self.students[2], self.other_section)
+        # a savepoint around the batch, one read of the queue, five queries and a savepoint per
+        # section, and one UPDATE per outcome
+        with self.assertNumQueries(2 + 1 + 2 * 7 + 3):
+            self.assertEqual(process_registration_requests(), 5)
+        self.assertEqual(list(RegistrationRequest.objects.values_list('status', 'reason')),
+                         [('registered', ''), ('registered', ''), ('rejected', 'section is full'),
+                          ('already registered', ''), ('registered', '')])
+        self.section.refresh_from_db()
+        self.assertEqual(self.section.enrolled_count, 2)
+        self.assertEqual(process_registration_requests(), 0)
+
+    def test_worker_drains_the_queue_in_batches(self):
+        for student in self.students:
+            self.enqueue(student, self.other_section)
+        out = StringIO()
+        call_command('process_registration_queue', '--once', '--batch-size=2', stdout=out)
+        self.assertEqual(out.getvalue().splitlines(),
+                         ['Processed 2 registration requests.', 'Processed 1 registration requests.',
+                          'Processed 3 registration requests in total.'])
+        self.assertFalse(RegistrationRequest.objects.filter(status=RegistrationRequest.PENDING).exists())
+
+    def test_archiving_waits_for_the_queue_and_keeps_finished_requests(self):
+        registration_request = self.enqueue(self.students[0], self.section)
+        semester = self.section.semester
+        with self.assertRaisesMessage(ArchiveError, '1 registration requests'):
+            archive_semester(semester)
+        self.assertFalse(Semester.objects.get(pk=semester.pk).is_archived)
+        process_registration_requests()
+        archive_semester(semester)
+        registration_request.refresh_from_db()
+        self.assertEqual((registration_request.section, registration_request.archived_section_id),
+                         (None, self.section.pk))
+        response = self.client.get(registration_request.get_absolute_url())
+        self.assertContains(response, 'IS439 - AOG')
+        self.assertContains(response, ArchivedRegistration.objects.get().get_absolute_url())
+        unarchive_semester(semester)
+        registration_request.refresh_from_db()
+        self.assertEqual((registration_request.section, registration_request.archived_section), (self.section, None))
+
+    def test_users_only_see_their_own_requests(self):
+        registration_request = self.enqueue(self.students[0], self.section)
+        clerk = User.objects.create_user('clerk', 'clerk@example.com', 'pass')
+        clerk.user_permissions.add(Permission.objects.get(codename='add_registration'))
+        self.client.login(username='clerk', password='pass')
+        self.assertEqual(self.client.get(registration_request.get_absolute_url()).status_code, 404)
+        registration_request.requested_by = clerk
+        registration_request.save()
+        self.assertEqual(self.client.get(registration_request.get_absolute_url()).status_code, 200)
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        cls.semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                               period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        course = Course.objects.create(course_number="IS439",
+                                       course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=cls.semester, course=course,
+                                             instructor=cls.instructor)
+        cls.student = Student.objects.create(first_name="Harvey", last_name="Specter", disambiguator="New York")
+        cls.registration = Registration.objects.create(student=cls.student, section=cls.section)
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def export(self, urlpattern, **kwargs):
+        response = self.client.get(reverse(urlpattern, kwargs=kwargs))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        return response
+
+    def rows(self, response):
+        return list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+    def test_registration_export_is_flattened(self):
+        rows = self.rows(self.export('courseinfo_registration_export_urlpattern'))
+        self.assertEqual(rows, [
+            ['registration_id', 'student_id', 'last_name', 'first_name', 'disambiguator', 'section_id',
+             'course_number', 'course_name', 'section_name', 'year', 'period', 'instructor_id',
+             'instructor_last_name', 'instructor_first_name'],
+            [str(self.registration.pk), str(self.student.pk), 'Specter', 'Harvey', 'New York', str(self.section.pk),
+             'IS439', 'Web Development Using Application Frameworks', 'AOG', '2024', 'Spring',
+             str(self.instructor.pk), 'Gerard', 'Henry'],
+        ])
+
+    def test_header_is_sent_before_the_query_runs(self):
+        response = self.export('courseinfo_student_export_urlpattern')
+        content = iter(response.streaming_content)
+        with self.assertNumQueries(0):
+            self.assertEqual(next(content), b'student_id,last_name,first_name,disambiguator\r\n')
+        with self.assertNumQueries(1):
+            self.assertEqual(next(content), ('%s,Specter,Harvey,New York\r\n' % self.student.pk).encode())
+
+    def test_formulas_are_escaped(self):
+        Instructor.objects.create(first_name="=HYPERLINK(1)", last_name="-Ross")
+        rows = self.rows(self.export('courseinfo_instructor_export_urlpattern'))
+        self.assertEqual(rows[1:], [[str(self.instructor.pk), 'Gerard', 'Henry', 'Harvard'],
+                                    [rows[2][0], "'-Ross", "'=HYPERLINK(1)", '']])
+
+    def test_roster_of_live_and_archived_sections(self):
+        expected = [['student_id', 'last_name', 'first_name', 'disambiguator'],
+                    [str(self.student.pk), 'Specter', 'Harvey', 'New York']]
+        url_kwargs = {'pk': self.section.pk}
+        self.assertEqual(self.rows(self.export('courseinfo_section_roster_export_urlpattern', **url_kwargs)),
+                         expected)
+        archive_semester(self.semester)
+        self.assertEqual(self.rows(self.export('courseinfo_section_roster_export_urlpattern', **url_kwargs)),
+                         expected)
+        response = self.client.get(reverse('courseinfo_section_roster_export_urlpattern', kwargs={'pk': 0}))
+        self.assertEqual(response.status_code, 404)
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        cls.semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                               period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        cls.course = Course.objects.create(course_number="IS439",
+                                           course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=cls.semester, course=cls.course,
+                                             instructor=cls.instructor)
+        cls.students = [Student.objects.create(first_name="Student", last_name=str(i)) for i in range(3)]
+        cls.registrations = [Registration.objects.create(student=student, section=cls.section)
+                             for student in cls.students]
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def api(self, resource, pk=None, **params):
+        if pk is None:
+            url = reverse('courseinfo_api_list_urlpattern', kwargs={'resource': resource})
+        else:
+            url = reverse('courseinfo_api_detail_urlpattern', kwargs={'resource': resource, 'pk': pk})
+        return self.client.get(url, params)
+
+    def test_cursor_pagination_with_sparse_fields(self):
+        first = self.api('student', fields='last_name', limit=2).json()
+        self.assertEqual(first['results'], [{'last_name': '0'}, {'last_name': '1'}])
+        second = self.client.get(first['next']).json()
+        self.assertEqual(second, {'results': [{'last_name': '2'}], 'next': None})
+
+    def test_embeds_cost_one_query_each(self):
+        # session and user, the page, then sections, courses and students
+        with self.assertNumQueries(6):
+            response = self.api('registration', fields='registration_id', embed='section.course,student',
+                                **{'fields[section]': 'section_name', 'fields[section.course]': 'course_number',
+                                   'fields[student]': 'last_name'})
+        self.assertEqual(response.json()['results'][0], {
+            'registration_id': self.registrations[0].pk,
+            'section': {'section_name': 'AOG', 'course': {'course_number': 'IS439'}},
+            'student': {'last_name': '0'},
+        })
+
+    def test_detail_shows_every_field(self):
+        response = self.api('section', self.section.pk, embed='semester.period')
+        self.assertEqual(response.json(), {
+            'section_id': self.section.pk, 'section_name': 'AOG', 'semester_id': self.semester.pk,
+            'course_id': self.course.pk, 'instructor_id': self.instructor.pk, 'capacity': 30, 'enrolled_count': 3,
+            'semester': {'semester_id': self.semester.pk, 'year_id': self.semester.year_id,
+                         'period_id': self.semester.period_id, 'is_archived': False,
+                         'period': {'period_id': self.semester.period_id, 'period_sequence': 1,
+                                    'period_name': 'Spring'}},
+        })
+        self.assertEqual(self.api('section', 0).status_code, 404)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.api('user').status_code, 404)
+        self.assertEqual(self.api('student', fields='password').json(), {'error': 'Unknown student fields: password.'})
+        self.assertEqual(self.api('student', embed='section').status_code, 400)
+        self.assertEqual(self.api('student', cursor='!!').status_code, 400)
+        self.assertEqual(self.api('student', limit='0').status_code, 400)
+
+    def test_embedding_needs_view_permission(self):
+        clerk = User.objects.create_user('clerk', 'clerk@example.com', 'pass')
+        clerk.user_permissions.add(Permission.objects.get(codename='view_registration'))
+        self.client.login(username='clerk', password='pass')
+        self.assertEqual(self.api('registration').status_code, 200)
+        self.assertEqual(self.api('registration', embed='student').status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.api('registration').status_code, 403)
+
+    def test_batch_fetch_in_one_query_per_model(self):
+        url = reverse('courseinfo_api_batch_urlpattern', kwargs={'resource': 'registration'})
+        ids = [self.registrations[2].pk, 0, self.registrations[0].pk]
+        # session and user, the registrations, then their students
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'ids': ','.join(str(pk) for pk in ids), 'fields': 'section_id',
+                                             'embed': 'student', 'fields[student]': 'last_name'})
+        self.assertEqual(response.json(), {
+            'results': [{'section_id': self.section.pk, 'student': {'last_name': '2'}},
+                        {'section_id': self.section.pk, 'student': {'last_name': '0'}}],
+            'missing': [0],
+        })
+        detail = self.api('student', self.students[1].pk).json()
+        batch = self.client.get(reverse('courseinfo_api_batch_urlpattern', kwargs={'resource': 'student'}),
+                                {'ids': self.students[1].pk}).json()
+        self.assertEqual(batch['results'], [detail])
+        self.assertEqual(self.client.get(url, {'ids': ','.join(map(str, range(501)))}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'ids': 'x'}).status_code, 400)
+
+
+STUDENT_CSV = """first_name,last_name,disambiguator
+Mike,Ross,
+ harvey ,SPECTER,New York
+,Pearson,
+Louis,Litt,
+Donna,Paulsen,%s
+mike,ross ,
+Rachel,Zane,
+""" % ('x' * 46)
+
+
+class StudentImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        Student.objects.create(first_name="Harvey", last_name="Specter", disambiguator="New York")
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def test_rows_are_validated_and_deduplicated(self):
+        # per batch of two rows with valid ones: a savepoint, the existing-key lookup and the insert
+        with self.assertNumQueries(3 * 4):
+            report = import_students(StringIO(STUDENT_CSV), batch_size=2)
+        self.assertEqual((report.rows, report.created), (7, 3))
+        self.assertEqual(report.errors, [
+            RowError(3, 'A student with this name and disambiguator already exists.'),
+            RowError(4, 'first_name: This field is required.'),
+            RowError(6, 'disambiguator: Ensure this value has at most 45 characters (it has 46).'),
+            RowError(7, 'Duplicate of line 2.'),
+        ])
+        self.assertEqual(sorted(Student.objects.values_list('last_name', flat=True)),
+                         ['Litt', 'Ross', 'Specter', 'Zane'])
+
+    def test_header_is_checked(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown columns: email.'):
+            import_students(StringIO('first_name,last_name,email\n'))
+        with self.assertRaisesMessage(ValueError, 'first_name and last_name'):
+            import_students(StringIO('name\nMike Ross\n'))
+
+    def test_upload_reports_rejected_lines(self):
+        upload = SimpleUploadedFile('intake.csv', STUDENT_CSV.encode('utf-8-sig'), content_type='text/csv')
+        response = self.client.post(reverse('courseinfo_student_import_urlpattern'), data={'file': upload})
+        self.assertContains(response, '7 rows: 3 created, 4 rejected')
+        self.assertContains(response, 'Duplicate of line 2.')
+        self.assertEqual(Student.objects.count(), 4)
+
+    def test_import_command(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'intake.csv')
+            with open(path, 'w') as csv_file:
+                csv_file.write(STUDENT_CSV)
+            call_command('import_students', path, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[:4], ['Line 3: A student with this name and disambiguator already exists.',
+                                     'Line 4: first_name: This field is required.',
+                                     'Line 6: disambiguator: Ensure this value has at most 45 characters (it has 46).',
+                                     'Line 7: Duplicate of line 2.'])
+        self.assertTrue(lines[4].startswith('7 rows: 3 created, 4 rejected in '))
+
+
+def snapshot_section(section_name, instructor=('Henry', 'Gerard', 'Harvard'), capacity=30,
+                     course=('IS439', 'Web Development Using Application Frameworks')):
+    return {'year': 2024, 'period': 'Spring', 'course_number': course[0], 'course_name': course[1],
+            'section_name': section_name, 'instructor_first_name': instructor[0],
+            'instructor_last_name': instructor[1], 'instructor_disambiguator': instructor[2], 'capacity': capacity}
+
+
+def snapshot_registration(section_name, student):
+    return {'year': 2024, 'period': 'Spring', 'course_number': 'is439 ',
+            'course_name': 'Web Development Using Application Frameworks', 'section_name': section_name,
+            'student_first_name': student.first_name, 'student_last_name': student.last_name,
+            'student_disambiguator': student.disambiguator}
+
+
+class SisSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        cls.other_instructor = Instructor.objects.create(first_name="Mike", last_name="Ross")
+        cls.semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                               period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        cls.other_semester = Semester.objects.create(year=Year.objects.create(year=2025), period=cls.semester.period)
+        cls.course = Course.objects.create(course_number="IS439",
+                                           course_name="Web Development Using Application Frameworks")
+        cls.kept = Section.objects.create(section_name="AOG", semester=cls.semester, course=cls.course,
+                                          instructor=cls.instructor)
+        cls.dropped = Section.objects.create(section_name="AOU", semester=cls.semester, course=cls.course,
+                                             instructor=cls.instructor)
+        cls.untouched = Section.objects.create(section_name="AOG", semester=cls.other_semester, course=cls.course,
+                                               instructor=cls.instructor)
+        cls.students = [Student.objects.create(first_name="Student", last_name=str(i)) for i in range(3)]
+        Registration.objects.create(student=cls.students[0], section=cls.kept)
+        Registration.objects.create(student=cls.students[1], section=cls.kept)
+        Registration.objects.create(student=cls.students[0], section=cls.dropped)
+        Registration.objects.create(student=cls.students[0], section=cls.untouched)
+
+    def snapshot(self):
+        return {
+            'sections': [snapshot_section('AOG', instructor=('Mike', 'Ross', ''), capacity=2),
+                         snapshot_section('AOH')],
+            'registrations': [snapshot_registration('AOG', self.students[1]),
+                              snapshot_registration('AOG', self.students[2]),
+                              snapshot_registration('AOH', self.students[0])],
+        }
+
+    def test_only_the_differences_are_applied(self):
+        result = sync_snapshot(self.snapshot())
+        self.assertEqual(result[:6], (1, 1, 1, 2, 2, []))
+        self.kept.refresh_from_db()
+        self.assertEqual((self.kept.instructor, self.kept.capacity, self.kept.enrolled_count),
+                         (self.other_instructor, 2, 2))
+        self.assertFalse(Section.objects.filter(pk=self.dropped.pk).exists())
+        self.assertEqual(sorted(Registration.objects.filter(section__semester=self.semester)
+                                .values_list('section__section_name', 'student__last_name')),
+                         [('AOG', '1'), ('AOG', '2'), ('AOH', '0')])
+        self.assertEqual(self.untouched.registrations.count(), 1)
+
+        # semesters, courses, instructors, students, stored sections and stored registrations
+        with self.assertNumQueries(6):
+            result = sync_snapshot(self.snapshot())
+        self.assertFalse(result.changed)
+
+    def test_dry_run_writes_nothing(self):
+        with self.assertNumQueries(6):
+            result = sync_snapshot(self.snapshot(), dry_run=True)
+        self.assertTrue(result.changed)
+        self.assertTrue(Section.objects.filter(pk=self.dropped.pk).exists())
+
+    def test_unresolved_rows_are_reported_and_left_alone(self):
+        snapshot = {
+            'sections': [snapshot_section('AOG', instructor=('Nobody', 'Known', '')),
+                         snapshot_section('AOU'),
+                         snapshot_section('XYZ', course=('IS999', 'Unknown'))],
+            'registrations': [snapshot_registration('AOG', self.students[0]),
+                              snapshot_registration('AOG', Student(first_name='New', last_name='Student'))],
+        }
+        result = sync_snapshot(snapshot)
+        self.assertEqual(result.problems, [
+            'Section IS439 AOG: no instructor Known, Nobody.',
+            'Section IS999 XYZ: no course IS999 - Unknown.',
+            'Registration of Student, New in is439 AOG: no such student.',
+        ])
+        self.kept.refresh_from_db()
+        self.assertEqual(self.kept.instructor, self.instructor)
+        self.assertEqual(list(self.kept.registrations.values_list('student__last_name', flat=True)), ['0'])
+
+    def test_over_capacity_snapshot_is_refused(self):
+        snapshot = self.snapshot()
+        snapshot['sections'][0]['capacity'] = 1
+        with self.assertRaisesMessage(SyncError, 'Section AOG has 2 registrations but a capacity of 1.'):
+            sync_snapshot(snapshot)
+        self.assertEqual(Registration.objects.count(), 4)
+
+    def test_sync_command(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'snapshot.json')
+            with open(path, 'w') as snapshot_file:
+                json.dump(self.snapshot(), snapshot_file)
+            call_command('sync_sis', path, '--dry-run', stdout=out)
+        self.assertEqual(out.getvalue().splitlines()[0], 'Dry run, nothing was written.')
+        self.assertTrue(out.getvalue().splitlines()[1].startswith(
+            'Sections: 1 created, 1 updated, 1 deleted. Registrations: 2 created, 2 deleted. 0 rows skipped in '))
+
+
+class RollForwardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        cls.other_instructor = Instructor.objects.create(first_name="Mike", last_name="Ross")
+        period = Period.objects.create(period_sequence=1, period_name="Fall")
+        cls.source = Semester.objects.create(year=Year.objects.create(year=2024), period=period)
+        cls.target = Semester.objects.create(year=Year.objects.create(year=2025), period=period)
+        cls.course = Course.objects.create(course_number="IS439",
+                                           course_name="Web Development Using Application Frameworks")
+        cls.other_course = Course.objects.create(course_number="IS490", course_name="Databases")
+        Section.objects.bulk_create([
+            Section(section_name=name, semester=cls.source, course=course, instructor=cls.instructor, capacity=25)
+            for course in (cls.course, cls.other_course) for name in ('A', 'B', 'C')
+        ])
+        Section.objects.create(section_name="A", semester=cls.target, course=cls.course,
+                               instructor=cls.other_instructor)
+
+    def schedule(self, semester):
+        return sorted(Section.objects.filter(semester=semester)
+                      .values_list('course__course_number', 'section_name', 'instructor__last_name', 'capacity'))
+
+    def test_schedule_is_copied_in_one_insert(self):
+        # the replacement instructors, then a savepoint, the target's and source's sections and one INSERT
+        with self.assertNumQueries(6):
+            result = roll_forward(self.source, self.target, reassign={self.instructor.pk: self.other_instructor.pk},
+                                  course_ids=[self.course.pk])
+        self.assertEqual((result.created, result.skipped), (2, 1))
+        self.assertEqual(self.schedule(self.target), [('IS439', 'A', 'Ross', 30), ('IS439', 'B', 'Ross', 25),
+                                                      ('IS439', 'C', 'Ross', 25)])
+        self.assertEqual(roll_forward(self.source, self.target)[:2], (3, 3))
+
+    def test_archived_semesters(self):
+        archive_semester(self.source)
+        self.assertEqual(roll_forward(self.source, self.target)[:2], (5, 1))
+        with self.assertRaisesMessage(ValueError, 'is archived'):
+            roll_forward(self.target, self.source)
+
+    def test_roll_forward_view(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+        url = reverse('courseinfo_semester_roll_forward_urlpattern', kwargs={'pk': self.source.pk})
+        response = self.client.post(url, data={'target': self.target.pk, 'courses': [self.other_course.pk],
+                                               'reassign': '%d: 0' % self.instructor.pk})
+        self.assertContains(response, 'No instructor with ID 0.')
+        response = self.client.post(url, data={'target': self.target.pk, 'courses': [self.other_course.pk],
+                                               'reassign': '%d: %d' % (self.instructor.pk, self.other_instructor.pk)})
+        self.assertContains(response, '3 sections created, 0 already scheduled.')
+        self.assertEqual(len(self.schedule(self.target)), 4)
+        response = self.client.post(url, data={'target': self.source.pk})
+        self.assertContains(response, 'Select a valid choice.')
+
+
+class ChangeFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        cls.semester = Semester.objects.create(year=Year.objects.create(year=2024),
+                                               period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        cls.course = Course.objects.create(course_number="IS439",
+                                           course_name="Web Development Using Application Frameworks")
+        cls.section = Section.objects.create(section_name="AOG", semester=cls.semester, course=cls.course,
+                                             instructor=cls.instructor)
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+        self.start = ChangeLogEntry.objects.aggregate(seq=Max('change_id'))['seq']
+
+    def changes(self):
+        return list(ChangeLogEntry.objects.filter(change_id__gt=self.start).values_list('model', 'action'))
+
+    def feed(self, **params):
+        response = self.client.get(reverse('courseinfo_change_feed_urlpattern'), params)
+        if response.status_code != 200:
+            return response
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_every_write_path_is_logged(self):
+        students = Student.objects.bulk_create([Student(first_name="Student", last_name=str(i)) for i in range(2)])
+        bulk_register(self.section, [student.pk for student in students])
+        Student.objects.filter(pk=students[0].pk).update(first_name="Renamed")
+        Student.objects.filter(pk=students[0].pk).update(first_name="Renamed")
+        Registration.objects.filter(student=students[1]).delete()
+        # the registrations change enrolled_count, which is derived and not logged on its own
+        self.assertEqual(self.changes(), [
+            ('student', 'create'), ('student', 'create'), ('registration', 'create'), ('registration', 'create'),
+            ('student', 'update'), ('registration', 'delete'),
+        ])
+
+    def test_feed_pages_by_sequence_and_acknowledges(self):
+        Student.objects.create(first_name="Student", last_name="A")
+        self.section.delete()
+        first = self.feed(after=self.start, limit=1, consumer='warehouse')
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first[0]['url'], reverse('courseinfo_api_detail_urlpattern',
+                                                  kwargs={'resource': 'student', 'pk': first[0]['id']}))
+        self.assertEqual(ChangeFeedConsumer.objects.get(name='warehouse').acknowledged_change_id, self.start)
+        second = self.feed(after=first[0]['seq'], consumer='warehouse')
+        self.assertEqual([(line['model'], line['action'], line['url']) for line in second],
+                         [('section', 'delete', None)])
+        self.assertEqual(self.feed(after=second[-1]['seq']), [])
+        self.assertEqual(self.feed(after='x').status_code, 400)
+
+    def test_compaction_keeps_unacknowledged_history(self):
+        for i in range(3):
+            Student.objects.create(first_name="Student", last_name=str(i))
+        latest = self.start + 3
+        self.assertEqual(compact_change_log(), 0)
+        ChangeFeedConsumer.objects.create(name='lms', acknowledged_change_id=latest)
+        ChangeFeedConsumer.objects.create(name='advising', acknowledged_change_id=self.start + 1)
+        ChangeFeedConsumer.objects.filter(name='advising').update(acknowledged_at=timezone.now() - timedelta(days=30))
+        acknowledged = ChangeLogEntry.objects.filter(change_id__lte=self.start + 1).count()
+        self.assertEqual(compact_change_log(), acknowledged)
+        # the idle consumer falls behind; the newest entry is always kept
+        call_command('compact_change_log', '--idle-days=7', stdout=StringIO())
+        self.assertEqual(list(ChangeLogEntry.objects.values_list('change_id', flat=True)), [latest])
+        self.assertEqual(self.feed(after=self.start + 1).status_code, 410)
+        self.assertEqual(self.feed(after=latest - 1)[0]['seq'], latest)
+
+    def test_feed_requires_permission(self):
+        User.objects.create_user('plain', 'plain@example.com', 'pass')
+        self.client.login(username='plain', password='pass')
+        self.assertEqual(self.feed().status_code, 403)
+
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'cache-tests'},
+    'throttle': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TranscriptTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.instructor = Instructor.objects.create(first_name="Henry", last_name="Gerard", disambiguator="Harvard")
+        year = Year.objects.create(year=2024)
+        cls.fall = Semester.objects.create(year=Year.objects.create(year=2023),
+                                           period=Period.objects.create(period_sequence=3, period_name="Fall"))
+        cls.spring = Semester.objects.create(year=year, period=Period.objects.create(period_sequence=1,
+                                                                                     period_name="Spring"))
+        cls.courses = [Course.objects.create(course_number="IS%d" % number, course_name="Course %d" % number)
+                       for number in (439, 417)]
+        cls.sections = [Section.objects.create(section_name=name, semester=semester, course=course,
+                                               instructor=cls.instructor)
+                        for name, semester, course in (('A', cls.spring, cls.courses[0]),
+                                                       ('B', cls.spring, cls.courses[1]),
+                                                       ('C', cls.fall, cls.courses[0]))]
+        cls.student = Student.objects.create(first_name="Student", last_name="One")
+        for section in cls.sections:
+            Registration.objects.create(student=cls.student, section=section)
+
+    def setUp(self):
+        caches['default'].clear()
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def transcript(self):
+        response = self.client.get(reverse('courseinfo_student_transcript_json_urlpattern',
+                                           kwargs={'pk': self.student.pk}))
+        return [(term['year'], term['period'], term['is_archived'],
+                 [section['course_number'] + section['section_name'] for section in term['sections']])
+                for term in response.json()['terms']]
+
+    def test_terms_ordered_by_year_and_period(self):
+        archive_semester(self.fall)
+        self.assertEqual(self.transcript(), [(2023, 'Fall', True, ['IS439C']),
+                                             (2024, 'Spring', False, ['IS417B', 'IS439A'])])
+        response = self.client.get(reverse('courseinfo_student_detail_urlpattern', kwargs={'pk': self.student.pk}))
+        self.assertContains(response, 'IS417 - B (2024 - Spring)')
+        self.assertNotContains(response, 'IS439 - C')
+        response = self.client.get(reverse('courseinfo_student_transcript_urlpattern', kwargs={'pk': self.student.pk}))
+        self.assertContains(response, '2023 - Fall <small>(archived)</small>', html=True)
+
+    def test_cached_per_student_until_registrations_change(self):
+        # session, user and the student with its version, then live and archived registrations
+        with self.assertNumQueries(5):
+            self.transcript()
+        with self.assertNumQueries(3):
+            self.transcript()
+        section = Section.objects.create(section_name='D', semester=self.spring, course=self.courses[1],
+                                         instructor=self.instructor)
+        bulk_register(section, [self.student.pk])
+        with self.assertNumQueries(5):
+            self.assertEqual(self.transcript()[1][3], ['IS417B', 'IS417D', 'IS439A'])
+        Section.objects.filter(pk=section.pk).update(semester=self.fall)
+        self.assertEqual(self.transcript()[0][3], ['IS439C'], 'section edits show once the cached copy expires')
+        moved = Section.objects.create(section_name='E', semester=self.fall, course=self.courses[1],
+                                       instructor=self.instructor)
+        Registration.objects.filter(section=section).update(section=moved)
+        self.assertEqual(self.transcript()[0][3], ['IS417E', 'IS439C'])
+
+    def test_flush_in_any_table_order(self):
+        # a flush may empty the versions first; deleting the registrations then bumps them back
+        with connection.cursor() as cursor:
+            for table in ('courseinfo_transcriptversion', 'courseinfo_registration', 'courseinfo_student'):
+                cursor.execute('DELETE FROM %s' % table)
+        self.assertFalse(TranscriptVersion.objects.exists())
+        connection.check_constraints(table_names=['courseinfo_transcriptversion'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AnalyticsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.instructors = [Instructor.objects.create(first_name="Henry", last_name=name) for name in ("Gerard", "Ross")]
+        year = Year.objects.create(year=2024)
+        cls.fall = Semester.objects.create(year=Year.objects.create(year=2023),
+                                           period=Period.objects.create(period_sequence=3, period_name="Fall"))
+        cls.spring = Semester.objects.create(year=year, period=Period.objects.create(period_sequence=1,
+                                                                                     period_name="Spring"))
+        cls.courses = [Course.objects.create(course_number="IS%d" % number, course_name="Course %d" % number)
+                       for number in (417, 439)]
+        cls.students = Student.objects.bulk_create([Student(first_name="Student", last_name=str(i)) for i in range(4)])
+        cls.sections = {}
+        for name, semester, course, instructor, capacity, registered in (
+                ('A', cls.spring, 0, 0, 10, 4), ('B', cls.spring, 0, 1, 10, 1), ('C', cls.spring, 1, 1, 5, 0),
+                ('D', cls.fall, 1, 0, 20, 3)):
+            section = Section.objects.create(section_name=name, semester=semester, course=cls.courses[course],
+                                             instructor=cls.instructors[instructor], capacity=capacity)
+            bulk_register(section, [student.pk for student in cls.students[:registered]])
+            cls.sections[name] = section
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_totals_by_semester_course_and_instructor(self):
+        archive_semester(self.fall)
+        self.fall.refresh_from_db()
+        self.assertEqual([(row['year'], row['section_count'], row['capacity'], row['registrations'], row['fill'])
+                          for row in overview()], [(2023, 1, 20, 3, 15), (2024, 3, 25, 5, 20)])
+        report = semester_report(self.spring)
+        self.assertEqual([(row['course__course_number'], row['section_count'], row['registrations'])
+                          for row in report['course']], [('IS417', 2, 5), ('IS439', 1, 0)])
+        self.assertEqual([(row['instructor__last_name'], row['capacity'], row['registrations'])
+                          for row in report['instructor']], [('Gerard', 10, 4), ('Ross', 15, 1)])
+        self.assertEqual(semester_report(self.fall)['instructor'][0]['registrations'], 3)
+
+    def test_one_query_per_aggregate_cached_until_registrations_change(self):
+        # the newest change log ID, then one GROUP BY per breakdown
+        with self.assertNumQueries(3):
+            semester_report(self.spring)
+        with self.assertNumQueries(1):
+            semester_report(self.spring)
+        Registration.objects.create(student=self.students[3], section=self.sections['C'])
+        with self.assertNumQueries(3):
+            self.assertEqual(semester_report(self.spring)['course'][1]['registrations'], 1)
+        with self.assertNumQueries(2):
+            self.assertEqual(overview()[1]['registrations'], 6)
+
+    def test_writes_to_one_semester_leave_the_others_cached(self):
+        semester_report(self.fall)
+        overview()
+        Registration.objects.create(student=self.students[3], section=self.sections['C'])
+        with self.assertNumQueries(1):
+            semester_report(self.fall)
+        with self.assertNumQueries(2):
+            overview()
+        Student.objects.filter(pk=self.students[0].pk).update(last_name='Renamed')
+        Course.objects.filter(pk=self.courses[0].pk).update(course_name='Renamed')
+        with self.assertNumQueries(1):
+            overview()
+        archive_semester(self.fall)
+        self.fall.refresh_from_db()
+        # the version, then two queries per breakdown of an archived semester
+        with self.assertNumQueries(5):
+            self.assertEqual(semester_report(self.fall)['course'][0]['registrations'], 3)
+
+    def test_dashboard_views(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+        response = self.client.get(reverse('courseinfo_analytics_urlpattern'))
+        self.assertContains(response, '2024 - Spring')
+        self.assertContains(response, '<td>20%</td>', html=True)
+        response = self.client.get(reverse('courseinfo_semester_analytics_urlpattern', kwargs={'pk': self.spring.pk}))
+        self.assertContains(response, 'Ross, Henry')
+        self.client.logout()
+        User.objects.create_user('plain', 'plain@example.com', 'pass')
+        self.client.login(username='plain', password='pass')
+        self.assertEqual(self.client.get(reverse('courseinfo_analytics_urlpattern')).status_code, 403)
+
+
+class TeachingLoadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        clear_migration_data()
+        cls.instructors = [Instructor.objects.create(first_name="Henry", last_name=name)
+                           for name in ("Gerard", "Ross", "Zane")]
+        cls.fall = Semester.objects.create(year=Year.objects.create(year=2023),
+                                           period=Period.objects.create(period_sequence=3, period_name="Fall"))
+        cls.spring = Semester.objects.create(year=Year.objects.create(year=2024),
+                                             period=Period.objects.create(period_sequence=1, period_name="Spring"))
+        courses = [Course.objects.create(course_number="IS%d" % number, course_name="Course %d" % number)
+                   for number in (417, 439)]
+        students = Student.objects.bulk_create([Student(first_name="Student", last_name=str(i)) for i in range(4)])
+        for name, semester, course, instructor, registered in (
+                ('A', cls.spring, 0, 0, 1), ('B', cls.spring, 1, 0, 1), ('C', cls.spring, 0, 1, 4),
+                ('D', cls.fall, 0, 2, 2), ('E', cls.fall, 0, 2, 3)):
+            section = Section.objects.create(section_name=name, semester=semester, course=courses[course],
+                                             instructor=cls.instructors[instructor])
+            bulk_register(section, [student.pk for student in students[:registered]])
+
+    def setUp(self):
+        User.objects.create_superuser('test', 'test@example.com', 'pass')
+        self.client.login(username='test', password='pass')
+
+    def load(self, semester, sort='students'):
+        return [(instructor.last_name, instructor.section_count, instructor.student_count, instructor.course_count)
+                for instructor in teaching_load(semester, sort)]
+
+    def test_load_per_instructor_and_term(self):
+        self.assertEqual(self.load(self.spring), [('Ross', 1, 4, 1), ('Gerard', 2, 2, 2), ('Zane', 0, 0, 0)])
+        self.assertEqual(self.load(self.spring, 'sections')[0][0], 'Gerard')
+        archive_semester(self.fall)
+        self.fall.refresh_from_db()
+        self.assertEqual(self.load(self.fall, 'name'), [('Gerard', 0, 0, 0), ('Ross', 0, 0, 0), ('Zane', 2, 5, 1)])
+
+    def test_report_takes_fixed_queries_and_exports_csv(self):
+        url = reverse('courseinfo_teaching_load_urlpattern')
+        # session, user, the semesters, then the count and the page
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        self.assertEqual(response.context['semester'], self.spring)
+        Instructor.objects.bulk_create([Instructor(first_name="Extra", last_name=str(i)) for i in range(40)])
+        with self.assertNumQueries(5):
+            response = self.client.get(url, {'semester': self.fall.pk, 'sort': 'students', 'page': 2})
+        self.assertEqual(len(response.context['instructor_list']), 43 - 25)
+        self.assertEqual(self.client.get(url, {'semester': 0}).status_code, 404)
+
+        response = self.client.get(reverse('courseinfo_teaching_load_export_urlpattern'),
+                                   {'semester': self.spring.pk, 'sort': 'sections'})
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0], ['instructor_id', 'last_name', 'first_name', 'disambiguator',
+                                   'sections', 'students', 'courses'])
+        self.assertEqual(rows[1][1:], ['Gerard', 'Henry', '', '2', '2', '2'])
+        self.assertEqual(len(rows), 44)
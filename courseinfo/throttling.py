@@ -0,0 +1,125 @@
+import math
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+
+PERIODS = {'sec': 1, 'min': 60, 'hour': 60 * 60, 'day': 24 * 60 * 60}
+
+# How long the rate worked out for a session's user is cached, so requests after the first need
+# no session, user or group queries to be throttled. Adding a user to a group or removing them
+# drops their cached rates (see forget_user_rates); other changes, such as to the GROUPS setting
+# or deleting a group, take up to this long to apply.
+USER_RATE_TIMEOUT = 5 * 60
+
+
+class Rate(namedtuple('Rate', ['tokens', 'seconds'])):
+    """A bucket of ``tokens`` requests, refilled evenly over ``seconds``; written as "30/min"."""
+
+    @classmethod
+    def parse(cls, text):
+        tokens, _, period = text.partition('/')
+        return cls(int(tokens), PERIODS[period])
+
+    @property
+    def per_second(self):
+        return self.tokens / self.seconds
+
+
+def take_token(cache, key, rate, now=None):
+    """
+    Take a token from the bucket stored under ``key`` and return 0, or, when the bucket is empty,
+    the number of seconds until it holds a token again.
+
+    The bucket is read and written back without a lock, so concurrent requests can each take
+    the same token; with the cache shared by all workers that lets a burst overshoot by at most
+    a request per worker, which admission control can live with.
+    """
+    now = time.time() if now is None else now
+    tokens, updated = cache.get(key, (rate.tokens, now))
+    tokens = min(rate.tokens, tokens + (now - updated) * rate.per_second)
+    if tokens < 1:
+        return (1 - tokens) / rate.per_second
+    # an untouched bucket is full again after rate.seconds, so it can expire then
+    cache.set(key, (tokens - 1, now), timeout=rate.seconds)
+    return 0
+
+
+def user_rate(request, cache, limits):
+    """
+    Return ``(user_id, rate)`` with the Rate of the requesting user's most generous group, where
+    ``rate`` is None when the user is not limited.
+    """
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    cache_key = 'rate:session:%s' % session_key
+    cached = cache.get(cache_key) if session_key else None
+    if cached is not None:
+        return cached
+    user = request.user
+    if not user.is_authenticated:
+        # login is required first, which is limited per IP only
+        return None, None
+    rate = None
+    if not user.is_superuser:
+        names = set(user.groups.values_list('name', flat=True))
+        rates = [Rate.parse(text) for name, text in limits['GROUPS'].items() if name in names]
+        rate = max(rates or [Rate.parse(limits['DEFAULT'])], key=lambda rate: rate.per_second)
+    if session_key:
+        cache.set(cache_key, (user.pk, rate), timeout=USER_RATE_TIMEOUT)
+        # the user's sessions with a cached rate, for forget_user_rates()
+        now = time.time()
+        sessions_key = 'rate:sessions:%s' % user.pk
+        sessions = {key: cached_at for key, cached_at in cache.get(sessions_key, {}).items()
+                    if now - cached_at < USER_RATE_TIMEOUT}
+        sessions[cache_key] = now
+        cache.set(sessions_key, sessions, timeout=USER_RATE_TIMEOUT)
+    return user.pk, rate
+
+
+def forget_user_rates(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    m2m_changed handler for User.groups: drop the cached rates of the users whose groups changed,
+    once the change is committed, so a user removed from a generous group loses its rate at once.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == 'pre_clear':
+        user_ids = list(instance.user_set.values_list('pk', flat=True))
+    else:
+        user_ids = list(pk_set)
+
+    def forget():
+        cache = caches[settings.REGISTRATION_RATE_LIMITS['CACHE']]
+        sessions = cache.get_many(['rate:sessions:%s' % user_id for user_id in user_ids])
+        cache.delete_many([key for keys in sessions.values() for key in keys] + list(sessions))
+
+    transaction.on_commit(forget, using=using)
+
+
+def check_rate_limits(request, limits=None):
+    """
+    Take a token from the client IP's bucket and then from the user's, and return 0 or the
+    seconds to wait. The IP check needs nothing but the cache, so a flood from one address is
+    refused before any database work.
+    """
+    limits = settings.REGISTRATION_RATE_LIMITS if limits is None else limits
+    cache = caches[limits['CACHE']]
+    address = request.META.get('REMOTE_ADDR', '')
+    retry_after = take_token(cache, 'rate:ip:%s' % address, Rate.parse(limits['IP']))
+    if retry_after:
+        return retry_after
+    user_id, rate = user_rate(request, cache, limits)
+    if rate is None:
+        return 0
+    return take_token(cache, 'rate:user:%s' % user_id, rate)
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse('Too many requests; try again in a moment.', status=429, content_type='text/plain')
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
@@ -0,0 +1,137 @@
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ArchivedRegistration, Registration, TranscriptVersion
+from .triggers import install_triggers
+
+
+def _bump(student):
+    # a no-op for a student that is gone, as when a flush empties the tables in any order
+    return (
+        'INSERT INTO courseinfo_transcriptversion (student_id, version) '
+        'SELECT student_id, 1 FROM courseinfo_student WHERE student_id = %s '
+        'ON CONFLICT (student_id) DO UPDATE SET version = version + 1;' % student
+    )
+
+
+def _registration_triggers(kind, table):
+    return {
+        'courseinfo_transcript_%s_ai' % kind: (
+            'CREATE TRIGGER courseinfo_transcript_%s_ai AFTER INSERT ON %s BEGIN %s END'
+            % (kind, table, _bump('NEW.student_id'))
+        ),
+        'courseinfo_transcript_%s_au' % kind: (
+            'CREATE TRIGGER courseinfo_transcript_%s_au AFTER UPDATE OF student_id, section_id ON %s BEGIN %s %s END'
+            % (kind, table, _bump('OLD.student_id'), _bump('NEW.student_id'))
+        ),
+        'courseinfo_transcript_%s_ad' % kind: (
+            'CREATE TRIGGER courseinfo_transcript_%s_ad AFTER DELETE ON %s BEGIN %s END'
+            % (kind, table, _bump('OLD.student_id'))
+        ),
+    }
+
+
+# TranscriptVersion is maintained by the database itself, so every write path to a student's
+# registrations (views, bulk registration, archiving, the SIS sync, raw SQL) invalidates the
+# student's cached transcript.
+TRIGGERS = {
+    **_registration_triggers('registration', 'courseinfo_registration'),
+    **_registration_triggers('archivedregistration', 'courseinfo_archivedregistration'),
+    # A registration deleted before its version row may bump it back, so however a flush or
+    # raw DELETE orders the tables, the student's own delete takes the version row with it.
+    'courseinfo_transcript_student_ad': (
+        'CREATE TRIGGER courseinfo_transcript_student_ad AFTER DELETE ON courseinfo_student '
+        'BEGIN DELETE FROM courseinfo_transcriptversion WHERE student_id = OLD.student_id; END'
+    ),
+}
+
+# (transcript key, lookup) pairs read from Registration and ArchivedRegistration alike, whose
+# relations have the same names.
+TERM_COLUMNS = [
+    ('semester_id', 'section__semester_id'),
+    ('year', 'section__semester__year__year'),
+    ('period', 'section__semester__period__period_name'),
+    ('period_sequence', 'section__semester__period__period_sequence'),
+    ('is_archived', 'section__semester__is_archived'),
+]
+
+SECTION_COLUMNS = [
+    ('registration_id', 'registration_id'),
+    ('section_id', 'section_id'),
+    ('section_name', 'section__section_name'),
+    ('course_number', 'section__course__course_number'),
+    ('course_name', 'section__course__course_name'),
+    ('instructor_id', 'section__instructor_id'),
+    ('instructor_first_name', 'section__instructor__first_name'),
+    ('instructor_last_name', 'section__instructor__last_name'),
+]
+
+
+def with_transcript_version(queryset):
+    """Annotate the students in ``queryset`` with the ``transcript_version`` their cache key uses."""
+    versions = TranscriptVersion.objects.filter(student=OuterRef('pk')).values('version')
+    return queryset.annotate(transcript_version=Coalesce(Subquery(versions), 0))
+
+
+def build_transcript(student_id, using=DEFAULT_DB_ALIAS):
+    """
+    The terms a student has registered in, ordered by year and period, each with its sections
+    ordered by course number and section name. Two queries: one for live registrations, one
+    for archived ones, each reading plain values through the joins.
+    """
+    columns = TERM_COLUMNS + SECTION_COLUMNS
+    rows = []
+    for model in (Registration, ArchivedRegistration):
+        rows += [dict(zip([key for key, _ in columns], values)) for values in
+                 model.objects.using(using).filter(student=student_id).order_by()
+                 .values_list(*[lookup for _, lookup in columns])]
+    rows.sort(key=lambda row: (row['year'], row['period_sequence'], row['course_number'], row['section_name']))
+    terms = []
+    for _, term_rows in groupby(rows, key=lambda row: row['semester_id']):
+        term_rows = list(term_rows)
+        term = {key: term_rows[0][key] for key, _ in TERM_COLUMNS if key != 'period_sequence'}
+        term['sections'] = [{key: row[key] for key, _ in SECTION_COLUMNS} for row in term_rows]
+        terms.append(term)
+    return terms
+
+
+def get_transcript(student, using=DEFAULT_DB_ALIAS):
+    """
+    The transcript of ``student``, a Student annotated by with_transcript_version(), from the
+    cache in TRANSCRIPTS when it has one for the student's current version. Registrations
+    written since bump the version, so a new transcript is built; edits to the sections,
+    courses and instructors show once the cached copy expires.
+    """
+    cache = caches[settings.TRANSCRIPTS['CACHE']]
+    key = 'transcript:%d:%d' % (student.pk, student.transcript_version)
+    terms = cache.get(key)
+    if terms is None:
+        terms = build_transcript(student.pk, using)
+        cache.set(key, terms, timeout=settings.TRANSCRIPTS['TIMEOUT'])
+    return terms
+
+
+def install_transcript_versions(sender, using=DEFAULT_DB_ALIAS, apps=None, **kwargs):
+    """
+    post_migrate handler: create the version triggers. If any were missing, registrations may
+    have changed without a bump, so every student's version is bumped.
+    """
+    if apps is not None:
+        try:
+            apps.get_model('courseinfo', 'TranscriptVersion')
+        except LookupError:
+            # migrated back to before transcripts were cached
+            return
+    connection = connections[using]
+    if install_triggers(connection, TRIGGERS):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO courseinfo_transcriptversion (student_id, version) '
+                'SELECT student_id, 1 FROM courseinfo_student WHERE true '
+                'ON CONFLICT (student_id) DO UPDATE SET version = version + 1'
+            )
@@ -0,0 +1,44 @@
+from django.db import connections
+
+
+def existing_triggers(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        return {row[0] for row in cursor.fetchall()}
+
+
+def install_triggers(connection, triggers):
+    """
+    (Re)create every trigger in ``triggers`` (a name -> CREATE TRIGGER statement mapping)
+    and return the names that were missing beforehand.
+
+    SQLite drops a table's triggers whenever a migration rebuilds that table, so this runs
+    after every migrate and callers use the returned names to decide whether the data the
+    triggers maintain has to be recomputed.
+    """
+    if connection.vendor != 'sqlite':
+        return set()
+    missing = set(triggers) - existing_triggers(connection)
+    with connection.cursor() as cursor:
+        for name, sql in triggers.items():
+            cursor.execute('DROP TRIGGER IF EXISTS %s' % name)
+            cursor.execute(sql)
+    return missing
+
+
+def drop_triggers(sender, using, plan=None, **kwargs):
+    """
+    pre_migrate handler: drop every courseinfo trigger before migrations run.
+
+    The triggers refer to other tables, and SQLite refuses to rename a rebuilt table while a
+    trigger elsewhere refers to it, or to drop a column a trigger still uses. The post_migrate
+    handlers reinstall them, and because they were missing, also recompute everything they
+    maintain, including rows that data migrations wrote while the triggers were gone.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or not plan:
+        return
+    with connection.cursor() as cursor:
+        for name in existing_triggers(connection):
+            if name.startswith('courseinfo_'):
+                cursor.execute('DROP TRIGGER IF EXISTS %s' % name)
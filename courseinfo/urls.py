@@ -7,17 +7,27 @@ from courseinfo.views import (
     StudentList,
     RegistrationList,
     InstructorDetail,
+    TeachingLoad,
+    TeachingLoadExport,
     SectionDetail,
     SemesterDetail,
     CourseDetail,
     RegistrationDetail,
     StudentDetail,
+    StudentTranscript,
+    StudentTranscriptData,
     InstructorCreate,
     SectionCreate,
     CourseCreate,
     SemesterCreate,
+    SemesterRollForward,
+    SemesterAnalytics,
+    EnrollmentAnalytics,
     StudentCreate,
+    StudentImport,
     RegistrationCreate,
+    RegistrationBulkCreate,
+    RegistrationRequestDetail,
     InstructorUpdate,
     SectionUpdate,
     CourseUpdate,
@@ -30,6 +40,17 @@ from courseinfo.views import (
     SemesterDelete,
     StudentDelete,
     RegistrationDelete,
+    WaitlistEntryCreate,
+    WaitlistEntryDelete,
+    SearchView,
+    ConcurrencyMetrics,
+    InstructorExport,
+    StudentExport,
+    RegistrationExport,
+    SectionRosterExport,
+    ApiView,
+    ApiBatch,
+    ChangeFeed,
 )
 
 urlpatterns = [
@@ -38,6 +59,18 @@ urlpatterns = [
          InstructorList.as_view(),
          name='courseinfo_instructor_list_urlpattern'),
 
+    path('instructor/export.csv',
+         InstructorExport.as_view(),
+         name='courseinfo_instructor_export_urlpattern'),
+
+    path('instructor/teaching-load/',
+         TeachingLoad.as_view(),
+         name='courseinfo_teaching_load_urlpattern'),
+
+    path('instructor/teaching-load.csv',
+         TeachingLoadExport.as_view(),
+         name='courseinfo_teaching_load_export_urlpattern'),
+
     path('instructor/<int:pk>/',
          InstructorDetail.as_view(),
          name='courseinfo_instructor_detail_urlpattern'),
@@ -62,6 +95,10 @@ urlpatterns = [
          SectionDetail.as_view(),
          name='courseinfo_section_detail_urlpattern'),
 
+    path('section/<int:pk>/roster.csv',
+         SectionRosterExport.as_view(),
+         name='courseinfo_section_roster_export_urlpattern'),
+
     path('section/create/',
          SectionCreate.as_view(),
          name='courseinfo_section_create_urlpattern'),
@@ -114,18 +151,42 @@ urlpatterns = [
          SemesterDelete.as_view(),
          name='courseinfo_semester_delete_urlpattern'),
 
+    path('semester/<int:pk>/analytics/',
+         SemesterAnalytics.as_view(),
+         name='courseinfo_semester_analytics_urlpattern'),
+
+    path('semester/<int:pk>/roll-forward/',
+         SemesterRollForward.as_view(),
+         name='courseinfo_semester_roll_forward_urlpattern'),
+
     path('student/',
          StudentList.as_view(),
          name='courseinfo_student_list_urlpattern'),
 
+    path('student/export.csv',
+         StudentExport.as_view(),
+         name='courseinfo_student_export_urlpattern'),
+
     path('student/<int:pk>/',
          StudentDetail.as_view(),
          name='courseinfo_student_detail_urlpattern'),
 
+    path('student/<int:pk>/transcript/',
+         StudentTranscript.as_view(),
+         name='courseinfo_student_transcript_urlpattern'),
+
+    path('student/<int:pk>/transcript.json',
+         StudentTranscriptData.as_view(),
+         name='courseinfo_student_transcript_json_urlpattern'),
+
     path('student/create/',
          StudentCreate.as_view(),
          name='courseinfo_student_create_urlpattern'),
 
+    path('student/import/',
+         StudentImport.as_view(),
+         name='courseinfo_student_import_urlpattern'),
+
     path('student/<int:pk>/update/',
          StudentUpdate.as_view(),
          name='courseinfo_student_update_urlpattern'),
@@ -138,6 +199,10 @@ urlpatterns = [
          RegistrationList.as_view(),
          name='courseinfo_registration_list_urlpattern'),
 
+    path('registration/export.csv',
+         RegistrationExport.as_view(),
+         name='courseinfo_registration_export_urlpattern'),
+
     path('registration/<int:pk>/',
          RegistrationDetail.as_view(),
          name='courseinfo_registration_detail_urlpattern'),
@@ -146,6 +211,14 @@ urlpatterns = [
          RegistrationCreate.as_view(),
          name='courseinfo_registration_create_urlpattern'),
 
+    path('registration/bulk/',
+         RegistrationBulkCreate.as_view(),
+         name='courseinfo_registration_bulk_urlpattern'),
+
+    path('registration/request/<int:pk>/',
+         RegistrationRequestDetail.as_view(),
+         name='courseinfo_registrationrequest_detail_urlpattern'),
+
     path('registration/<int:pk>/update/',
          RegistrationUpdate.as_view(),
          name='courseinfo_registration_update_urlpattern'),
@@ -153,4 +226,40 @@ urlpatterns = [
     path('registration/<int:pk>/delete/',
          RegistrationDelete.as_view(),
          name='courseinfo_registration_delete_urlpattern'),
+
+    path('waitlist/create/',
+         WaitlistEntryCreate.as_view(),
+         name='courseinfo_waitlistentry_create_urlpattern'),
+
+    path('waitlist/<int:pk>/delete/',
+         WaitlistEntryDelete.as_view(),
+         name='courseinfo_waitlistentry_delete_urlpattern'),
+
+    path('analytics/',
+         EnrollmentAnalytics.as_view(),
+         name='courseinfo_analytics_urlpattern'),
+
+    path('search/',
+         SearchView.as_view(),
+         name='courseinfo_search_urlpattern'),
+
+    path('metrics/concurrency/',
+         ConcurrencyMetrics.as_view(),
+         name='courseinfo_concurrency_metrics_urlpattern'),
+
+    path('api/<str:resource>/',
+         ApiView.as_view(),
+         name='courseinfo_api_list_urlpattern'),
+
+    path('api/<str:resource>/batch/',
+         ApiBatch.as_view(),
+         name='courseinfo_api_batch_urlpattern'),
+
+    path('api/<str:resource>/<int:pk>/',
+         ApiView.as_view(),
+         name='courseinfo_api_detail_urlpattern'),
+
+    path('changes/',
+         ChangeFeed.as_view(),
+         name='courseinfo_change_feed_urlpattern'),
 ]
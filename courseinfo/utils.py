@@ -1,11 +1,26 @@
+from django import forms
+from django.db import IntegrityError, transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from . import idempotency
+from .throttling import check_rate_limits, too_many_requests
+from .enrollment import SectionFull, promote_waitlist, reserve_seat
+
 
 class PageLinksMixin:
     page_kwarg = 'page'
 
     def _page_urls(self, page_number):
-        return "?{pkw}={n}".format(
-            pkw=self.page_kwarg,
-            n=page_number)
+        # keep any other query parameters (e.g. a search string) on the page links
+        query = self.request.GET.copy()
+        query.pop(self.page_kwarg, None)
+        if not query:
+            return "?{pkw}={n}".format(
+                pkw=self.page_kwarg,
+                n=page_number)
+        query[self.page_kwarg] = page_number
+        return "?{}".format(query.urlencode())
 
     def first_page(self, page):
         # don't show on first page
@@ -50,3 +65,88 @@ class PageLinksMixin:
                     self.last_page(page),
             })
         return context
+
+
+class ArchiveFallbackMixin:
+    # Detail views of models that can be archived (see courseinfo.archive) fall back to
+    # the archive table, so links to archived rows keep working.
+    archive_model = None
+
+    def get_object(self, queryset=None):
+        try:
+            return super().get_object(queryset)
+        except Http404:
+            return get_object_or_404(self.archive_model, pk=self.kwargs[self.pk_url_kwarg])
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['archived'] = isinstance(self.object, self.archive_model)
+        return context
+
+
+class SeatReservationMixin:
+    # Registration create/update views reserve a seat in the chosen section in the same
+    # transaction that saves the registration (see courseinfo.enrollment.reserve_seat).
+
+    def form_valid(self, form):
+        if self.object is not None and 'section' not in form.changed_data:
+            return super().form_valid(form)
+        moved_from = None if self.object is None else form.initial['section']
+        try:
+            with transaction.atomic():
+                reserve_seat(form.cleaned_data['section'])
+                response = super().form_valid(form)
+                if moved_from is not None:
+                    # a moved registration frees a seat in its old section
+                    promote_waitlist([moved_from])
+                return response
+        except SectionFull as error:
+            form.add_error('section', str(error))
+            return self.form_invalid(form)
+
+
+class IdempotentCreateMixin:
+    # Create views embed a fresh idempotency key in their form. A completed POST records its
+    # redirect under that key in the same transaction as the insert, and a repeated POST with
+    # the key (a refresh or double click) gets the recorded redirect back without validating
+    # or inserting anything again.
+
+    def get_form(self, form_class=None):
+        form = super().get_form(form_class)
+        form.fields[idempotency.FIELD_NAME] = forms.CharField(widget=forms.HiddenInput, required=False,
+                                                              initial=idempotency.new_key)
+        return form
+
+    def post(self, request, *args, **kwargs):
+        key = request.POST.get(idempotency.FIELD_NAME, '')[:64]
+        if not key:
+            return super().post(request, *args, **kwargs)
+        response = idempotency.replay(request.user, key)
+        if response is not None:
+            return response
+        try:
+            with transaction.atomic():
+                response = super().post(request, *args, **kwargs)
+                if response.status_code in (301, 302, 303):
+                    idempotency.record(request.user, key, response)
+                return response
+        except IntegrityError:
+            # a concurrent submission with the same key committed first: either its insert or its
+            # key made this one fail, and everything this one wrote has been rolled back
+            response = idempotency.replay(request.user, key)
+            if response is None:
+                raise
+            return response
+
+
+class RateLimitMixin:
+    # Token-bucket admission control for write requests (see courseinfo.throttling). List it
+    # before LoginRequiredMixin so over-limit requests are refused before any database work.
+    rate_limited_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.rate_limited_methods:
+            retry_after = check_rate_limits(request)
+            if retry_after:
+                return too_many_requests(retry_after)
+        return super().dispatch(request, *args, **kwargs)
@@ -1,18 +1,65 @@
-from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+import codecs
+from collections import Counter
+from itertools import chain
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404
 from django.urls import reverse_lazy
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
-
-from .forms import InstructorForm, SectionForm, CourseForm, SemesterForm, StudentForm, RegistrationForm
+from django.utils.text import slugify
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView, TemplateView, View
+
+from .analytics import LOAD_ORDERINGS, overview, semester_report, teaching_load
+from .api import ApiError, BatchQuery, Query
+from .changelog import FeedQuery
+from .enrollment import bulk_register, drop_registrations, promote_waitlist
+from .loaders import import_students
+from .schedule import roll_forward
+from .exports import (
+    INSTRUCTOR_COLUMNS,
+    REGISTRATION_COLUMNS,
+    ROSTER_COLUMNS,
+    STUDENT_COLUMNS,
+    TEACHING_LOAD_COLUMNS,
+    stream_csv
+)
+from .middleware import limiter
+from .forms import (
+    CAPACITY_BELOW_ENROLLMENT,
+    BulkRegistrationForm,
+    InstructorForm,
+    SectionForm,
+    CourseForm,
+    SemesterForm,
+    StudentForm,
+    StudentImportForm,
+    RegistrationForm,
+    RollForwardForm,
+    WaitlistEntryForm
+)
 from .models import (
+    ArchivedRegistration,
+    ArchivedSection,
     Instructor,
     Section,
     Course,
     Semester,
     Student,
-    Registration
+    Registration,
+    RegistrationRequest,
+    WaitlistEntry
+)
+from .search import KINDS, SearchResults
+from .transcript import get_transcript, with_transcript_version
+from .utils import (
+    ArchiveFallbackMixin,
+    IdempotentCreateMixin,
+    PageLinksMixin,
+    RateLimitMixin,
+    SeatReservationMixin
 )
-from .utils import PageLinksMixin
 
 
 class InstructorList(LoginRequiredMixin, PermissionRequiredMixin, PageLinksMixin, ListView):
@@ -27,13 +74,54 @@ class InstructorDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
 
     def get_context_data(self, **kwargs):
         context = super(DetailView, self).get_context_data(**kwargs)
-        instructor = self.get_object()
-        section_list = instructor.sections.all()
+        # each label shows the course and semester, so they are read in the same query
+        section_list = self.object.sections.select_related('course', 'semester__year', 'semester__period')
         context['section_list'] = section_list
         return context
 
 
-class InstructorCreate(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
+class TeachingLoad(LoginRequiredMixin, PermissionRequiredMixin, PageLinksMixin, ListView):
+    # sections, students and courses per instructor in one term; see courseinfo.analytics.teaching_load
+    paginate_by = 25
+    template_name = 'courseinfo/teaching_load.html'
+    context_object_name = 'instructor_list'
+    permission_required = ('courseinfo.view_instructor', 'courseinfo.view_section')
+
+    def get_queryset(self):
+        # the semesters for the picker double as the lookup of the one asked for (the latest by default)
+        self.semester_list = list(Semester.objects.select_related('year', 'period'))
+        self.sort = self.request.GET.get('sort')
+        if self.sort not in LOAD_ORDERINGS:
+            self.sort = 'students'
+        semester_id = self.request.GET.get('semester')
+        if semester_id:
+            matches = [semester for semester in self.semester_list if str(semester.pk) == semester_id]
+            if not matches:
+                raise Http404('No semester found matching the query')
+            self.semester = matches[0]
+        else:
+            self.semester = self.semester_list[-1] if self.semester_list else None
+        if self.semester is None:
+            return Instructor.objects.none()
+        return teaching_load(self.semester, self.sort)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(semester=self.semester, semester_list=self.semester_list, sort=self.sort,
+                       sort_list=list(LOAD_ORDERINGS))
+        return context
+
+
+class TeachingLoadExport(TeachingLoad):
+    # the whole report as CSV, in the same order
+
+    def get(self, request, *args, **kwargs):
+        instructors = self.get_queryset()
+        filename = 'teaching-load-%s.csv' % (slugify(self.semester) if self.semester else 'none')
+        return stream_csv(filename, TEACHING_LOAD_COLUMNS, instructors, LOAD_ORDERINGS[self.sort])
+
+
+class InstructorCreate(LoginRequiredMixin, PermissionRequiredMixin, IdempotentCreateMixin, CreateView):
     form_class = InstructorForm
     model = Instructor
     permission_required = 'courseinfo.add_instructor'
@@ -53,8 +141,9 @@ class InstructorDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
 
     def get(self, request, pk):
         instructor = get_object_or_404(Instructor, pk=pk)
-        sections = instructor.sections.all()
-        if sections.count() > 0:
+        # archived sections protect the instructor as much as live ones
+        sections = list(chain(instructor.sections.all(), instructor.archived_sections.all()))
+        if sections:
             return render(
                 request,
                 'courseinfo/instructor_refuse_delete.html',
@@ -75,12 +164,15 @@ class SectionList(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     permission_required = 'courseinfo.view_section'
 
 
-class SectionDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+class SectionDetail(LoginRequiredMixin, PermissionRequiredMixin, ArchiveFallbackMixin, DetailView):
     model = Section
+    archive_model = ArchivedSection
+    context_object_name = 'section'
+    template_name = 'courseinfo/section_detail.html'
     permission_required = 'courseinfo.view_section'
 
     def get_context_data(self, **kwargs):
-        context = super(DetailView, self).get_context_data(**kwargs)
+        context = super().get_context_data(**kwargs)
         section = self.get_object()
         semester = section.semester
         course = section.course
@@ -90,10 +182,12 @@ class SectionDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
         context['course'] = course
         context['instructor'] = instructor
         context['registration_list'] = registration_list
+        if not context['archived']:
+            context['waitlist'] = section.waitlist_entries.select_related('student')
         return context
 
 
-class SectionCreate(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
+class SectionCreate(LoginRequiredMixin, PermissionRequiredMixin, IdempotentCreateMixin, CreateView):
     form_class = SectionForm
     model = Section
     permission_required = 'courseinfo.add_section'
@@ -105,6 +199,23 @@ class SectionUpdate(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     template_name = 'courseinfo/section_form_update.html'
     permission_required = 'courseinfo.change_section'
 
+    def form_valid(self, form):
+        self.object = form.save(commit=False)
+        try:
+            with transaction.atomic():
+                # enrolled_count is left to the triggers, so section_within_capacity checks the
+                # new capacity against registrations committed since the form was validated
+                self.object.save(update_fields=list(form.fields))
+                if 'capacity' in form.changed_data:
+                    promote_waitlist([self.object.pk])
+        except IntegrityError:
+            enrolled_count = Section.objects.values_list('enrolled_count', flat=True).get(pk=self.object.pk)
+            if self.object.capacity >= enrolled_count:
+                raise
+            form.add_error('capacity', CAPACITY_BELOW_ENROLLMENT % enrolled_count)
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
+
 
 class SectionDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Section
@@ -147,7 +258,7 @@ class CourseDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
         return context
 
 
-class CourseCreate(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
+class CourseCreate(LoginRequiredMixin, PermissionRequiredMixin, IdempotentCreateMixin, CreateView):
     form_class = CourseForm
     model = Course
     permission_required = 'courseinfo.add_course'
@@ -167,8 +278,8 @@ class CourseDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
 
     def get(self, request, pk):
         course = get_object_or_404(Course, pk=pk)
-        sections = course.sections.all()
-        if sections.count() > 0:
+        sections = list(chain(course.sections.all(), course.archived_sections.all()))
+        if sections:
             return render(
                 request,
                 'courseinfo/course_refuse_delete.html',
@@ -197,16 +308,71 @@ class SemesterDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
         context = super(DetailView, self).get_context_data(**kwargs)
         semester = self.get_object()
         section_list = semester.sections.all()
+        if semester.is_archived:
+            section_list = chain(section_list, semester.archived_sections.all())
         context['section_list'] = section_list
         return context
 
 
-class SemesterCreate(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
+class SemesterCreate(LoginRequiredMixin, PermissionRequiredMixin, IdempotentCreateMixin, CreateView):
     form_class = SemesterForm
     model = Semester
     permission_required = 'courseinfo.add_semester'
 
 
+class SemesterRollForward(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    form_class = RollForwardForm
+    template_name = 'courseinfo/semester_roll_forward_form.html'
+    permission_required = 'courseinfo.add_section'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.source = get_object_or_404(Semester, pk=kwargs['pk'])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['source'] = self.source
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['semester'] = self.source
+        return context
+
+    def form_valid(self, form):
+        courses = form.cleaned_data['courses']
+        result = roll_forward(self.source, form.cleaned_data['target'], form.cleaned_data['reassign'],
+                              [course.pk for course in courses] if courses else None)
+        return self.render_to_response(self.get_context_data(form=form, target=form.cleaned_data['target'],
+                                                             result=result))
+
+
+class EnrollmentAnalytics(LoginRequiredMixin, PermissionRequiredMixin, TemplateView):
+    template_name = 'courseinfo/enrollment_analytics.html'
+    permission_required = ('courseinfo.view_semester', 'courseinfo.view_section', 'courseinfo.view_registration')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['semester_list'] = overview()
+        return context
+
+
+class SemesterAnalytics(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+    model = Semester
+    template_name = 'courseinfo/semester_analytics.html'
+    permission_required = ('courseinfo.view_semester', 'courseinfo.view_section', 'courseinfo.view_registration')
+
+    def get_queryset(self):
+        return Semester.objects.select_related('year', 'period')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        report = semester_report(self.object)
+        context['course_list'] = report['course']
+        context['instructor_list'] = report['instructor']
+        return context
+
+
 class SemesterUpdate(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     form_class = SemesterForm
     model = Semester
@@ -221,8 +387,8 @@ class SemesterDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
 
     def get(self, request, pk):
         semester = get_object_or_404(Semester, pk=pk)
-        sections = semester.sections.all()
-        if sections.count() > 0:
+        sections = list(chain(semester.sections.all(), semester.archived_sections.all()))
+        if sections:
             return render(
                 request,
                 'courseinfo/semester_refuse_delete.html',
@@ -248,20 +414,68 @@ class StudentDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
     model = Student
     permission_required = 'courseinfo.view_student'
 
+    def get_queryset(self):
+        return with_transcript_version(Student.objects.all())
+
     def get_context_data(self, **kwargs):
         context = super(DetailView, self).get_context_data(**kwargs)
-        student = self.get_object()
-        registration_list = student.registrations.all()
-        context['registration_list'] = registration_list
+        # the current terms of the cached transcript, so the page costs no query per registration
+        context['term_list'] = [term for term in get_transcript(self.object) if not term['is_archived']]
         return context
 
 
-class StudentCreate(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
+class StudentTranscript(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+    model = Student
+    permission_required = ('courseinfo.view_student', 'courseinfo.view_registration')
+    template_name = 'courseinfo/student_transcript.html'
+
+    def get_queryset(self):
+        return with_transcript_version(Student.objects.all())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['term_list'] = get_transcript(self.object)
+        return context
+
+
+class StudentTranscriptData(StudentTranscript):
+    # the same transcript as JSON
+
+    def render_to_response(self, context, **response_kwargs):
+        student = self.object
+        return JsonResponse({
+            'student': {'student_id': student.pk, 'first_name': student.first_name,
+                        'last_name': student.last_name, 'disambiguator': student.disambiguator},
+            'terms': context['term_list'],
+        })
+
+
+class StudentCreate(LoginRequiredMixin, PermissionRequiredMixin, IdempotentCreateMixin, CreateView):
     form_class = StudentForm
     model = Student
     permission_required = 'courseinfo.add_student'
 
 
+class StudentImport(LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    form_class = StudentImportForm
+    template_name = 'courseinfo/student_import_form.html'
+    permission_required = 'courseinfo.add_student'
+    # rejected lines listed on the page; the import_students command prints them all
+    errors_shown = 100
+
+    def form_valid(self, form):
+        try:
+            report = import_students(codecs.iterdecode(form.cleaned_data['file'], 'utf-8-sig'))
+        except (UnicodeDecodeError, ValueError) as error:
+            form.add_error('file', str(error))
+            return self.form_invalid(form)
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            report=report,
+            errors=report.errors[:self.errors_shown],
+        ))
+
+
 class StudentUpdate(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
     form_class = StudentForm
     model = Student
@@ -276,8 +490,8 @@ class StudentDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
 
     def get(self, request, pk):
         student = get_object_or_404(Student, pk=pk)
-        registrations = student.registrations.all()
-        if registrations.count() > 0:
+        registrations = list(chain(student.registrations.all(), student.archived_registrations.all()))
+        if registrations:
             return render(
                 request,
                 'courseinfo/student_refuse_delete.html',
@@ -298,12 +512,15 @@ class RegistrationList(LoginRequiredMixin, PermissionRequiredMixin, ListView):
     permission_required = 'courseinfo.view_registration'
 
 
-class RegistrationDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+class RegistrationDetail(LoginRequiredMixin, PermissionRequiredMixin, ArchiveFallbackMixin, DetailView):
     model = Registration
+    archive_model = ArchivedRegistration
+    context_object_name = 'registration'
+    template_name = 'courseinfo/registration_detail.html'
     permission_required = 'courseinfo.view_registration'
 
     def get_context_data(self, **kwargs):
-        context = super(DetailView, self).get_context_data(**kwargs)
+        context = super().get_context_data(**kwargs)
         registration = self.get_object()
         student = registration.student
         section = registration.section
@@ -312,20 +529,221 @@ class RegistrationDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView
         return context
 
 
-class RegistrationCreate(LoginRequiredMixin, PermissionRequiredMixin, CreateView):
+class RegistrationCreate(RateLimitMixin, LoginRequiredMixin, PermissionRequiredMixin, IdempotentCreateMixin,
+                         SeatReservationMixin, CreateView):
     form_class = RegistrationForm
     model = Registration
     permission_required = 'courseinfo.add_registration'
 
+    def form_valid(self, form):
+        if not settings.ASYNC_REGISTRATION:
+            return super().form_valid(form)
+        # queue the request and answer at once; the worker checks capacity and duplicates for
+        # many queued requests per transaction
+        self.object = RegistrationRequest.objects.create(student=form.cleaned_data['student'],
+                                                         section=form.cleaned_data['section'],
+                                                         requested_by=self.request.user)
+        return HttpResponseRedirect(self.object.get_absolute_url())
+
+
+class RegistrationRequestDetail(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
+    model = RegistrationRequest
+    context_object_name = 'registration_request'
+    permission_required = 'courseinfo.add_registration'
+
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('student', 'section', 'archived_section')
+        if not self.request.user.has_perm('courseinfo.view_registrationrequest'):
+            queryset = queryset.filter(requested_by=self.request.user)
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        registration_request = self.object
+        if registration_request.status == RegistrationRequest.PENDING:
+            context['queue_position'] = registration_request.queue_position
+        elif registration_request.status != RegistrationRequest.REJECTED:
+            registrations = Registration if registration_request.archived_section_id is None else ArchivedRegistration
+            context['registration'] = registrations.objects.filter(student=registration_request.student_id,
+                                                                   section=registration_request.requested_section).first()
+        return context
+
+
+class RegistrationBulkCreate(RateLimitMixin, LoginRequiredMixin, PermissionRequiredMixin, FormView):
+    form_class = BulkRegistrationForm
+    template_name = 'courseinfo/registration_bulk_form.html'
+    permission_required = 'courseinfo.add_registration'
+
+    def form_valid(self, form):
+        # the outcome of every student is reported on the form page rather than redirecting
+        outcomes = bulk_register(form.cleaned_data['section'], form.cleaned_data['students'])
+        return self.render_to_response(self.get_context_data(
+            form=form,
+            section=form.cleaned_data['section'],
+            outcomes=outcomes,
+            summary=sorted(Counter(outcome.status for outcome in outcomes).items()),
+        ))
 
-class RegistrationUpdate(LoginRequiredMixin, PermissionRequiredMixin, UpdateView):
+
+class RegistrationUpdate(RateLimitMixin, LoginRequiredMixin, PermissionRequiredMixin, SeatReservationMixin, UpdateView):
     form_class = RegistrationForm
     model = Registration
     template_name = 'courseinfo/registration_form_update.html'
     permission_required = 'courseinfo.change_registration'
 
 
-class RegistrationDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
+class RegistrationDelete(RateLimitMixin, LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
     model = Registration
     success_url = reverse_lazy('courseinfo_registration_list_urlpattern')
     permission_required = 'courseinfo.delete_registration'
+
+    def form_valid(self, form):
+        # the freed seat goes to the section's waitlist in the same transaction
+        drop_registrations(Registration.objects.filter(pk=self.object.pk))
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class WaitlistEntryCreate(LoginRequiredMixin, PermissionRequiredMixin, IdempotentCreateMixin, CreateView):
+    form_class = WaitlistEntryForm
+    model = WaitlistEntry
+    permission_required = 'courseinfo.add_waitlistentry'
+
+    def get_initial(self):
+        return {'section': self.request.GET.get('section')}
+
+    def get_success_url(self):
+        return self.object.section.get_absolute_url()
+
+
+class WaitlistEntryDelete(LoginRequiredMixin, PermissionRequiredMixin, DeleteView):
+    model = WaitlistEntry
+    permission_required = 'courseinfo.delete_waitlistentry'
+
+    def get_success_url(self):
+        return self.object.section.get_absolute_url()
+
+
+class SearchView(LoginRequiredMixin, PageLinksMixin, ListView):
+    paginate_by = 25
+    template_name = 'courseinfo/search.html'
+    context_object_name = 'result_list'
+
+    def get_kinds(self):
+        # only search the kinds of object this user is allowed to view
+        requested = self.request.GET.get('kind')
+        return [kind for kind in KINDS
+                if self.request.user.has_perm('courseinfo.view_%s' % kind)
+                and requested in (None, '', kind)]
+
+    def get_queryset(self):
+        return SearchResults(self.request.GET.get('q', ''), self.get_kinds())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.request.GET.get('q', '')
+        context['kind'] = self.request.GET.get('kind', '')
+        context['kinds'] = KINDS
+        return context
+
+
+class ConcurrencyMetrics(LoginRequiredMixin, UserPassesTestMixin, View):
+    # In-flight request gauges of the load-shedding middleware, for staff and monitoring.
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request):
+        return JsonResponse(limiter.metrics(settings.CONCURRENCY_LIMITS))
+
+
+class InstructorExport(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = 'courseinfo.view_instructor'
+
+    def get(self, request):
+        return stream_csv('instructors.csv', INSTRUCTOR_COLUMNS, Instructor.objects.all())
+
+
+class StudentExport(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = 'courseinfo.view_student'
+
+    def get(self, request):
+        return stream_csv('students.csv', STUDENT_COLUMNS, Student.objects.all())
+
+
+class RegistrationExport(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = 'courseinfo.view_registration'
+
+    def get(self, request):
+        return stream_csv('registrations.csv', REGISTRATION_COLUMNS, Registration.objects.all())
+
+
+class SectionRosterExport(LoginRequiredMixin, PermissionRequiredMixin, View):
+    permission_required = ('courseinfo.view_section', 'courseinfo.view_registration')
+
+    def get(self, request, pk):
+        # rosters of archived sections come from the archive tables, like the detail pages
+        if Section.objects.filter(pk=pk).exists():
+            registrations = Registration.objects.filter(section=pk)
+        elif ArchivedSection.objects.filter(pk=pk).exists():
+            registrations = ArchivedRegistration.objects.filter(section=pk)
+        else:
+            raise Http404('No section found matching the query')
+        return stream_csv('section-%s-roster.csv' % pk, ROSTER_COLUMNS, registrations)
+
+
+class ApiView(LoginRequiredMixin, View):
+    # Read-only JSON over the courseinfo models; see courseinfo.api.Query for the parameters.
+    raise_exception = True
+
+    def get(self, request, resource, pk=None):
+        try:
+            query = Query(resource, request.GET)
+            if not request.user.has_perms(query.permissions()):
+                raise ApiError('You may not view these objects.', status=403)
+            queryset = query.resource.model.objects.all()
+            if pk is None:
+                return JsonResponse({'results': query.fetch(queryset), 'next': self.next_url(query)})
+            rows = query.fetch(queryset.filter(pk=pk))
+            if not rows:
+                raise ApiError('No %s with ID %s.' % (resource, pk), status=404)
+            return JsonResponse(rows[0])
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=error.status)
+
+    def next_url(self, query):
+        cursor = query.next_cursor()
+        if cursor is None:
+            return None
+        params = self.request.GET.copy()
+        params['cursor'] = cursor
+        return '%s?%s' % (self.request.path, params.urlencode())
+
+
+class ApiBatch(LoginRequiredMixin, View):
+    # Many objects of one resource by ID (``ids=1,2,3``); see courseinfo.api.BatchQuery.
+    raise_exception = True
+
+    def get(self, request, resource):
+        try:
+            query = BatchQuery(resource, request.GET)
+            if not request.user.has_perms(query.permissions()):
+                raise ApiError('You may not view these objects.', status=403)
+            rows = query.fetch(query.resource.model.objects.all())
+            return JsonResponse({'results': rows, 'missing': query.missing})
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=error.status)
+
+
+class ChangeFeed(LoginRequiredMixin, PermissionRequiredMixin, View):
+    # Every logged change after ``after``, one JSON object per line; see courseinfo.changelog.FeedQuery.
+    permission_required = 'courseinfo.view_changelogentry'
+    raise_exception = True
+
+    def get(self, request):
+        try:
+            query = FeedQuery(request.GET)
+            query.check()
+        except ApiError as error:
+            return JsonResponse({'error': str(error)}, status=error.status)
+        query.acknowledge()
+        return StreamingHttpResponse(query.lines(), content_type='application/x-ndjson')
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'courseinfo.middleware.ConcurrencyLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,6 +85,90 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rate-limit buckets must be shared by every worker process. A file cache does that on a
+    # single host without touching the database; point this at memcached or Redis when the
+    # workers run on several.
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'flynn_michael_ezu_throttle'),
+    },
+}
+
+# Token-bucket limits on the registration write views (see courseinfo.throttling): one bucket per
+# client IP, and one per user sized by the most generous of the user's groups listed here.
+# Superusers only have the IP limit. A user's rate is cached per session; changes to the user's
+# groups apply at once, changes to GROUPS within throttling.USER_RATE_TIMEOUT.
+REGISTRATION_RATE_LIMITS = {
+    'CACHE': 'throttle',
+    'IP': '120/min',
+    'GROUPS': {
+        'ci_registrar': '300/min',
+        'ci_user': '10/min',
+    },
+    'DEFAULT': '10/min',
+}
+
+# During peak registration windows, RegistrationCreate queues requests instead of registering at
+# once; run the process_registration_queue worker to process them in batches.
+ASYNC_REGISTRATION = False
+
+# Load shedding (see courseinfo.middleware): once PROCESS requests are in flight in one worker
+# process, or CLUSTER across every process sharing CACHE, new requests get a 503 at once. Pages
+# named in LOW_PRIORITY are shed earlier, at LOW_PRIORITY_SHARE of the limits, and PROTECTED
+# ones are never shed. Size PROCESS to the worker's thread count. Processes exchange their
+# counts every REFRESH seconds.
+CONCURRENCY_LIMITS = {
+    'CACHE': 'throttle',
+    'PROCESS': 16,
+    'CLUSTER': 64,
+    'LOW_PRIORITY_SHARE': 0.5,
+    'LOW_PRIORITY': [
+        'courseinfo_*_list_urlpattern',
+        'courseinfo_*_export_urlpattern',
+        'courseinfo_search_urlpattern',
+        'courseinfo_change_feed_urlpattern',
+        'courseinfo_teaching_load_urlpattern',
+    ],
+    'PROTECTED': [
+        'login_urlpattern',
+        'courseinfo_registration_create_urlpattern',
+        'courseinfo_registration_bulk_urlpattern',
+        'courseinfo_registration_update_urlpattern',
+        'courseinfo_registration_delete_urlpattern',
+        'courseinfo_concurrency_metrics_urlpattern',
+    ],
+    'REFRESH': 1,
+}
+
+# Student transcripts are cached per student and version (see courseinfo.transcript). Any change
+# to the student's registrations makes a new version at once; TIMEOUT bounds how long renamed
+# courses, sections and instructors take to show.
+TRANSCRIPTS = {
+    'CACHE': 'default',
+    'TIMEOUT': 60 * 60,
+}
+
+# Enrollment analytics are cached per semester until its sections or registrations change (see
+# courseinfo.analytics); TIMEOUT bounds how long renamed courses and instructors take to show.
+ANALYTICS = {
+    'CACHE': 'default',
+    'TIMEOUT': 60 * 60,
+}
+
+# Tests restore a prebuilt, migrated SQLite template instead of replaying migrations on every run
+# (see courseinfo.test_runner).
+TEST_RUNNER = 'courseinfo.test_runner.TemplateDatabaseRunner'
+
+TEST_DB_TEMPLATE_DIR = BASE_DIR / '../.test_db_templates'
+
+# How long (in seconds) a create form's idempotency key is remembered and its result replayed
+# (see courseinfo.idempotency).
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators